@@ -3,9 +3,16 @@ import pandas as pd
 import numpy as np
 import requests
 from datetime import datetime, timedelta
-import matplotlib.pyplot as plt
 import json
 import time
+import copy
+from checkpoint import BacktestCheckpointStore, config_key, data_fingerprint, source_version
+from columnar_store import ColumnarStore
+import indicators
+from scoring import MomentumScorer
+from selection import CorrelationSelector
+from market_cap_store import MarketCapStore
+from market_data import DEFAULT_DATA_DIR, MarketDataClient
 
 
 class UpbitMomentumBacktest:
@@ -32,6 +39,53 @@ class UpbitMomentumBacktest:
         self.max_slots = config['trading'].get('max_slots', 3)
         self.rebalancing_interval = config['trading'].get('rebalancing_interval', 10080)  # 분 단위
 
+        # 시세 데몬이 실행 중이면 공유 메모리의 캔들을 우선 사용
+        market_data = config.get('market_data', {})
+        self.market_data = MarketDataClient(
+            data_dir=market_data.get('data_dir', DEFAULT_DATA_DIR),
+            max_staleness=market_data.get('max_staleness', 10)
+        ) if market_data.get('enabled', False) else None
+
+        # 분봉 등 장기간 캔들을 메모리 맵 컬럼 저장소(columnar_store.py)에서 읽음
+        history = config.get('history', {})
+        self.history = ColumnarStore(
+            root=history.get('root', 'history'),
+            interval=history.get('interval', 'minute1')
+        ) if history.get('enabled', False) else None
+
+        # 종합 모멘텀 점수 (실거래와 동일한 점수 엔진)
+        momentum = config.get('momentum', {})
+        self.scorer = MomentumScorer(
+            horizons=momentum.get('horizons', [7]),
+            weights=momentum.get('weights'),
+            vol_window=momentum.get('vol_window', 7),
+            vol_adjust=momentum.get('vol_adjust', False),
+            cross_sectional=momentum.get('cross_sectional', False)
+        )
+
+        # 모멘텀 후보 간 상관계수 상한 (실거래와 동일한 선택 단계)
+        selection = config.get('selection', {})
+        self.selector = CorrelationSelector(
+            window=selection.get('window', 30),
+            max_correlation=selection.get('max_correlation', 0.8),
+            min_periods=selection.get('min_periods', 5)
+        ) if selection.get('enabled', False) else None
+
+        # 설정/시작일/전략 코드가 같으면 저장된 체크포인트부터 이어서 실행
+        backtest = config.get('backtest', {})
+        # 일봉은 로컬 컬럼 저장소에 쌓아두고 실행할 때마다 새로 생긴 캔들만 조회
+        self.candles = ColumnarStore(
+            root=backtest.get('candle_dir', 'candles'),
+            interval='day'
+        ) if backtest.get('candle_store', True) else None
+        # 백테스트, 점수, 상관계수 선택, 지표 모듈 중 하나라도 바뀌면 새로 실행
+        strategy_version = source_version(UpbitMomentumBacktest, MomentumScorer, CorrelationSelector, indicators)
+        self.checkpoints = BacktestCheckpointStore(
+            directory=backtest.get('checkpoint_dir', 'checkpoints'),
+            key=config_key(config, start_date, strategy_version),
+            interval=backtest.get('checkpoint_interval', 7)
+        ) if backtest.get('checkpoint', True) else None
+
         # 트래킹 변수 초기화
         self.holding_periods = {}
         self.consecutive_holds = {}
@@ -54,6 +108,12 @@ class UpbitMomentumBacktest:
                           ' Chrome/58.0.3029.110 Safari/537.3'
         }
 
+        # 시가총액 시계열은 로컬에 저장하고 없는 기간만 조회
+        self.market_cap_store = MarketCapStore(
+            directory=backtest.get('market_cap_dir', 'market_caps'),
+            headers=self.headers
+        )
+
     def log(self, message):
         if self.verbose:
             print(message)
@@ -99,32 +159,12 @@ class UpbitMomentumBacktest:
                 continue
             cg_id = cg_coin['id']
 
-            # 시가총액 히스토리 데이터 가져오기
-            market_cap_url = f"https://api.coingecko.com/api/v3/coins/{cg_id}/market_chart"
-            params = {
-                'vs_currency': 'usd',
-                'days': 'max'
-            }
-            try:
-                response = requests.get(market_cap_url, headers=self.headers, params=params)
-                if response.status_code == 401:
-                    self.log(f"CoinGecko API 인증 오류: {response.status_code} for {cg_id}")
-                    continue
-                elif response.status_code != 200:
-                    self.log(f"CoinGecko API 오류 ({response.status_code}) for {cg_id}")
-                    continue
-                data = response.json()
-                # 'market_caps'는 [timestamp, market_cap] 형식
-                market_caps = {}
-                for entry in data['market_caps']:
-                    date = datetime.utcfromtimestamp(entry[0] / 1000).strftime("%Y-%m-%d")
-                    if self.start_date.strftime("%Y-%m-%d") <= date <= self.end_date.strftime("%Y-%m-%d"):
-                        market_caps[date] = entry[1]
-                coin_market_caps[coin.upper()] = market_caps
-                time.sleep(1)  # 요청 간 지연 시간 (1초)
-            except Exception as e:
-                self.log(f"CoinGecko API 호출 중 오류 발생 for {cg_id}: {str(e)}")
+            # 저장된 시가총액 중 백테스트 기간만 사용 (저장되지 않은 기간만 range 쿼리로 조회)
+            market_caps = self.market_cap_store.get_range(cg_id, self.start_date, self.end_date)
+            if not market_caps:
+                self.log(f"{cg_id}의 시가총액 데이터가 없습니다.")
                 continue
+            coin_market_caps[coin.upper()] = market_caps
         return coin_market_caps
 
     def load_historical_data(self, ticker, start_date, end_date):
@@ -139,6 +179,29 @@ class UpbitMomentumBacktest:
         Returns:
         DataFrame: 과거 가격 데이터
         """
+        # 일봉 구간: 시작일 09:00 ~ 종료일 다음날 08:59:59
+        range_start = start_date.replace(hour=9, minute=0, second=0)
+        range_end = end_date.replace(hour=9, minute=0, second=0) + timedelta(days=1, seconds=-1)
+        if self.history is not None and self.history.months(ticker):
+            if self.history.interval == 'day':
+                df = self.history.get_ohlcv_range(ticker, range_start, range_end)
+            else:
+                df = self.history.aggregate_range(ticker, range_start, range_end, 'day')
+            if df is not None:
+                return df
+        if self.market_data is not None:
+            df = self.market_data.get_ohlcv_range(ticker, "day", start_date, end_date)
+            if df is not None:
+                return df
+        if self.candles is not None:
+            try:
+                fetched = self.candles.update(ticker, range_start, range_end)
+                self.log(f"{ticker} 신규 일봉 {fetched}개 저장")
+            except Exception as e:
+                self.log(f"{ticker}의 일봉 갱신 실패: {str(e)}")
+            df = self.candles.get_ohlcv_range(ticker, range_start, range_end)
+            if df is not None:
+                return df
         try:
             df = pyupbit.get_ohlcv(ticker, interval="day", from_=start_date, to=end_date)
             return df
@@ -201,31 +264,34 @@ class UpbitMomentumBacktest:
         else:
             return -np.inf  # 데이터 부족 시 극단적인 손실률 반환
 
-    def get_top3_momentum(self, date_str, top20, all_price_data):
+    def get_top3_momentum(self, date_str, top20, all_price_data, count=3):
         """
-        모멘텀 상위 3개 코인 선정
+        모멘텀 상위 3개 코인 선정 (종합 모멘텀 점수 기준)
 
         Parameters:
         date_str (str): 기준 날짜 (YYYY-MM-DD)
         top20 (list): 시가총액 상위 20개 코인 티커 리스트
         all_price_data (dict): 코인별 가격 데이터
+        count (int): 선정할 코인 수 (여러 슬롯 수를 함께 시뮬레이션할 때 가장 큰 값)
 
         Returns:
-        list: 모멘텀 상위 3개 코인 티커 리스트
+        list: 모멘텀 상위 count개 코인 티커 리스트 (순위 순)
         """
-        returns = {}
-        current_date = datetime.strptime(date_str, "%Y-%m-%d")
+        closes = {}
+        length = max(self.scorer.lookback, self.selector.window + 1 if self.selector else 0)
         for ticker in top20:
             df = all_price_data.get(ticker, pd.DataFrame())
-            if df.empty:
-                continue
-            seven_day_return = self.calculate_7day_return(df, current_date)
-            if seven_day_return > -100:  # 정상적인 수익률만 고려
-                returns[ticker] = seven_day_return
-
-        # 수익률 기준 정렬
-        sorted_returns = sorted(returns.items(), key=lambda x: x[1], reverse=True)
-        top3 = [coin for coin, ret in sorted_returns[:3]]
+            if df.empty or date_str not in df.index:
+                continue  # 해당 날짜 데이터가 없으면 제외
+            closes[ticker] = df['close'].loc[:date_str].iloc[-length:]
+
+        # 종합 모멘텀 점수 기준 정렬 (점수를 계산할 수 없는 코인 제외)
+        sorted_returns = self.scorer.rank(closes)
+        if self.selector is not None:
+            # 해당 날짜 종가까지 반영한 상관계수 상한 안에서 모멘텀 순으로 선택
+            self.selector.update(closes, include_last=True)
+            return self.selector.select([coin for coin, ret in sorted_returns], count)
+        top3 = [coin for coin, ret in sorted_returns[:count]]
         return top3
 
     def get_portfolio_value(self, date_str, all_price_data):
@@ -346,9 +412,43 @@ class UpbitMomentumBacktest:
                     })
                     self.log(f"{date_str}: {ticker} 매수 - 투자금액: {invest_amount:,.0f}원, 수량: {amount:.6f}")
 
-    def run_backtest(self):
+    def get_state(self):
         """
-        백테스팅 실행
+        체크포인트로 저장할 백테스트 상태
+        """
+        return {
+            'portfolio': dict(self.portfolio),
+            'holding_periods': dict(self.holding_periods),
+            'consecutive_holds': dict(self.consecutive_holds),
+            'is_trading_suspended': self.is_trading_suspended,
+            'last_rebalance_time': self.last_rebalance_time,
+            'portfolio_history': list(self.portfolio_history),
+            'trade_log': list(self.trade_log),
+            'selector': copy.deepcopy(self.selector)
+        }
+
+    def set_state(self, state):
+        """
+        체크포인트에서 백테스트 상태 복원
+
+        Parameters:
+        state (dict): get_state()가 반환한 상태
+        """
+        self.portfolio = dict(state['portfolio'])
+        self.holding_periods = dict(state['holding_periods'])
+        self.consecutive_holds = dict(state['consecutive_holds'])
+        self.is_trading_suspended = state['is_trading_suspended']
+        self.last_rebalance_time = state['last_rebalance_time']
+        self.portfolio_history = list(state['portfolio_history'])
+        self.trade_log = list(state['trade_log'])
+        self.selector = copy.deepcopy(state['selector'])
+
+    def load_backtest_data(self):
+        """
+        백테스트에 필요한 데이터 로드
+
+        Returns:
+        tuple: (코인별 가격 데이터, 코인별 날짜별 시가총액, BTC 가격 데이터) - BTC 데이터가 없으면 None
         """
         # 1. 모든 티커의 과거 가격 데이터 로드
         symbols = self.get_coin_list()
@@ -377,12 +477,32 @@ class UpbitMomentumBacktest:
         df_btc = self.load_historical_data("KRW-BTC", self.start_date - timedelta(days=120), self.end_date)
         if df_btc.empty:
             self.log("BTC의 가격 데이터를 로드할 수 없습니다. 백테스팅을 중단합니다.")
-            return
+            return None
         df_btc.index = df_btc.index.strftime("%Y-%m-%d")
+        return all_price_data, coin_market_caps, df_btc
+
+    def run_backtest(self):
+        """
+        백테스팅 실행
+        """
+        data = self.load_backtest_data()
+        if data is None:
+            return
+        all_price_data, coin_market_caps, df_btc = data
         ma120_series = self.get_btc_ma120(df_btc)
 
-        # 백테스팅 기간 동안의 날짜 순회
+        # 백테스팅 기간 동안의 날짜 순회 (유효한 체크포인트가 있으면 그 다음 날부터)
         current_date = self.start_date
+        end_date_str = self.end_date.strftime("%Y-%m-%d")
+        fingerprint = lambda date_str: data_fingerprint(date_str, all_price_data, coin_market_caps)
+        if self.checkpoints is not None:
+            checkpoint = self.checkpoints.load_latest(end_date_str, fingerprint)
+            if checkpoint is not None:
+                checkpoint_date, state = checkpoint
+                self.set_state(state)
+                current_date = datetime.strptime(checkpoint_date, "%Y-%m-%d") + timedelta(days=1)
+                self.log(f"{checkpoint_date} 체크포인트에서 이어서 실행합니다.")
+
         while current_date <= self.end_date:
             date_str = current_date.strftime("%Y-%m-%d")
             self.log(f"백테스팅 날짜: {date_str}")
@@ -456,8 +576,17 @@ class UpbitMomentumBacktest:
                 'portfolio_value': portfolio_value
             })
 
+            # 주기적으로, 그리고 마지막 이틀(종료일 캔들이 진행 중이었을 수 있으므로 전날 포함)은 체크포인트 저장
+            if self.checkpoints is not None and (
+                    (current_date - self.start_date).days % self.checkpoints.interval == 0
+                    or (self.end_date - current_date).days < 2):
+                self.checkpoints.save(date_str, fingerprint(date_str), self.get_state())
+
             current_date += timedelta(days=1)
 
+        if self.checkpoints is not None:
+            self.checkpoints.prune(self.start_date)
+
         # 백테스팅 결과 시각화
         self.plot_results()
 
@@ -465,6 +594,8 @@ class UpbitMomentumBacktest:
         """
         백테스팅 결과 시각화
         """
+        import matplotlib.pyplot as plt  # 헤드리스 실행 시 불필요한 import 방지
+
         df_portfolio = pd.DataFrame(self.portfolio_history)
         df_portfolio['date'] = pd.to_datetime(df_portfolio['date'])
         df_portfolio.set_index('date', inplace=True)
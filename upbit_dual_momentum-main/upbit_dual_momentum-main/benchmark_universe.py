@@ -0,0 +1,100 @@
+"""
+멀티 마켓(KRW/BTC/USDT) 유니버스 스캔 벤치마크
+
+가상 거래소(simulation.HistoricalQuotation)의 마켓 수를 늘려가며
+UpbitMomentumStrategy.get_top_momentum() 한 번에 걸리는 시간, 메모리(tracemalloc 최고치),
+시세 요청 수(티커 일괄 조회는 200개씩 나눠 ceil(N / 200)회), API 호출 제한 대기 시간(가상 시각)을 측정
+
+사용법: python benchmark_universe.py [마켓 수 ...]  (기본값 200 500 1000 2000)
+"""
+import json
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from simulation import SimulationHarness
+from universe import QUOTE_CURRENCIES, TICKER_BATCH_SIZE
+
+
+def synthetic_markets(n_markets, days=30, seed=0):
+    """
+    n_markets개 마켓의 시간봉 캔들 (원화 50%, BTC 30%, USDT 20%, 일부 코인은 여러 마켓에 상장)
+    + 환율 마켓 KRW-BTC, KRW-USDT
+    """
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(datetime(2024, 1, 1), periods=days * 24, freq='h')
+    shares = {'KRW': 0.5, 'BTC': 0.3, 'USDT': 0.2}
+    markets = ['KRW-BTC', 'KRW-USDT']
+    for quote, share in shares.items():
+        count = int(n_markets * share)
+        # 원화 마켓 코인의 절반은 BTC/USDT 마켓에도 상장
+        markets += [f"{quote}-C{i:04d}" for i in (range(count) if quote == 'KRW' else range(count // 2, count // 2 + count))]
+    markets = list(dict.fromkeys(markets))
+
+    base_price = {'KRW': 1000.0, 'BTC': 0.00002, 'USDT': 0.75}
+    candles = {}
+    for market in markets:
+        quote = market.split('-')[0]
+        price = 50_000_000.0 if market == 'KRW-BTC' else 1300.0 if market == 'KRW-USDT' else base_price[quote]
+        close = price * np.exp(np.cumsum(rng.normal(0.0, 0.01, len(index))))
+        open_ = np.concatenate([[close[0]], close[:-1]])
+        volume = rng.lognormal(10, 2, len(index))
+        candles[market] = {'minute60': pd.DataFrame({
+            'open': open_,
+            'high': np.maximum(open_, close) * 1.002,
+            'low': np.minimum(open_, close) * 0.998,
+            'close': close,
+            'volume': volume,
+            'value': volume * close
+        }, index=index)}
+    return candles, index[-1].to_pydatetime()
+
+
+def run_scan(n_markets, config_path='config.json'):
+    from main import UpbitMomentumStrategy
+
+    candles, last = synthetic_markets(n_markets)
+    start = last - timedelta(hours=1)
+    harness = SimulationHarness(candles, start, last + timedelta(days=1), config_path=config_path)
+    with open(harness.config_path, 'r') as f:
+        config = json.load(f)
+    config['universe'] = dict(config.get('universe', {}), quotes=list(QUOTE_CURRENCIES))
+    config['tracing'] = {'enabled': False}
+    with open(harness.config_path, 'w') as f:
+        json.dump(config, f)
+
+    strategy = UpbitMomentumStrategy(
+        config_path=harness.config_path, upbit=harness.upbit, quotation=harness.quotation,
+        clock=harness.clock, notifier=harness.notifier
+    )
+    requests_before = harness.quotation.request_count
+    virtual_before = harness.clock.time()
+    tracemalloc.start()
+    wall_start = time.perf_counter()
+    top = strategy.get_top_momentum(top_n=20)
+    wall_time = time.perf_counter() - wall_start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'markets': len(candles),
+        'scanned': len(strategy.universe_prefilter.last_snapshot),
+        'ticker_requests': -(-len(strategy.universe_prefilter.last_snapshot) // TICKER_BATCH_SIZE),
+        'wall_time': wall_time,
+        'peak_mb': peak / 1024 ** 2,
+        'requests': harness.quotation.request_count - requests_before,
+        'throttle_seconds': harness.clock.time() - virtual_before,
+        'non_krw_in_top': sum(not ticker.startswith('KRW-') for ticker in top)
+    }
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or [200, 500, 1000, 2000]
+    print(f"{'마켓 수':>8} {'스캔(초)':>10} {'메모리(MB)':>10} {'조회 마켓':>8} {'티커 요청':>8} {'요청 수':>8} {'대기(초)':>8} {'상위20 비원화':>12}")
+    for size in sizes:
+        result = run_scan(size)
+        print(f"{result['markets']:>8} {result['wall_time']:>10.3f} {result['peak_mb']:>10.1f} {result['scanned']:>8} "
+              f"{result['ticker_requests']:>8} {result['requests']:>8} {result['throttle_seconds']:>8.1f} {result['non_krw_in_top']:>12}")
@@ -0,0 +1,143 @@
+import threading
+import time
+
+from market_data import DAY_OFFSET, INTERVAL_SECONDS, bucket_start
+
+
+class BreakoutTable:
+    """
+    모멘텀 후보별 돌파 목표가/동적 k/ATR/손절가/익절가 테이블
+    - 시간봉이 마감될 때마다(캔들당 1회) 후보 코인의 캔들을 조회해 미리 계산
+    - 후보 코인 캔들을 모두 받은 뒤 지표는 한 번에 계산 (indicators.py 패널 커널)
+    - 매수 판단 시에는 테이블 조회와 현재가 비교만 수행
+    - background=True면 별도 스레드에서, False면 maybe_refresh() 호출 시 갱신 (가상 시계 시뮬레이션용)
+    """
+
+    def __init__(self, compute, fetcher, interval='minute60', count=48, refresh_delay=5,
+                 background=True, clock=None):
+        """
+        :param compute: {ticker: df} -> {ticker: 테이블 항목 딕셔너리 (breakout_price, dynamic_k, atr, stop_loss, take_profit)}
+        :param fetcher: 캔들 조회 함수 (ticker, interval, count) -> DataFrame
+        :param interval: 돌파 계산에 사용할 캔들 간격
+        :param count: 조회할 캔들 수
+        :param refresh_delay: 캔들 마감 후 갱신까지 대기 시간 (초, 거래소 캔들 확정 대기)
+        :param background: 백그라운드 스레드 사용 여부
+        :param clock: time()/sleep()을 제공하는 시계 (기본값 time 모듈)
+        """
+        self.compute = compute
+        self.fetcher = fetcher
+        self.interval = interval
+        self.count = count
+        self.refresh_delay = refresh_delay
+        self.background = background
+        self.clock = clock or time
+        self.entries = {}
+        self.candidates = []
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.thread = None
+
+    def current_bucket(self):
+        """
+        현재 진행 중인 캔들의 시작 시각 (KST epoch 초)
+        """
+        return bucket_start(int(self.clock.time()) + DAY_OFFSET, self.interval)
+
+    def set_candidates(self, tickers):
+        """
+        갱신 대상 후보 코인 지정 (새 후보가 있으면 백그라운드 갱신을 바로 깨움)
+        """
+        with self.lock:
+            new = [t for t in tickers if t not in self.candidates]
+            self.candidates = list(tickers)
+        if new and self.background:
+            self.wakeup.set()
+
+    def _update(self, tickers, bucket):
+        """
+        tickers 캔들을 조회한 뒤 항목을 한 번에 계산해 교체
+        """
+        frames = {}
+        for ticker in tickers:
+            try:
+                df = self.fetcher(ticker, interval=self.interval, count=self.count)
+            except Exception as e:
+                print(f"[BreakoutTable] {ticker} 캔들 조회 실패: {e}")
+                continue
+            if df is not None and len(df) >= 3:
+                frames[ticker] = df
+        if not frames:
+            return {}
+        try:
+            entries = self.compute(frames)
+        except Exception as e:
+            print(f"[BreakoutTable] {list(frames)} 갱신 실패: {e}")
+            return {}
+        for ticker, entry in entries.items():
+            entry['bucket'] = bucket
+            self.entries[ticker] = entry  # 항목 단위로 교체하므로 읽는 쪽은 잠금 불필요
+        return entries
+
+    def refresh_one(self, ticker, bucket=None):
+        bucket = self.current_bucket() if bucket is None else bucket
+        return self._update([ticker], bucket).get(ticker)
+
+    def refresh(self):
+        """
+        현재 캔들 기준 항목이 없는 후보만 갱신
+        :return: 갱신한 코인 수
+        """
+        bucket = self.current_bucket()
+        with self.lock:
+            candidates = list(self.candidates)
+        stale = [t for t in candidates if self.entries.get(t, {}).get('bucket') != bucket]
+        if stale:
+            self._update(stale, bucket)
+        return len(stale)
+
+    def maybe_refresh(self):
+        """
+        동기 모드: 캔들 마감 후 refresh_delay가 지났으면 갱신
+        """
+        if self.clock.time() + DAY_OFFSET - self.current_bucket() >= self.refresh_delay:
+            self.refresh()
+
+    def get(self, ticker):
+        """
+        현재 캔들 기준 항목 (없거나 지난 캔들 기준이면 즉시 계산)
+        """
+        entry = self.entries.get(ticker)
+        if entry is not None and entry['bucket'] == self.current_bucket():
+            return entry
+        return self.refresh_one(ticker)
+
+    def state(self):
+        """
+        재시작 복원용 상태 (항목과 후보 목록)
+        """
+        return {'entries': dict(self.entries), 'candidates': list(self.candidates)}
+
+    def restore(self, state):
+        """
+        state()로 저장한 상태 복원 (지난 캔들 기준 항목은 get()에서 다시 계산)
+        """
+        if not state:
+            return
+        self.entries.update(state.get('entries', {}))
+        self.set_candidates(state.get('candidates', []))
+
+    def _loop(self):
+        seconds = INTERVAL_SECONDS[self.interval]
+        while True:
+            self.refresh()
+            # 다음 캔들 마감 + refresh_delay까지 대기 (새 후보가 지정되면 즉시 깨어남)
+            now = self.clock.time() + DAY_OFFSET
+            wait = self.current_bucket() + seconds + self.refresh_delay - now
+            self.wakeup.wait(max(wait, 0))
+            self.wakeup.clear()
+
+    def start(self):
+        if not self.background or self.thread is not None:
+            return
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+        self.thread.start()
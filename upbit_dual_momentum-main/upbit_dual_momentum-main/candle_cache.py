@@ -0,0 +1,65 @@
+import os
+import time
+
+import pyupbit
+
+
+class CandleCache:
+    """
+    캔들 데이터를 메모리와 디스크에 캐시
+    - 재시작 직후에도 디스크에 저장된 최근 캔들을 바로 사용해 첫 리스크 체크까지의 네트워크 요청을 줄임
+    - pandas는 디스크 입출력이 필요할 때만 import
+    """
+
+    def __init__(self, cache_dir='cache', max_age=600, fetcher=None, clock=None):
+        """
+        :param cache_dir: 캐시 파일 저장 디렉토리 (None이면 메모리에만 캐시)
+        :param max_age: 캐시 유효 시간 (초)
+        :param fetcher: 캔들 조회 함수 (기본값 pyupbit.get_ohlcv)
+        :param clock: time()을 제공하는 시계 (기본값 time 모듈)
+        """
+        self.cache_dir = cache_dir
+        self.max_age = max_age
+        self.fetcher = fetcher or pyupbit.get_ohlcv
+        self.clock = clock or time
+        self.memory = {}
+
+    def _path(self, ticker, interval, count):
+        return os.path.join(self.cache_dir, f"{ticker}_{interval}_{count}.pkl")
+
+    def get_ohlcv(self, ticker, interval="day", count=200, max_age=None):
+        """
+        pyupbit.get_ohlcv와 동일한 형태의 DataFrame 반환 (유효한 캐시가 있으면 네트워크 요청 없음)
+        :param max_age: 이 호출에만 적용할 캐시 유효 시간 (초, None이면 기본값)
+        """
+        max_age = self.max_age if max_age is None else max_age
+        key = (ticker, interval, count)
+        now = self.clock.time()
+
+        cached = self.memory.get(key)
+        if cached is not None and now - cached[0] < max_age:
+            return cached[1]
+
+        path = self._path(ticker, interval, count) if self.cache_dir else None
+        if cached is None and path and os.path.exists(path) and now - os.path.getmtime(path) < max_age:
+            import pandas as pd
+            try:
+                df = pd.read_pickle(path)
+                self.memory[key] = (os.path.getmtime(path), df)
+                return df
+            except Exception as e:
+                print(f"[CandleCache] {path} 로드 실패: {e}")
+
+        df = self.fetcher(ticker, interval=interval, count=count)
+        if df is None:
+            # 조회 실패 시 만료된 캐시라도 반환
+            return cached[1] if cached is not None else None
+        self.memory[key] = (now, df)
+        if not path:
+            return df
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            df.to_pickle(path)
+        except Exception as e:
+            print(f"[CandleCache] {path} 저장 실패: {e}")
+        return df
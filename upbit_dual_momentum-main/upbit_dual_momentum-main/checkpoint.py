@@ -0,0 +1,129 @@
+import hashlib
+import inspect
+import json
+import os
+import pickle
+from datetime import datetime
+
+import numpy as np
+
+PRICE_COLUMNS = ['open', 'high', 'low', 'close']
+
+
+# 백테스트 결과에 영향을 주는 설정 (섹션 -> 키 목록, None이면 섹션 전체)
+# 실거래 전용 섹션(tracing, watchdog, order_tracker 등)은 바꿔도 체크포인트를 그대로 사용
+BACKTEST_CONFIG = {
+    'trading': ('manual_holdings', 'exclude_coins', 'max_slots', 'rebalancing_interval'),
+    'momentum': None,
+    'selection': None
+}
+
+
+def config_key(config, start_date, extra=None, relevant=BACKTEST_CONFIG):
+    """
+    백테스트 결과에 영향을 주는 설정의 해시
+    :param config: config.json 딕셔너리
+    :param start_date: 백테스트 시작일 (YYYY-MM-DD)
+    :param extra: 전략 코드 버전 등 추가로 키에 포함할 문자열
+    :param relevant: 해시에 포함할 섹션/키 (기본값 BACKTEST_CONFIG)
+    """
+    selected = {}
+    for section, keys in relevant.items():
+        value = config.get(section, {})
+        selected[section] = value if keys is None else {key: value.get(key) for key in keys}
+    payload = json.dumps({'config': selected, 'start_date': start_date, 'extra': extra}, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+
+def source_version(*objects):
+    """
+    객체(클래스/함수)가 정의된 모듈 소스 전체의 해시 (점수/선택/지표 모듈이 바뀌면 체크포인트 무효화)
+    """
+    digest = hashlib.sha1()
+    for module in dict.fromkeys(inspect.getmodule(obj) for obj in objects):
+        digest.update(module.__name__.encode())
+        digest.update(inspect.getsource(module).encode())
+    return digest.hexdigest()
+
+
+def data_fingerprint(date_str, all_price_data, coin_market_caps):
+    """
+    date_str 이전(포함) 데이터만으로 계산한 해시
+    종료일을 늘려 데이터가 뒤에 추가되어도 값이 바뀌지 않고, 과거 캔들이 수정되면 바뀜
+    """
+    digest = hashlib.sha1()
+    for ticker in sorted(all_price_data):
+        df = all_price_data[ticker]
+        visible = df[df.index <= date_str]
+        digest.update(ticker.encode())
+        digest.update('|'.join(visible.index).encode())
+        digest.update(np.ascontiguousarray(visible[PRICE_COLUMNS].to_numpy(dtype=np.float64)).tobytes())
+    for coin in sorted(coin_market_caps):
+        caps = coin_market_caps[coin]
+        digest.update(coin.encode())
+        digest.update(json.dumps(sorted((d, v) for d, v in caps.items() if d <= date_str)).encode())
+    return digest.hexdigest()
+
+
+class BacktestCheckpointStore:
+    """
+    날짜별 백테스트 상태 저장소
+    - {directory}/{key}/{YYYY-MM-DD}.pkl: 해당 날짜까지 처리한 상태와 데이터 지문
+    - 키가 같고 지문이 일치하는 가장 최근 체크포인트부터 이어서 실행
+    """
+
+    def __init__(self, directory='checkpoints', key='default', interval=7, keep_recent=2):
+        """
+        :param directory: 체크포인트 저장 디렉토리
+        :param key: 설정 해시 (config_key)
+        :param interval: 장기 보관할 체크포인트 간격 (일)
+        :param keep_recent: 간격과 관계없이 보관할 최근 체크포인트 수
+        """
+        self.directory = os.path.join(directory, key)
+        self.interval = interval
+        self.keep_recent = keep_recent
+
+    def _path(self, date_str):
+        return os.path.join(self.directory, f"{date_str}.pkl")
+
+    def dates(self):
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(name[:-4] for name in os.listdir(self.directory) if name.endswith('.pkl'))
+
+    def save(self, date_str, fingerprint, state):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = self._path(date_str) + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({'date': date_str, 'fingerprint': fingerprint, 'state': state}, f)
+        os.replace(tmp_path, self._path(date_str))
+
+    def load_latest(self, end_date_str, fingerprint_fn):
+        """
+        end_date_str 이전의 체크포인트 중 데이터 지문이 일치하는 가장 최근 것
+        :param fingerprint_fn: 날짜 문자열 -> 현재 데이터 지문
+        :return: (날짜 문자열, 상태) 또는 None
+        """
+        for date_str in reversed(self.dates()):
+            if date_str > end_date_str:
+                continue
+            try:
+                with open(self._path(date_str), 'rb') as f:
+                    checkpoint = pickle.load(f)
+            except Exception as e:
+                print(f"[BacktestCheckpointStore] {date_str} 체크포인트 로드 실패: {e}")
+                continue
+            if checkpoint['fingerprint'] == fingerprint_fn(date_str):
+                return date_str, checkpoint['state']
+        return None
+
+    def prune(self, anchor_date):
+        """
+        최근 keep_recent개와 anchor_date 기준 interval일 간격 체크포인트만 남김
+        """
+        dates = self.dates()
+        recent = set(dates[-self.keep_recent:]) if self.keep_recent else set()
+        for date_str in dates:
+            offset = (datetime.strptime(date_str, "%Y-%m-%d") - anchor_date).days
+            if date_str not in recent and offset % self.interval != 0:
+                os.remove(self._path(date_str))
@@ -0,0 +1,57 @@
+import time
+from datetime import datetime, timedelta
+
+import pytz
+
+KST = pytz.timezone('Asia/Seoul')
+
+
+class SimulationFinished(BaseException):
+    """
+    가상 시계가 종료 시각에 도달했음을 알림
+    (run()의 except Exception에 잡히지 않도록 BaseException을 상속)
+    """
+
+
+class SystemClock:
+    """
+    실제 시계 (실거래용 기본값)
+    """
+
+    def now(self, tz=None):
+        return datetime.now(tz)
+
+    def time(self):
+        return time.time()
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+
+class VirtualClock:
+    """
+    시뮬레이션용 가상 시계
+    - sleep은 실제로 기다리지 않고 가상 시각만 앞으로 이동
+    - 시각은 KST 기준 naive datetime으로 관리 (tz 없이 now()를 호출하면 KST 시각 반환)
+    """
+
+    def __init__(self, start, end=None):
+        """
+        :param start: 시작 시각 (KST naive datetime)
+        :param end: 종료 시각 (도달 시 sleep에서 SimulationFinished 발생)
+        """
+        self.current = start
+        self.end = end
+
+    def now(self, tz=None):
+        if tz is None:
+            return self.current
+        return KST.localize(self.current).astimezone(tz)
+
+    def time(self):
+        return KST.localize(self.current).timestamp()
+
+    def sleep(self, seconds):
+        self.current += timedelta(seconds=seconds)
+        if self.end is not None and self.current >= self.end:
+            raise SimulationFinished()
@@ -0,0 +1,315 @@
+"""
+메모리 맵 컬럼 저장소 (분봉 등 장기간 캔들 보관용)
+
+파일 구조 (root)
+- {interval}/{ticker}/{YYYY-MM}.col: 티커-월 단위 파일 하나
+  헤더 + ts(int64) 컬럼 + open/high/low/close/volume/value(float32) 컬럼이 순서대로 연속 저장
+
+읽을 때는 파일을 메모리 맵으로 열고 ts 컬럼에서 이진 탐색한 구간만 numpy 뷰로 잘라내므로
+수 GB의 분봉을 순회해도 실제로 접근한 페이지만 메모리에 올라옴
+시각(ts)은 market_data.py와 같이 pyupbit 인덱스와 같은 KST 기준 시각을 epoch 초로 저장
+"""
+import os
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+import numpy as np
+import pyupbit
+
+from clock import KST
+from market_data import INTERVAL_SECONDS, kst_epoch
+from resampler import resample_columns
+
+MAGIC = b'UPBTCOL1'
+
+STORE_HEADER_DTYPE = np.dtype([
+    ('magic', 'S8'),
+    ('rows', 'i8'),
+    ('interval', 'i8'),
+    ('reserved', 'u1', 40)
+])
+
+TS_DTYPE = np.dtype('i8')
+VALUE_DTYPE = np.dtype('f4')
+VALUE_COLUMNS = ('open', 'high', 'low', 'close', 'volume', 'value')
+
+
+def month_key(ts):
+    """
+    KST epoch 초 -> 'YYYY-MM'
+    """
+    return str(np.datetime64(int(ts), 's').astype('datetime64[M]'))
+
+
+def month_bounds(month):
+    """
+    'YYYY-MM' -> (월 시작, 다음 달 시작) KST naive datetime
+    """
+    start = datetime.strptime(month, "%Y-%m")
+    end = (start + timedelta(days=32)).replace(day=1)
+    return start, end
+
+
+class ColumnarStore:
+    """
+    티커-월 단위 컬럼 파일 저장소
+    """
+
+    def __init__(self, root='history', interval='minute1', max_open_files=64):
+        """
+        :param root: 저장소 루트 디렉토리
+        :param interval: 저장할 캔들 간격
+        :param max_open_files: 동시에 열어둘 메모리 맵 파일 수
+        """
+        self.root = root
+        self.interval = interval
+        self.max_open_files = max_open_files
+        self.open_files = OrderedDict()
+
+    def _dir(self, ticker):
+        return os.path.join(self.root, self.interval, ticker)
+
+    def _path(self, ticker, month):
+        return os.path.join(self._dir(ticker), f"{month}.col")
+
+    def months(self, ticker):
+        """
+        저장된 월 목록 (오름차순)
+        """
+        directory = self._dir(ticker)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(name[:-4] for name in os.listdir(directory) if name.endswith('.col'))
+
+    def tickers(self):
+        directory = os.path.join(self.root, self.interval)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(os.listdir(directory))
+
+    def open_month(self, ticker, month):
+        """
+        티커-월 파일을 메모리 맵으로 열어 컬럼별 numpy 뷰 딕셔너리 반환 (파일이 없으면 None)
+        """
+        key = (ticker, month)
+        columns = self.open_files.get(key)
+        if columns is not None:
+            self.open_files.move_to_end(key)
+            return columns
+        path = self._path(ticker, month)
+        if not os.path.exists(path):
+            return None
+
+        mm = np.memmap(path, dtype=np.uint8, mode='r')
+        header = np.ndarray((1,), dtype=STORE_HEADER_DTYPE, buffer=mm, offset=0)[0]
+        if header['magic'] != MAGIC:
+            print(f"[ColumnarStore] {path} 형식이 올바르지 않습니다.")
+            return None
+        rows = int(header['rows'])
+        offset = STORE_HEADER_DTYPE.itemsize
+        columns = {'ts': np.ndarray((rows,), dtype=TS_DTYPE, buffer=mm, offset=offset)}
+        offset += TS_DTYPE.itemsize * rows
+        for name in VALUE_COLUMNS:
+            columns[name] = np.ndarray((rows,), dtype=VALUE_DTYPE, buffer=mm, offset=offset)
+            offset += VALUE_DTYPE.itemsize * rows
+
+        self.open_files[key] = columns
+        if len(self.open_files) > self.max_open_files:
+            self.open_files.popitem(last=False)
+        return columns
+
+    def write_month(self, ticker, month, columns):
+        """
+        한 달치 컬럼을 파일로 저장 (임시 파일에 쓴 뒤 교체하므로 읽는 중인 프로세스에 영향 없음)
+        :param columns: {'ts': int64 배열, 'open': ..., 'value': ...} (ts 오름차순)
+        """
+        path = self._path(ticker, month)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        header = np.zeros(1, dtype=STORE_HEADER_DTYPE)
+        header['magic'] = MAGIC
+        header['rows'] = len(columns['ts'])
+        header['interval'] = INTERVAL_SECONDS[self.interval]
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            header.tofile(f)
+            np.ascontiguousarray(columns['ts'], dtype=TS_DTYPE).tofile(f)
+            for name in VALUE_COLUMNS:
+                np.ascontiguousarray(columns[name], dtype=VALUE_DTYPE).tofile(f)
+        os.replace(tmp_path, path)
+        self.open_files.pop((ticker, month), None)
+
+    def write(self, ticker, df):
+        """
+        pyupbit.get_ohlcv 형식 DataFrame을 월별 파일에 병합 저장 (같은 시각은 새 데이터로 덮어씀)
+        """
+        if df is None or df.empty:
+            return
+        ts = df.index.values.astype('datetime64[s]').astype(np.int64)
+        months = df.index.values.astype('datetime64[M]')
+        boundaries = np.concatenate([[0], np.flatnonzero(months[1:] != months[:-1]) + 1, [len(ts)]])
+        for start, end in zip(boundaries[:-1], boundaries[1:]):
+            month = str(months[start])
+            new = {'ts': ts[start:end]}
+            for name in VALUE_COLUMNS:
+                new[name] = df[name].to_numpy()[start:end] if name in df else np.zeros(end - start)
+            existing = self.open_month(ticker, month)
+            if existing is not None and len(existing['ts']):
+                # 기존 + 신규를 이어 붙인 뒤 같은 ts는 나중 것(신규)만 남김
+                merged = {name: np.concatenate([existing[name], new[name]]) for name in new}
+                order = np.argsort(merged['ts'], kind='stable')
+                sorted_ts = merged['ts'][order]
+                keep = np.append(sorted_ts[1:] != sorted_ts[:-1], True)
+                new = {name: values[order][keep] for name, values in merged.items()}
+            else:
+                order = np.argsort(new['ts'], kind='stable')
+                new = {name: np.asarray(values)[order] for name, values in new.items()}
+            self.write_month(ticker, month, new)
+
+    def iter_range(self, ticker, start, end, columns=None):
+        """
+        start ~ end(KST naive datetime, 양끝 포함) 구간을 월 단위 컬럼 뷰로 순회 (복사 없음)
+        :param columns: 읽을 컬럼 이름 목록 (기본값 전체)
+        """
+        start_ts, end_ts = kst_epoch(start), kst_epoch(end)
+        names = ['ts'] + list(columns or VALUE_COLUMNS)
+        first, last = month_key(start_ts), month_key(end_ts)
+        for month in self.months(ticker):
+            if month < first or month > last:
+                continue
+            data = self.open_month(ticker, month)
+            if data is None:
+                continue
+            lo = np.searchsorted(data['ts'], start_ts, side='left')
+            hi = np.searchsorted(data['ts'], end_ts, side='right')
+            if hi > lo:
+                yield {name: data[name][lo:hi] for name in names}
+
+    def read_range(self, ticker, start, end, columns=None):
+        """
+        구간 컬럼을 하나의 배열로 합쳐 반환 (여러 달에 걸치면 해당 구간만 복사)
+        """
+        chunks = list(self.iter_range(ticker, start, end, columns))
+        if not chunks:
+            return None
+        if len(chunks) == 1:
+            return chunks[0]
+        return {name: np.concatenate([chunk[name] for chunk in chunks]) for name in chunks[0]}
+
+    def get_ohlcv_range(self, ticker, start, end):
+        """
+        pyupbit.get_ohlcv와 같은 형식의 DataFrame, 저장된 데이터가 없으면 None
+        """
+        import pandas as pd
+
+        data = self.read_range(ticker, start, end)
+        if data is None:
+            return None
+        return pd.DataFrame({name: data[name].astype(np.float64) for name in VALUE_COLUMNS},
+                            index=pd.to_datetime(data['ts'], unit='s'))
+
+    def aggregate_range(self, ticker, start, end, interval='day'):
+        """
+        구간 캔들을 월 단위로 읽으며 더 큰 간격으로 합친 DataFrame (메모리에는 한 달치만 올라옴)
+        월 경계에 걸친 캔들(예: 일봉 09:00 ~ 다음날 09:00)은 마지막에 한 번 더 합침
+        """
+        import pandas as pd
+
+        keys, parts = [], []
+        for chunk in self.iter_range(ticker, start, end):
+            chunk_keys, columns = resample_columns(
+                chunk['ts'], {name: chunk[name].astype(np.float64) for name in VALUE_COLUMNS}, interval
+            )
+            keys.append(chunk_keys)
+            parts.append(columns)
+        if not parts:
+            return None
+        keys, columns = resample_columns(
+            np.concatenate(keys), {name: np.concatenate([part[name] for part in parts]) for name in VALUE_COLUMNS},
+            interval
+        )
+        return pd.DataFrame(columns, index=pd.to_datetime(keys, unit='s'))
+
+    def bounds(self, ticker):
+        """
+        저장된 첫/마지막 캔들 시각 (KST epoch 초), 저장된 데이터가 없으면 (None, None)
+        """
+        first = last = None
+        for month in self.months(ticker):
+            data = self.open_month(ticker, month)
+            if data is not None and len(data['ts']):
+                first = int(data['ts'][0]) if first is None else first
+                last = int(data['ts'][-1])
+        return first, last
+
+    def update(self, ticker, start, end, fetcher=None):
+        """
+        start ~ end(양끝 포함) 구간 중 저장되지 않은 앞/뒤 구간만 REST에서 받아 저장
+        마지막으로 저장된 캔들은 진행 중이었을 수 있으므로 다시 받음 (갱신 비용은 새로 생긴 캔들 수에 비례)
+        :param fetcher: 캔들 조회 함수 (기본값 pyupbit.get_ohlcv)
+        :return: 받은 캔들 수
+        """
+        fetcher = fetcher or pyupbit.get_ohlcv
+        step = INTERVAL_SECONDS[self.interval]
+        start_ts, end_ts = kst_epoch(start), kst_epoch(end) + 1
+        first, last = self.bounds(ticker)
+        # [시작, 끝) 구간 목록
+        if first is None:
+            gaps = [(start_ts, end_ts)]
+        else:
+            gaps = [(start_ts, first)] if start_ts < first else []
+            if last < end_ts:
+                gaps.append((last, end_ts))
+
+        fetched = 0
+        for gap_start, gap_end in gaps:
+            count = -(-(gap_end - gap_start) // step)
+            # pyupbit의 to는 UTC 기준 (해당 시각 이전 캔들 조회)
+            to = (datetime(1970, 1, 1) + timedelta(seconds=gap_end - 9 * 3600)).strftime("%Y-%m-%d %H:%M:%S")
+            df = fetcher(ticker, interval=self.interval, count=count, to=to)
+            if df is None or df.empty:
+                continue
+            ts = df.index.values.astype('datetime64[s]').astype(np.int64)
+            df = df[(ts >= gap_start) & (ts < gap_end)]
+            self.write(ticker, df)
+            fetched += len(df)
+        return fetched
+
+    def backfill(self, ticker, start, end, fetcher=None, refresh=False):
+        """
+        start ~ end 구간을 월 단위로 REST에서 받아 저장 (이미 저장된 지난 달은 건너뜀)
+        :param fetcher: 캔들 조회 함수 (기본값 pyupbit.get_ohlcv)
+        :param refresh: True면 저장된 달도 다시 받음
+        """
+        fetcher = fetcher or pyupbit.get_ohlcv
+        stored = set(self.months(ticker))
+        # 진행 중인 달은 항상 다시 받음
+        current_month = month_key(kst_epoch(datetime.now(KST).replace(tzinfo=None)))
+        month = month_key(kst_epoch(start))
+        while month <= month_key(kst_epoch(end)):
+            month_start, month_end = month_bounds(month)
+            if refresh or month not in stored or month >= current_month:
+                count = int((month_end - month_start).total_seconds() // INTERVAL_SECONDS[self.interval])
+                # pyupbit의 to는 UTC 기준 (해당 시각 이전 캔들 조회)
+                df = fetcher(ticker, interval=self.interval, count=count,
+                             to=(month_end - timedelta(hours=9)).strftime("%Y-%m-%d %H:%M:%S"))
+                if df is not None and not df.empty:
+                    df = df[(df.index >= month_start) & (df.index < month_end)]
+                    self.write(ticker, df)
+            month = month_key(kst_epoch(month_end))
+
+
+if __name__ == "__main__":
+    import json
+    import sys
+
+    # 사용법: python columnar_store.py 2023-01-01 2023-12-31 [KRW-BTC KRW-ETH ...]
+    with open('config.json', 'r') as f:
+        history_config = json.load(f).get('history', {})
+    store = ColumnarStore(root=history_config.get('root', 'history'),
+                          interval=history_config.get('interval', 'minute1'))
+    start_date = datetime.strptime(sys.argv[1], "%Y-%m-%d")
+    end_date = datetime.strptime(sys.argv[2], "%Y-%m-%d")
+    tickers = sys.argv[3:] or pyupbit.get_tickers(fiat="KRW")
+    for ticker in tickers:
+        print(f"[ColumnarStore] {ticker} {store.interval} {sys.argv[1]} ~ {sys.argv[2]} 저장 중...")
+        store.backfill(ticker, start_date, end_date)
@@ -0,0 +1,171 @@
+"""
+외부 호출 제한 시간과 매매 루프 정지 감지
+
+- DeadlineExecutor: pyupbit처럼 timeout 인자가 없는 호출을 작업 스레드에서 실행하고,
+  작업별 제한 시간이 지나면 호출한 쪽은 CallTimeout으로 즉시 돌아옴
+  (멈춘 작업 스레드는 버리고 새 스레드로 계속 처리, 모두 daemon 스레드라 종료를 막지 않음)
+- DeadlineProxy: 객체의 메서드 호출을 '{이름}.{메서드}' 작업으로 DeadlineExecutor에 넘김
+- StallWatchdog: 한 사이클이 stall_after초를 넘기면 콜백 호출 (봇은 리스크 체크만 하는 모드로 전환)
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeout
+
+
+class CallTimeout(TimeoutError):
+    """
+    외부 호출이 제한 시간 안에 끝나지 않음
+    """
+
+
+class CycleAborted(BaseException):
+    """
+    정지 감지로 현재 사이클의 남은 작업(모멘텀 스캔, 매수)을 중단
+    (매매 함수들의 except Exception에 잡히지 않고 run()까지 전달되도록 BaseException 상속)
+    """
+
+
+class DeadlineExecutor:
+    """
+    작업별 제한 시간이 있는 호출 실행기
+    """
+
+    def __init__(self, default_deadline=10, deadlines=None, max_workers=8, enabled=True):
+        """
+        :param default_deadline: 기본 제한 시간 (초)
+        :param deadlines: {작업 이름: 제한 시간(초)} (None이면 제한 없음)
+        :param max_workers: 동시에 실행할 최대 작업 스레드 수 (멈춘 스레드는 제외)
+        :param enabled: False면 호출한 스레드에서 그대로 실행
+        """
+        self.default_deadline = default_deadline
+        self.deadlines = deadlines or {}
+        self.max_workers = max_workers
+        self.enabled = enabled
+        self.tasks = queue.Queue()
+        self.lock = threading.Lock()
+        self.workers = 0
+        self.idle = 0
+        self.hung = 0
+        self.timeouts = {}
+
+    def deadline(self, operation):
+        return self.deadlines.get(operation, self.default_deadline)
+
+    def timeout_count(self):
+        with self.lock:
+            return sum(self.timeouts.values())
+
+    def _worker(self):
+        while True:
+            with self.lock:
+                self.idle += 1
+            future, fn, args, kwargs = self.tasks.get()
+            with self.lock:
+                self.idle -= 1
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+
+    def _release_hung(self, future):
+        with self.lock:
+            self.hung -= 1
+
+    def call(self, operation, fn, *args, **kwargs):
+        """
+        fn(*args, **kwargs)를 작업 스레드에서 실행하고 제한 시간까지 결과를 기다림
+        :raise CallTimeout: 제한 시간 초과 (실행 전이면 취소, 실행 중이면 결과를 버림)
+        """
+        deadline = self.deadline(operation)
+        if not self.enabled or deadline is None:
+            return fn(*args, **kwargs)
+        future = Future()
+        with self.lock:
+            if self.idle == 0 and self.workers - self.hung < self.max_workers:
+                self.workers += 1
+                threading.Thread(target=self._worker, name=f"deadline-worker-{self.workers}", daemon=True).start()
+        self.tasks.put((future, fn, args, kwargs))
+        try:
+            return future.result(timeout=deadline)
+        except FutureTimeout:
+            if not future.cancel():
+                # 이미 실행 중인 스레드는 멈춘 것으로 보고 끝날 때까지 동시 실행 수에서 제외
+                with self.lock:
+                    self.hung += 1
+                future.add_done_callback(self._release_hung)
+            with self.lock:
+                self.timeouts[operation] = self.timeouts.get(operation, 0) + 1
+            raise CallTimeout(f"{operation} {deadline}초 초과")
+
+
+class DeadlineProxy:
+    """
+    target의 메서드를 DeadlineExecutor로 실행하는 대리 객체 (메서드가 아닌 속성은 그대로 반환)
+    """
+
+    def __init__(self, target, executor, name):
+        self._target = target
+        self._executor = executor
+        self._name = name
+        self._methods = {}
+
+    def __getattr__(self, attr):
+        value = getattr(self._target, attr)
+        if not callable(value):
+            return value
+        method = self._methods.get(attr)
+        if method is None:
+            operation = f"{self._name}.{attr}"
+
+            def method(*args, **kwargs):
+                return self._executor.call(operation, value, *args, **kwargs)
+            self._methods[attr] = method
+        return method
+
+
+class StallWatchdog(threading.Thread):
+    """
+    사이클 시작/종료를 기록받아, 한 사이클이 stall_after초를 넘기면 on_stall(경과 시간)을 한 번 호출
+    """
+
+    def __init__(self, stall_after=180, on_stall=None, check_interval=1.0):
+        """
+        :param stall_after: 정지로 판단할 사이클 경과 시간 (초)
+        :param on_stall: 정지 감지 시 호출할 함수 (감시 스레드에서 실행)
+        :param check_interval: 확인 간격 (초)
+        """
+        super().__init__(name="stall-watchdog", daemon=True)
+        self.stall_after = stall_after
+        self.on_stall = on_stall
+        self.check_interval = check_interval
+        self.cycle_started_at = None
+        self.fired = False
+        self.stall_count = 0
+
+    def cycle_started(self):
+        self.fired = False
+        self.cycle_started_at = time.monotonic()
+
+    def cycle_finished(self):
+        self.cycle_started_at = None
+
+    def run(self):
+        while True:
+            time.sleep(self.check_interval)
+            started_at = self.cycle_started_at
+            if started_at is None or self.fired:
+                continue
+            elapsed = time.monotonic() - started_at
+            if elapsed > self.stall_after:
+                self.fired = True
+                self.stall_count += 1
+                if self.on_stall is not None:
+                    try:
+                        self.on_stall(elapsed)
+                    except Exception as e:
+                        print(f"[StallWatchdog] 정지 처리 중 오류: {e}")
+
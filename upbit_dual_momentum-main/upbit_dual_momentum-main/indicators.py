@@ -0,0 +1,105 @@
+"""
+여러 티커 변동성 돌파 지표를 한 번에 계산하는 NumPy 커널
+
+입력은 (티커 수, 캔들 수, 4) OHLC 패널 (마지막 축 순서: open, high, low, close)
+캔들 수가 부족한 티커는 앞부분이 NaN으로 채워지며, 결과는 티커별 pandas 계산
+(UpbitMomentumStrategy.calculate_atr / calculate_dynamic_k / calculate_breakout_price)과 같은 값
+"""
+import warnings
+
+import numpy as np
+
+OHLC = ('open', 'high', 'low', 'close')
+OPEN, HIGH, LOW, CLOSE = range(4)
+
+
+def ohlc_panel(frames, length=None):
+    """
+    티커별 OHLCV DataFrame을 (티커 수, length, 4) 패널로 정렬 (최신 캔들이 마지막, 부족한 앞부분은 NaN)
+    :param frames: {티커: DataFrame (오름차순)}
+    :param length: 캔들 수 (기본값 가장 긴 DataFrame 길이)
+    :return: (티커 리스트, 패널)
+    """
+    tickers = list(frames)
+    if length is None:
+        length = max((len(df) for df in frames.values()), default=0)
+    panel = np.full((len(tickers), length, len(OHLC)), np.nan)
+    for i, ticker in enumerate(tickers):
+        df = frames[ticker]
+        rows = min(len(df), length)
+        if rows:
+            for j, column in enumerate(OHLC):
+                panel[i, length - rows:, j] = df[column].to_numpy(dtype=np.float64)[-rows:]
+    return tickers, panel
+
+
+def true_range(panel):
+    """
+    True Range: max(고가-저가, |고가-전일 종가|, |저가-전일 종가|) (첫 캔들은 고가-저가)
+    :return: (티커 수, 캔들 수)
+    """
+    high, low, close = panel[..., HIGH], panel[..., LOW], panel[..., CLOSE]
+    prev_close = np.concatenate([np.full((len(panel), 1), np.nan), close[:, :-1]], axis=1)
+    return np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+
+
+def atr(panel, window=14):
+    """
+    마지막 window개 True Range 평균 (캔들이 부족하면 NaN)
+    :return: (티커 수,)
+    """
+    if panel.shape[1] < window:
+        return np.full(len(panel), np.nan)
+    return true_range(panel)[:, -window:].mean(axis=1)
+
+
+def volatility_ratio(panel, window=14):
+    """
+    전체 기간 평균 진폭 / 최근 window개 평균 진폭 (최근 평균이 0 이하이거나 계산 불가면 1)
+    :return: (티커 수,)
+    """
+    ranges = panel[..., HIGH] - panel[..., LOW]
+    with np.errstate(invalid='ignore', divide='ignore'), warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)  # 캔들이 하나도 없는 티커의 nanmean 경고
+        recent = np.nanmean(ranges, axis=1)
+        average = ranges[:, -window:].mean(axis=1) if panel.shape[1] >= window else np.full(len(panel), np.nan)
+        ratio = recent / average
+    return np.where(average > 0, ratio, 1.0)
+
+
+def dynamic_k(panel, base_k=0.5, window=14, lower=0.3, upper=0.7):
+    """
+    변동성 비율로 조정한 k 값 ([lower, upper]로 제한)
+    :return: (티커 수,)
+    """
+    return np.clip(base_k * volatility_ratio(panel, window), lower, upper)
+
+
+def breakout_price(panel, k=None):
+    """
+    변동성 돌파 목표가: 현재 캔들 시가 + 직전 캔들 진폭 * k
+    :param k: 티커별 k 값 (기본값 dynamic_k(panel))
+    :return: (티커 수,)
+    """
+    if k is None:
+        k = dynamic_k(panel)
+    previous = panel[:, -2]
+    return panel[:, -1, OPEN] + (previous[:, HIGH] - previous[:, LOW]) * k
+
+
+def breakout_levels(panel, base_k=0.5, window=14, atr_window=14, stop_multiple=1.5):
+    """
+    돌파 목표가, 동적 k, ATR, 손절가(목표가 - ATR * stop_multiple), 익절가(목표가 + ATR * stop_multiple)
+    :return: {이름: (티커 수,) 배열}
+    """
+    k = dynamic_k(panel, base_k, window)
+    target = breakout_price(panel, k)
+    average_true_range = atr(panel, atr_window)
+    return {
+        'breakout_price': target,
+        'dynamic_k': k,
+        'atr': average_true_range,
+        'stop_loss': target - stop_multiple * average_true_range,
+        'take_profit': target + stop_multiple * average_true_range
+    }
+
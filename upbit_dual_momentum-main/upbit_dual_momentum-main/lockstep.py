@@ -0,0 +1,190 @@
+"""
+사이징만 다른 여러 백테스트 변형을 한 번의 날짜 순회로 함께 실행
+
+UpbitMomentumBacktest.run_backtest()와 같은 규칙(BTC MA120 매매 중지/재개, 시가총액 상위 20 중 모멘텀 상위 코인
+균등 매수, 리밸런싱 주기 또는 7일 -10% 손실 시 리밸런싱)으로 K개 포트폴리오를 진행
+- 날짜별 신호(BTC MA120, 시가총액 상위 20, 모멘텀 순위, 7일 수익률)는 한 번만 계산해 모든 포트폴리오가 공유
+- 원화 잔고/코인 수량/마지막 리밸런싱 날짜는 (K,) / (K, 티커 수) NumPy 배열로 보관하고 열 단위로 한꺼번에 갱신
+- 변형별 설정: max_slots(보유 코인 수), initial_krw(초기 자금), min_order(최소 주문 금액), order_unit(주문 금액 단위)
+
+변형마다 리밸런싱 날짜가 다르면 상관계수 선택기(CorrelationSelector)가 따로 실행할 때보다 자주 갱신되므로,
+selection을 켠 경우 결과가 개별 실행과 약간 다를 수 있음 (변형 하나면 개별 실행과 같음)
+
+사용법: python lockstep.py [시작일] [종료일]  (기본값 2023-01-01 2023-12-31, max_slots 2~6 x 초기 자금 2종)
+"""
+import sys
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_VARIANT = {'max_slots': 3, 'initial_krw': 1_000_000, 'min_order': 5000, 'order_unit': 1000}
+
+
+class LockstepBacktest:
+    """
+    K개 사이징 변형 포트폴리오를 NumPy 배열의 열로 두고 날짜를 함께 진행하는 백테스트
+    """
+
+    def __init__(self, backtest, variants):
+        """
+        :param backtest: 신호 계산과 데이터 로드에 사용할 UpbitMomentumBacktest
+        :param variants: 변형 설정 딕셔너리 리스트 (없는 키는 DEFAULT_VARIANT 값 사용)
+        """
+        if not variants:
+            raise ValueError("변형이 하나 이상 필요합니다.")
+        self.backtest = backtest
+        self.variants = [dict(DEFAULT_VARIANT, **variant) for variant in variants]
+        self.slots = np.array([v['max_slots'] for v in self.variants], dtype=np.int64)
+        self.initial_krw = np.array([v['initial_krw'] for v in self.variants], dtype=np.float64)
+        self.min_order = np.array([v['min_order'] for v in self.variants], dtype=np.float64)
+        self.order_unit = np.array([v['order_unit'] for v in self.variants], dtype=np.float64)
+        self.dates = []
+        self.values = None
+        self.trade_counts = None
+
+    def _price_matrix(self, all_price_data, dates):
+        """
+        (날짜 수, 티커 수) 종가 행렬과 7일 수익률(%) 행렬
+        7일 전 종가가 없으면 -inf (UpbitMomentumBacktest.calculate_7day_return과 동일)
+        """
+        tickers = list(all_price_data)
+        calendar = [d.strftime("%Y-%m-%d") for d in pd.date_range(dates[0] - timedelta(days=7), dates[-1])]
+        closes = pd.DataFrame({ticker: all_price_data[ticker]['close'] for ticker in tickers}).reindex(calendar)
+        closes = closes.to_numpy(dtype=np.float64)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            returns = (closes[7:] - closes[:-7]) / closes[:-7] * 100
+        returns[np.isnan(closes[:-7]) & ~np.isnan(closes[7:])] = -np.inf
+        return tickers, closes[7:], returns
+
+    def run(self, data=None):
+        """
+        전체 변형을 한 번의 날짜 순회로 실행
+        :param data: (가격 데이터, 시가총액, BTC 가격 데이터) (기본값 backtest.load_backtest_data())
+        :return: 날짜 x 변형 포트폴리오 가치 DataFrame (데이터가 없으면 None)
+        """
+        bt = self.backtest
+        data = data if data is not None else bt.load_backtest_data()
+        if data is None:
+            return None
+        all_price_data, coin_market_caps, df_btc = data
+        ma120_series = bt.get_btc_ma120(df_btc)
+
+        dates = list(pd.date_range(bt.start_date, bt.end_date).to_pydatetime())
+        tickers, closes, returns_7d = self._price_matrix(all_price_data, dates)
+        column = {ticker: j for j, ticker in enumerate(tickers)}
+        sellable = np.array([ticker not in bt.manual_holdings for ticker in tickers])
+        n_variants, max_count = len(self.variants), int(self.slots.max())
+
+        krw = self.initial_krw.copy()
+        holdings = np.zeros((n_variants, len(tickers)))
+        last_rebalance = np.full(n_variants, -bt.rebalancing_interval / 1440)  # 시작일 기준 일 수
+        self.trade_counts = np.zeros(n_variants, dtype=np.int64)
+        suspended = False
+        recorded_dates, values = [], []
+
+        for t, current_date in enumerate(dates):
+            date_str = current_date.strftime("%Y-%m-%d")
+            ma120 = ma120_series.get(date_str, np.nan)
+            btc_price = df_btc.loc[date_str]['close'] if date_str in df_btc.index else np.nan
+            if np.isnan(ma120) or np.isnan(btc_price):
+                continue
+
+            price = np.nan_to_num(closes[t])  # 데이터 없으면 가격 0 (원래 백테스트와 동일)
+            if btc_price <= ma120:
+                if not suspended:
+                    # 전체 포트폴리오 일괄 매도
+                    sell = (holdings > 0) & sellable
+                    krw += (holdings * price * sell).sum(axis=1)
+                    self.trade_counts += sell.sum(axis=1)
+                    holdings[sell] = 0
+                    suspended = True
+                    last_rebalance[:] = t
+            else:
+                if suspended:
+                    suspended = False
+                    rebalance = np.ones(n_variants, dtype=bool)
+                else:
+                    # 보유 코인 중 7일 수익률 -10% 이하가 있거나 리밸런싱 주기가 지난 포트폴리오
+                    held = (holdings > 0) & sellable & ~np.isnan(closes[t])
+                    loss = (held & (returns_7d[t] <= -10)).any(axis=1)
+                    rebalance = loss | ((t - last_rebalance) * 1440 >= bt.rebalancing_interval)
+
+                if rebalance.any():
+                    # 모멘텀 순위는 가장 큰 슬롯 수 기준으로 한 번만 계산 (작은 슬롯 수는 앞에서부터 사용)
+                    top20 = bt.get_top20_market_cap(date_str, coin_market_caps)
+                    ranked = bt.get_top3_momentum(date_str, top20, all_price_data, count=max_count)
+                    self._rebalance(rebalance, ranked, column, price, krw, holdings)
+                    last_rebalance[rebalance] = t
+
+            recorded_dates.append(date_str)
+            values.append(krw + holdings @ price)
+
+        self.dates = recorded_dates
+        self.values = pd.DataFrame(np.array(values).reshape(-1, n_variants), index=pd.to_datetime(recorded_dates),
+                                   columns=[self.label(v) for v in self.variants])
+        return self.values
+
+    def _rebalance(self, rows, ranked, column, price, krw, holdings):
+        """
+        rows 포트폴리오에 대해 UpbitMomentumBacktest.execute_trades()를 한꺼번에 실행 (krw/holdings 제자리 갱신)
+        """
+        rank = np.full(holdings.shape[1], np.iinfo(np.int64).max)
+        for position, ticker in enumerate(ranked):
+            if ticker in column:
+                rank[column[ticker]] = position
+        target = rank[None, :] < self.slots[rows, None]  # (변형 수, 티커 수)
+
+        # 목표에 없는 보유 코인 매도
+        sell = (holdings[rows] > 0) & ~target
+        krw[rows] += (holdings[rows] * price * sell).sum(axis=1)
+        sub = holdings[rows]
+        sub[sell] = 0
+
+        # 목표 코인에 균등 분배 (주문 단위 내림, 최소 주문 금액 미만이면 건너뜀)
+        n_targets = np.minimum(self.slots[rows], len(ranked))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            invest = np.floor(krw[rows] / n_targets / self.order_unit[rows]) * self.order_unit[rows]
+        can_buy = (krw[rows] > 0) & (n_targets > 0) & (invest >= self.min_order[rows])
+        buy = target & (price > 0) & can_buy[:, None]
+        krw[rows] -= np.where(can_buy, invest, 0) * buy.sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            sub += np.where(buy, invest[:, None] / np.where(price > 0, price, 1), 0)
+        holdings[rows] = sub
+        self.trade_counts[rows] += sell.sum(axis=1) + buy.sum(axis=1)
+
+    @staticmethod
+    def label(variant):
+        return f"slots={variant['max_slots']}/krw={variant['initial_krw']:,}/min={variant['min_order']:,}"
+
+    def summary(self):
+        """
+        변형별 최종 가치, 수익률(%), 최대 낙폭(%), 거래 수
+        """
+        if self.values is None or self.values.empty:
+            return pd.DataFrame()
+        values = self.values.to_numpy()
+        peaks = np.maximum.accumulate(values, axis=0)
+        return pd.DataFrame({
+            'max_slots': self.slots,
+            'initial_krw': self.initial_krw,
+            'min_order': self.min_order,
+            'final_value': values[-1],
+            'return_pct': (values[-1] / self.initial_krw - 1) * 100,
+            'max_drawdown_pct': ((values - peaks) / peaks).min(axis=0) * 100,
+            'trades': self.trade_counts
+        }, index=self.values.columns)
+
+
+if __name__ == "__main__":
+    from backtesting import UpbitMomentumBacktest
+
+    start_date, end_date = (sys.argv[1:3] + ['2023-01-01', '2023-12-31'][len(sys.argv[1:3]):])
+    backtest = UpbitMomentumBacktest(start_date, end_date, config_path='config.json')
+    backtest.verbose = False
+    variants = [{'max_slots': slots, 'initial_krw': krw} for krw in (1_000_000, 10_000_000) for slots in range(2, 7)]
+    lockstep = LockstepBacktest(backtest, variants)
+    started = datetime.now()
+    lockstep.run()
+    print(lockstep.summary().to_string())
+    print(f"[lockstep] {len(variants)}개 변형, {len(lockstep.dates)}일 ({(datetime.now() - started).total_seconds():.1f}초)")
@@ -1,65 +1,500 @@
+import time
+
+# 첫 리스크 체크까지 걸린 시간을 프로세스 시작(모듈 임포트 전)부터 측정
+PROCESS_STARTED_AT = time.perf_counter()
+
+import numpy as np
 import pyupbit
 import pytz
-import time
 import json
 from datetime import datetime
 import os
 import requests
 import signal
-import pandas as pd
+from breakout_table import BreakoutTable
+from candle_cache import CandleCache
+from clock import SystemClock
+from deadline import CallTimeout, CycleAborted, DeadlineExecutor, DeadlineProxy, StallWatchdog
+import indicators
+from market_data import DAY_OFFSET, DEFAULT_DATA_DIR, MarketDataClient, bucket_start
+from notifier import TelegramNotifier
+from order_tracker import OrderTracker
+from orderbook import OrderbookDepthCache
+from paper_exchange import PaperUpbit
+from resampler import CandleResampler
+from runtime_state import RuntimeStateStore
+from scoring import MomentumScorer
+from selection import CorrelationSelector
+from tracing import Tracer
+from universe import UniversePrefilter, convert_closes
 
 class UpbitMomentumStrategy:
-    def __init__(self, config_path='config.json'):
+    def __init__(self, config_path='config.json', upbit=None, quotation=None, clock=None, notifier=None):
+        """
+        :param config_path: 설정 파일 경로
+        :param upbit: 주문/잔고 객체 (기본값: 설정에 따라 pyupbit.Upbit 또는 PaperUpbit)
+        :param quotation: 시세 조회 객체 (get_tickers/get_ohlcv/get_current_price/get_orderbook, 기본값 pyupbit)
+        :param clock: now/time/sleep을 제공하는 시계 (기본값 SystemClock, 시뮬레이션 시 VirtualClock)
+        :param notifier: 알림 객체 (기본값 TelegramNotifier)
+        """
+        self.started_at = PROCESS_STARTED_AT
+        self.first_risk_check_done = False
+        self.clock = clock or SystemClock()
+        self.quotation = quotation or pyupbit
         try:
             with open(config_path, 'r') as f:
                 config = json.load(f)
 
-            self.upbit = pyupbit.Upbit(config['upbit']['access_key'], config['upbit']['secret_key'])
+            # 외부 호출 제한 시간: pyupbit 호출은 작업 스레드에서 실행하고 제한 시간이 지나면 CallTimeout
+            watchdog = config.get('watchdog', {})
+            self.deadlines = DeadlineExecutor(
+                default_deadline=watchdog.get('default_deadline', 10),
+                deadlines=watchdog.get('deadlines', {'upbit.buy_market_order': 15, 'upbit.sell_market_order': 15}),
+                max_workers=watchdog.get('max_workers', 8),
+                enabled=watchdog.get('enabled', True)
+            )
+            self.quotation = DeadlineProxy(self.quotation, self.deadlines, 'quotation')
+
+            # 모의 투자 모드면 실제 주문 대신 로컬 체결 엔진 사용
+            self.paper_trading = config['trading'].get('mode', 'live') == 'paper'
+            paper = config.get('paper', {})
+            if upbit is not None:
+                self.upbit = upbit
+            elif self.paper_trading:
+                self.upbit = PaperUpbit(
+                    account_file=paper.get('account_file', 'paper_account.json'),
+                    initial_krw=paper.get('initial_krw', 1_000_000),
+                    fee=paper.get('fee', 0.0005),
+                    orderbook_file=paper.get('orderbook_file')
+                )
+            else:
+                self.upbit = pyupbit.Upbit(config['upbit']['access_key'], config['upbit']['secret_key'])
+            self.upbit = DeadlineProxy(self.upbit, self.deadlines, 'upbit')
+
+            # 주문 체결 확인 + 계좌 캐시 (실거래 시 전용 웹소켓 myOrder/myAsset 구독, 끊기면 REST 폴링)
+            order_tracker = config.get('order_tracker', {})
+            stream = upbit is None and not self.paper_trading and order_tracker.get('stream', True)
+            self.order_tracker = OrderTracker(
+                self.upbit,
+                access_key=config['upbit']['access_key'] if stream else None,
+                secret_key=config['upbit']['secret_key'] if stream else None,
+                stream=stream,
+                confirm_timeout=order_tracker.get('confirm_timeout', 10),
+                poll_interval=order_tracker.get('poll_interval', 0.5),
+                reconcile_interval=order_tracker.get('reconcile_interval', 300),
+                max_orders=order_tracker.get('max_orders', 1000),
+                clock=self.clock
+            )
+            self.cycle_started_at = None
             self.telegram_bot_token = config['telegram']['bot_token']
             self.telegram_chat_id = config['telegram']['channel_id']
+
+            # 빠른 시작: 알림은 백그라운드로 보내고, 캔들은 디스크 캐시에서 먼저 로드
+            startup = config.get('startup', {})
+            self.fast_start = startup.get('fast_start', True)
+            self.notifier = notifier or TelegramNotifier(
+                self.telegram_bot_token, self.telegram_chat_id, background=self.fast_start,
+                timeout=self.deadlines.deadline('telegram')
+            )
+            self.candle_cache = CandleCache(
+                cache_dir=startup.get('candle_cache_dir', 'cache'),
+                max_age=startup.get('candle_cache_max_age', 600),
+                fetcher=self.quotation.get_ohlcv,
+                clock=self.clock
+            )
+
+            # 공유 메모리 시세 데몬(market_data.py) 사용 시 캔들/현재가를 네트워크 요청 없이 읽음
+            market_data = config.get('market_data', {})
+            self.market_data = MarketDataClient(
+                data_dir=market_data.get('data_dir', DEFAULT_DATA_DIR),
+                max_staleness=market_data.get('max_staleness', 10)
+            ) if market_data.get('enabled', False) else None
+
+            # 티커별 기준 캔들(시간봉) 하나만 조회하고 일봉/주봉은 그로부터 계산
+            resampling = config.get('resampling', {})
+            self.resampler = CandleResampler(
+                base_interval=resampling.get('base_interval', 'minute60'),
+                max_base_count=resampling.get('max_base_count', 200),
+                ttl=resampling.get('ttl', 60),
+                fetcher=self.quotation.get_ohlcv,
+                clock=self.clock
+            ) if resampling.get('enabled', True) else None
+
+            # 여러 기간/변동성 조정 수익률 기반 종합 모멘텀 점수 (백테스트와 공용)
+            momentum = config.get('momentum', {})
+            self.scorer = MomentumScorer(
+                horizons=momentum.get('horizons', [7]),
+                weights=momentum.get('weights'),
+                vol_window=momentum.get('vol_window', 7),
+                vol_adjust=momentum.get('vol_adjust', False),
+                cross_sectional=momentum.get('cross_sectional', False)
+            )
+
+            # 모멘텀 후보 간 상관계수 상한 (이미 조회한 일봉 종가로 계산)
+            selection = config.get('selection', {})
+            self.selector = CorrelationSelector(
+                window=selection.get('window', 30),
+                max_correlation=selection.get('max_correlation', 0.8),
+                min_periods=selection.get('min_periods', 5)
+            ) if selection.get('enabled', False) else None
+
+            # 후보 코인 돌파 목표가/손절가/익절가를 시간봉 마감마다 미리 계산
+            breakout = config.get('breakout', {})
+            self.breakout_table = BreakoutTable(
+                compute=self.calculate_breakout_entries,
+                fetcher=self.get_ohlcv,
+                count=breakout.get('candle_count', 48),
+                refresh_delay=breakout.get('refresh_delay', 5),
+                background=breakout.get('background', True),
+                clock=self.clock
+            )
+
+            # 사이클별 구간 추적 (Chrome trace JSON, 지연 예산 초과 시 샘플링 프로파일 포함)
+            tracing = config.get('tracing', {})
+            self.tracer = Tracer(
+                enabled=tracing.get('enabled', False),
+                output_dir=tracing.get('output_dir', 'traces'),
+                latency_budget=tracing.get('latency_budget'),
+                profile=tracing.get('profile', False),
+                sample_interval=tracing.get('sample_interval', 0.005),
+                max_files=tracing.get('max_files', 500)
+            )
             self.manual_holdings = config['trading']['manual_holdings']
             self.exclude_coins = config['trading']['exclude_coins'] + self.manual_holdings
             self.max_slots = config['trading'].get('max_slots', 3)
             self.rebalancing_interval = config['trading'].get('rebalancing_interval', 10080) * 60 # 일 단위로 변환
             self.last_purchase_time = None
-            self.holdings_file = 'holdings_data.json'
+            self.holdings_file = paper.get('holdings_file', 'paper_holdings_data.json') if self.paper_trading else 'holdings_data.json'
+
+            # 호가 기반 주문 크기 조절 설정
+            execution = config.get('execution', {})
+            self.order_split_interval = execution.get('order_split_interval', 1)
+            self.orderbook_cache = OrderbookDepthCache(
+                ttl=execution.get('orderbook_cache_ttl', 10),
+                max_impact=execution.get('max_price_impact', 1.0),
+                max_splits=execution.get('max_order_splits', 1),
+                fetcher=self.quotation.get_orderbook,
+                clock=self.clock
+            )
+
+            # 캔들 조회 전 24시간 거래대금 기반 유니버스 사전 필터 설정
+            universe = config.get('universe', {})
+            self.universe_prefilter = UniversePrefilter(
+                min_trade_value=universe.get('min_trade_value_24h', 1_000_000_000),
+                max_candidates=universe.get('max_candidates', 50),
+                min_change_rate=universe.get('min_change_rate_24h'),
+                quotes=universe.get('quotes', ['KRW']),
+                fetcher=lambda tickers: self.quotation.get_current_price(tickers, verbose=True),
+                ticker_fetcher=self.quotation.get_tickers
+            )
+
+            # 재시작 시 매매 중지 여부/리밸런싱 시각/지표/캐시를 이어받기 위한 실행 상태 스냅샷
+            runtime_state = config.get('runtime_state', {})
+            self.runtime_state = RuntimeStateStore(
+                path=runtime_state.get('path', 'runtime_state.pkl'),
+                interval=runtime_state.get('interval', 300),
+                max_age=runtime_state.get('max_age', 3600),
+                clock=self.clock
+            ) if runtime_state.get('enabled', True) else None
+            self.ranking_max_age = runtime_state.get('ranking_max_age', 600)
+            self.is_suspended = False
+            self.last_rebalance_at = None
+            self.last_ranking = None
+            self.restored_ranking = None
+
+            # 사이클이 stall_after초를 넘기면 리스크 체크만 하는 모드로 전환
+            self.degraded = False
+            self.healthy_cycles = 0
+            self.recover_cycles = watchdog.get('recover_cycles', 3)
+            # MA120 조회가 연속으로 제한 시간을 넘기면 사이클이 짧게 끝나도 정지로 간주
+            self.max_consecutive_timeouts = watchdog.get('max_consecutive_timeouts', 3)
+            self.ma120_timeouts = 0
+            # 마지막으로 계산한 BTC MA120 (정지 감지 모드에서 같은 일봉 기간 동안 재사용)
+            self.btc_ma120 = None
+            self.btc_ma120_at = None
+            self.pending_snapshot = None
+            self.stall_watchdog = StallWatchdog(
+                stall_after=watchdog.get('stall_after', 180),
+                on_stall=self.on_stall
+            ) if watchdog.get('enabled', True) else None
 
             self.load_holdings_data()
-            self.send_telegram_message("🤖 자동매매 봇이 시작되었습니다.")
-            self.sync_holdings_with_current_state()
+            self.send_telegram_message("🤖 자동매매 봇이 시작되었습니다." + (" (모의 투자 모드)" if self.paper_trading else ""))
+            # 빠른 시작 시 잔고 동기화는 run()의 첫 리스크 체크 직후로 미룸
+            if not self.fast_start:
+                self.sync_holdings_with_current_state()
+            self.restore_runtime_state()
             self.setup_signal_handlers()
         except Exception as e:
             raise Exception(f"초기화 중 오류 발생: {e}")
 
     def send_telegram_message(self, message):
+        self.notifier.send(message)
+
+    def on_stall(self, elapsed):
+        """
+        정지 감지 (감시 스레드에서 호출): 리스크 체크만 하는 모드로 전환
+        """
+        self.enter_degraded(f"사이클이 {elapsed:.0f}초째 끝나지 않아")
+
+    def enter_degraded(self, reason):
+        """
+        리스크 체크만 하는 모드로 전환
+        :param reason: 알림에 넣을 전환 사유
+        """
+        self.healthy_cycles = 0
+        if not self.degraded:
+            self.degraded = True
+            self.send_telegram_message(
+                f"🐢 {reason} 손절/익절 체크만 하는 모드로 전환합니다. "
+                f"(제한 시간 초과: {self.deadlines.timeouts})")
+
+    def check_stalled(self):
+        """
+        정지 감지 후에는 현재 사이클의 남은 모멘텀 스캔/매수를 중단
+        """
+        if self.degraded:
+            raise CycleAborted("정지 감지로 이번 사이클의 모멘텀 스캔/매수를 중단했습니다.")
+
+    def run_degraded_cycle(self):
+        """
+        리스크 전용 사이클: 손절/익절 체크와 BTC MA120 확인(이평선 아래면 전체 매도 후 매매 중지)만 수행
+        MA120은 같은 일봉 기간에 계산한 값을 재사용하므로 BTC 현재가 조회 1회만 추가됨
+        제한 시간 초과 없이 recover_cycles번 연속 stall_after 안에 끝나면 정상 모드로 복귀
+        """
+        timeouts = self.deadlines.timeout_count()
+        started = time.monotonic()
+        with self.tracer.span('check_trade_threshold', degraded=True) as span:
+            sold_coins = self.check_trade_threshold()
+            span.set(sold=sold_coins)
         try:
-            response = requests.post(
-                f"https://api.telegram.org/bot{self.telegram_bot_token}/sendMessage",
-                json={"chat_id": self.telegram_chat_id, "text": message, "parse_mode": "HTML"}
-            )
-            if not response.ok:
-                print(f"텔레그램 메시지 전송 실패: {response.text}")
-        except Exception as e:
-            print(f"텔레그램 메시지 전송 중 오류 발생: {e}")
+            self.update_suspension(self.get_btc_ma120(cached=True))
+        except CallTimeout as e:
+            print(f"[run_degraded_cycle] BTC MA120 확인 실패: {e}")
+        healthy = (self.deadlines.timeout_count() == timeouts
+                   and time.monotonic() - started < self.stall_watchdog.stall_after)
+        self.healthy_cycles = self.healthy_cycles + 1 if healthy else 0
+        if self.healthy_cycles >= self.recover_cycles:
+            self.degraded = False
+            self.healthy_cycles = 0
+            self.send_telegram_message("✅ 외부 호출이 정상으로 돌아와 전체 매매 모드로 복귀합니다.")
+
+    def log_decision_latency(self, ticker):
+        """
+        모의 투자 모드에서 사이클 시작부터 주문 체결까지 걸린 시간 출력
+        """
+        if self.paper_trading and self.cycle_started_at is not None:
+            print(f"[paper] {ticker} 주문 체결까지 {time.perf_counter() - self.cycle_started_at:.3f}초 (사이클 시작 기준)")
+
+    def submit_order(self, side, ticker, amount):
+        """
+        시장가 주문 후 체결 확인 (거부/미체결 시 OrderRejected)
+        주문 호출이 제한 시간을 넘기면 체결되었을 수 있으므로 REST 잔고 변화로 체결 여부를 확인한 뒤에만 실패 처리
+        :param side: 'bid' (amount: 원) 또는 'ask' (amount: 수량)
+        :return: 체결 확인된 주문
+        """
+        place = self.upbit.buy_market_order if side == 'bid' else self.upbit.sell_market_order
+        quote, base = ticker.split('-', 1)
+        before = (self.order_tracker.get_balance(base), self.order_tracker.get_balance(quote))
+        try:
+            order = place(ticker, amount)
+        except CallTimeout as e:
+            filled = self.order_tracker.reconcile(ticker, side, before)
+            if filled is None:
+                self.order_tracker.invalidate()
+                raise
+            self.send_telegram_message(f"⏱️ {ticker} 주문 응답 제한 시간 초과, 잔고 변화로 체결 확인 ({e})")
+            return filled
+        return self.order_tracker.confirm(order)
+
+    def describe_fill(self, *orders):
+        """
+        체결 확인된 주문(들)의 체결 수량/금액/평균가 요약
+        """
+        volume = sum(float(order.get('executed_volume') or 0) for order in orders)
+        funds = sum(float(order.get('executed_funds') or 0) for order in orders)
+        fee = sum(float(order.get('paid_fee') or 0) for order in orders)
+        average = funds / volume if volume else 0
+        return f"체결 {volume:,.8g}개 / {funds:,.0f}원 (평균가 {average:,.2f}, 수수료 {fee:,.0f}원)"
+
+    def remove_holding(self, ticker):
+        """
+        매도 체결된 코인의 보유 기간/연속 보유 횟수/손절·익절 조건 제거
+        """
+        self.holding_periods.pop(ticker, None)
+        self.consecutive_holds[ticker] = 0
+        self.trade_conditions.pop(ticker, None)
 
     def setup_signal_handlers(self):
         def handler(signum, frame):
+            self.save_runtime_state()
             self.send_telegram_message(f"⚠️ 프로그램이 {signal.Signals(signum).name}에 의해 종료되었습니다.")
+            self.notifier.flush()
             exit(0)
         for sig in [signal.SIGINT, signal.SIGTERM]:
             signal.signal(sig, handler)
 
-    def get_btc_ma120(self):
-        df = pyupbit.get_ohlcv("KRW-BTC", interval="day", count=120)
-        return pyupbit.get_current_price("KRW-BTC") > df['close'].mean()
+    def get_runtime_state(self):
+        """
+        재시작 시 복원할 실행 상태
+        """
+        return {
+            'is_suspended': self.is_suspended,
+            'last_rebalance_at': self.last_rebalance_at,
+            'selector': self.selector,
+            'breakout_table': self.breakout_table.state(),
+            'resampler_base': dict(self.resampler.base) if self.resampler is not None else {},
+            'ranking': self.last_ranking
+        }
+
+    def save_runtime_state(self):
+        """
+        실행 상태 스냅샷 저장 (보유 코인 목록은 마지막 동기화 결과 사용, 네트워크 요청 없음)
+        """
+        if self.runtime_state is None:
+            return
+        try:
+            self.runtime_state.save(list(self.holding_periods), self.get_runtime_state())
+        except Exception as e:
+            print(f"[RuntimeStateStore] 스냅샷 저장 실패: {e}")
+
+    def restore_runtime_state(self):
+        """
+        실행 상태 스냅샷 복원
+        - 캔들/지표/순위 캐시는 시세에서 나온 값이므로 항상 복원 (유효 기간은 각 캐시가 판단)
+        - 매매 중지 여부와 리밸런싱 시각은 첫 리스크 체크 이후 restore_trading_state에서 복원
+        """
+        if self.runtime_state is None:
+            return
+        snapshot = self.runtime_state.load()
+        if snapshot is None:
+            return
+        try:
+            state = snapshot['state']
+            if self.resampler is not None:
+                self.resampler.base.update(state.get('resampler_base', {}))
+            self.breakout_table.restore(state.get('breakout_table'))
+            selector = state.get('selector')
+            if self.selector is not None and selector is not None and selector.window == self.selector.window:
+                selector.max_correlation = self.selector.max_correlation
+                selector.min_periods = self.selector.min_periods
+                self.selector = selector
+            self.restored_ranking = state.get('ranking')
+
+            # 매매 상태는 잔고 조회가 필요하므로 첫 리스크 체크 이후 restore_trading_state에서 복원
+            self.pending_snapshot = snapshot
+        except Exception as e:
+            self.send_telegram_message(f"❌ 실행 상태 복원 중 오류 발생: {e}")
+
+    def restore_trading_state(self):
+        """
+        첫 리스크 체크 이후 호출: 저장 시점 보유 코인이 현재 잔고와 같을 때만 매매 중지 여부와 리밸런싱 시각 복원
+        """
+        snapshot, self.pending_snapshot = self.pending_snapshot, None
+        if snapshot is None:
+            return
+        try:
+            state = snapshot['state']
+            current_holdings = {
+                f"KRW-{balance['currency']}"
+                for balance in self.order_tracker.get_balances()
+                if (
+                    float(balance['balance']) > 0 and
+                    balance['currency'] not in self.manual_holdings and
+                    float(balance['balance']) * float(balance['avg_buy_price']) >= 10000
+                )
+            }
+            age = self.clock.time() - snapshot['saved_at']
+            if set(snapshot['holdings']) == current_holdings:
+                self.is_suspended = state.get('is_suspended', False)
+                self.last_rebalance_at = state.get('last_rebalance_at')
+                self.send_telegram_message(
+                    f"♻️ {age:.0f}초 전 실행 상태를 복원했습니다. (매매 중지: {self.is_suspended})")
+            else:
+                self.send_telegram_message(
+                    f"⚠️ 보유 코인이 저장 시점과 달라 매매 상태는 복원하지 않습니다. "
+                    f"(저장: {snapshot['holdings']}, 현재: {sorted(current_holdings)})")
+        except Exception as e:
+            self.send_telegram_message(f"❌ 실행 상태 복원 중 오류 발생: {e}")
+
+    def get_ohlcv(self, ticker, interval="day", count=200, use_cache=False):
+        """
+        캔들 조회: 시세 데몬 공유 메모리 -> (use_cache면 디스크 캐시) -> 기준 캔들 리샘플링 -> REST 순으로 시도
+        """
+        with self.tracer.span('get_ohlcv', ticker=ticker, interval=interval, count=count) as span:
+            if self.market_data is not None:
+                df = self.market_data.get_ohlcv(ticker, interval, count)
+                if df is not None:
+                    span.set(source='market_data')
+                    return df
+            if use_cache:
+                span.set(source='candle_cache')
+                return self.candle_cache.get_ohlcv(ticker, interval=interval, count=count)
+            if self.resampler is not None:
+                span.set(source='resampler')
+                return self.resampler.get_ohlcv(ticker, interval=interval, count=count)
+            span.set(source='rest')
+            return self.quotation.get_ohlcv(ticker, interval=interval, count=count)
+
+    def get_current_price(self, ticker):
+        """
+        현재가 조회: 시세 데몬 공유 메모리 -> REST 순으로 시도
+        """
+        with self.tracer.span('get_current_price', ticker=ticker) as span:
+            if self.market_data is not None:
+                price = self.market_data.get_current_price(ticker)
+                if price is not None:
+                    span.set(source='market_data', price=price)
+                    return price
+            price = self.quotation.get_current_price(ticker)
+            span.set(source='rest', price=price)
+            return price
+
+    def get_current_prices(self, tickers):
+        """
+        여러 코인 현재가 조회: 시세 데몬 공유 메모리에 없는 코인만 REST 일괄 조회 1회
+        :return: {티커: 현재가}
+        """
+        prices = {}
+        if self.market_data is not None:
+            for ticker in tickers:
+                price = self.market_data.get_current_price(ticker)
+                if price is not None:
+                    prices[ticker] = price
+        missing = [ticker for ticker in tickers if ticker not in prices]
+        if missing:
+            with self.tracer.span('get_current_prices', count=len(missing)):
+                infos = self.quotation.get_current_price(missing, verbose=True) or []
+            prices.update({info['market']: info['trade_price'] for info in infos})
+        return prices
+
+    def get_btc_ma120(self, cached=False):
+        """
+        BTC 현재가가 120일 이동평균선 위인지 확인
+        :param cached: True면 같은 일봉 기간에 계산한 MA120을 재사용하고 현재가만 조회 (없으면 일봉 조회)
+        :return: 120일 이평선 상위 여부
+        """
+        with self.tracer.span('get_btc_ma120', cached=cached) as span:
+            now = self.clock.time()
+            if (cached and self.btc_ma120_at is not None
+                    and bucket_start(int(now) + DAY_OFFSET, 'day') == bucket_start(int(self.btc_ma120_at) + DAY_OFFSET, 'day')):
+                ma120 = self.btc_ma120
+            else:
+                df = self.get_ohlcv("KRW-BTC", interval="day", count=120, use_cache=True)
+                ma120 = df['close'].mean()
+                self.btc_ma120, self.btc_ma120_at = ma120, now
+            price = self.get_current_price("KRW-BTC")
+            span.set(price=price, ma120=ma120, above=bool(price > ma120))
+            return price > ma120
 
     def get_top20_market_cap(self):
         try:
-            tickers = [ticker for ticker in pyupbit.get_tickers(fiat="KRW")
+            tickers = [ticker for ticker in self.quotation.get_tickers(fiat="KRW")
                        if ticker.split('-')[1] not in self.exclude_coins]
             response = requests.get(
                 "https://api.coingecko.com/api/v3/coins/markets",
-                params={"vs_currency": "usd", "order": "market_cap_desc", "per_page": 300, "page": 1, "sparkline": False}
+                params={"vs_currency": "usd", "order": "market_cap_desc", "per_page": 300, "page": 1, "sparkline": False},
+                timeout=self.deadlines.deadline('coingecko')
             )
             response.raise_for_status()
             top_coins = {coin['symbol'].upper(): coin for coin in response.json()}
@@ -77,13 +512,15 @@ class UpbitMomentumStrategy:
             return [item[0] for item in top20]
         except Exception as e:
             self.send_telegram_message(f"❌ 시가총액 상위 코인 조회 중 오류 발생: {e}")
-            time.sleep(1)
+            self.clock.sleep(1)
             return []
 
     def check_trade_threshold(self):
         sold = []
         try:
-            for balance in self.upbit.get_balances():
+            # 손절/익절 기준이 있는 보유 코인 수집
+            positions = []
+            for balance in self.order_tracker.get_balances():
                 currency = balance['currency']
                 # 원화/수동 보유 코인은 스킵
                 if currency in self.manual_holdings or currency == 'KRW':
@@ -94,36 +531,51 @@ class UpbitMomentumStrategy:
                 if balance_amt * avg_price < 10000:
                     continue
 
-                ticker = f"KRW-{currency}"
-                current_price = pyupbit.get_current_price(ticker)
-                if not current_price:
-                    self.send_telegram_message(f"⚠️ {ticker} 현재가 조회 실패")
-                    continue
-
                 # trade_conditions에서 손절/익절 값 로드
+                ticker = f"KRW-{currency}"
                 trade_condition = self.trade_conditions.get(ticker, {})
                 stop_loss = trade_condition.get("stop_loss")
                 take_profit = trade_condition.get("take_profit")
 
                 if stop_loss is None or take_profit is None:
                     continue  # 손절/익절 값이 없으면 매도 판단 안 함
-
-                # 손절 또는 익절 조건 체크
-                if current_price <= stop_loss or current_price >= take_profit:
-                    reason = "손절" if current_price <= stop_loss else "익절"
+                positions.append((ticker, balance_amt, stop_loss, take_profit))
+
+            if positions:
+                # 보유 코인 현재가를 한 번에 조회 (보유 코인 수와 관계없이 요청 1회)
+                tickers = [position[0] for position in positions]
+                prices = self.get_current_prices(tickers)
+                current_prices = np.array([prices.get(ticker) or np.nan for ticker in tickers], dtype=np.float64)
+                stop_losses = np.array([position[2] for position in positions], dtype=np.float64)
+                take_profits = np.array([position[3] for position in positions], dtype=np.float64)
+
+                for i in np.flatnonzero(np.isnan(current_prices)):
+                    self.send_telegram_message(f"⚠️ {tickers[i]} 현재가 조회 실패")
+
+                # 손절 또는 익절 조건 체크 (NaN 비교는 False)
+                hit_stop = current_prices <= stop_losses
+                hit_take = current_prices >= take_profits
+                for i in np.flatnonzero(hit_stop | hit_take):
+                    ticker, balance_amt, stop_loss, take_profit = positions[i]
+                    current_price = current_prices[i]
+                    reason = "손절" if hit_stop[i] else "익절"
                     msg = (f"⚠️ {ticker} {reason} 실행\n"
                         f"현재가: {current_price:,.0f}, 손절가: {stop_loss:,.0f}, 익절가: {take_profit:,.0f}")
                     self.send_telegram_message(msg)
 
                     try:
-                        self.upbit.sell_market_order(ticker, balance_amt)
-                        self.send_telegram_message(f"✅ {ticker} 매도 완료 ({reason})")
+                        with self.tracer.span('sell_market_order', ticker=ticker, volume=balance_amt, reason=reason):
+                            order = self.submit_order('ask', ticker, balance_amt)
+                        self.log_decision_latency(ticker)
+                        self.send_telegram_message(f"✅ {ticker} 매도 완료 ({reason}) | {self.describe_fill(order)}")
                         sold.append(ticker)
+                        self.remove_holding(ticker)
                     except Exception as e:
                         self.send_telegram_message(f"❌ {ticker} 매도 실패: {e}")
 
-            # 매도 완료 후 보유 정보 동기화
-            self.sync_holdings_with_current_state()
+            # 체결 확인 시 계좌 캐시가 갱신되므로 잔고를 다시 조회하지 않고 보유 정보만 저장
+            if sold:
+                self.save_holdings_data()
 
         except Exception as e:
             self.send_telegram_message(f"❌ 거래 임계값 체크 중 오류 발생: {e}")
@@ -131,40 +583,85 @@ class UpbitMomentumStrategy:
 
 
     def calculate_7day_returns(self, tickers):
-        returns = {}
+        closes = {}
         for ticker in tickers:
-            df = pyupbit.get_ohlcv(ticker, interval="day", count=8)
-            if df is not None and len(df) >= 7:
-                returns[ticker] = ((df['close'].iloc[-1] - df['close'].iloc[-7]) / df['close'].iloc[-7]) * 100
-            time.sleep(0.2)
-        #self.send_telegram_message(f"📈 7일 수익률: {returns}")
-        sorted_returns = sorted(returns.items(), key=lambda x: x[1], reverse=True)
-        top3 = sorted_returns[:3]
-        self.send_telegram_message(f"🔝 7일 수익률 상위 3개: {top3}")
+            self.check_stalled()
+            try:
+                df = self.get_ohlcv(ticker, interval="day", count=self.scorer.lookback)
+            except CallTimeout as e:
+                print(f"[calculate_7day_returns] {e}")
+                continue
+            if df is not None:
+                closes[ticker] = df['close']
+            self.clock.sleep(0.2)
+        top3 = self.scorer.rank(closes, top_n=3)
+        self.send_telegram_message(f"🔝 모멘텀 점수 상위 3개: {top3}")
         return [coin[0] for coin in top3]
 
     def get_top_momentum(self, top_n=20):
         """
-        7일 수익률 기준 상위 N개 코인 반환
+        종합 모멘텀 점수(기본값: 7일 수익률) 기준 상위 N개 코인 반환
         :param top_n: 상위 코인 개수
         :return: 상위 N개 코인의 티커 리스트
         """
-        tickers = [ticker for ticker in pyupbit.get_tickers(fiat="KRW") if ticker.split('-')[1] not in self.exclude_coins]
-        returns = {}
+        # 재시작 직후 첫 스캔은 같은 일봉 기간에 저장된 순위가 충분히 최근이면 재사용
+        restored, self.restored_ranking = self.restored_ranking, None
+        if restored is not None and restored['top_n'] >= top_n:
+            now = self.clock.time()
+            same_day = (bucket_start(int(now) + DAY_OFFSET, 'day')
+                        == bucket_start(int(restored['at']) + DAY_OFFSET, 'day'))
+            if same_day and now - restored['at'] <= self.ranking_max_age:
+                self.last_ranking = restored
+                self.breakout_table.set_candidates([t for t in restored['tickers'][:top_n] if t.startswith('KRW-')])
+                return restored['tickers'][:top_n]
+
+        tickers = [ticker for ticker in self.universe_prefilter.markets() if ticker.split('-')[1] not in self.exclude_coins]
+        # 거래대금(원화 환산) 기준 사전 필터를 통과한 코인만 캔들 조회 -> 유니버스가 커져도 조회 수는 max_candidates 이하
+        tickers = self.universe_prefilter.filter(tickers)
+        # 티커당 캔들 조회 1회 (기간을 늘려도 조회 개수만 늘어남), 점수는 종가 행렬에서 한 번에 계산
+        closes = {}
         for ticker in tickers:
-            df = pyupbit.get_ohlcv(ticker, interval="day", count=8)
-            if df is not None and len(df) >= 7:
-                returns[ticker] = ((df['close'].iloc[-1] - df['close'].iloc[-7]) / df['close'].iloc[-7]) * 100
-            time.sleep(0.2)  # API 호출 제한 방지
-
-        sorted_returns = sorted(returns.items(), key=lambda x: x[1], reverse=True)
-        top_momentum = sorted_returns[:top_n]
+            self.check_stalled()
+            try:
+                df = self.get_ohlcv(ticker, interval="day", count=self.scorer.lookback)
+            except CallTimeout as e:
+                print(f"[get_top_momentum] {e}")  # 제한 시간을 넘긴 코인은 이번 스캔에서 제외
+                continue
+            if df is not None and len(df) >= 2:
+                closes[ticker] = df['close']
+            self.clock.sleep(0.2)  # API 호출 제한 방지
+
+        # BTC/USDT 마켓 종가는 KRW-BTC/KRW-USDT 일봉 종가로 원화 환산
+        quotes = {ticker.split('-')[0] for ticker in closes} - {'KRW'}
+        if quotes:
+            rate_closes = {}
+            for quote in sorted(quotes):
+                self.check_stalled()
+                try:
+                    df = self.get_ohlcv(f"KRW-{quote}", interval="day", count=self.scorer.lookback)
+                except CallTimeout as e:
+                    # 환율 종가 없이 환산하면 수익률이 틀어지므로 해당 마켓 코인은 이번 스캔에서 제외
+                    print(f"[get_top_momentum] {e}")
+                    closes = {ticker: series for ticker, series in closes.items() if ticker.split('-')[0] != quote}
+                    continue
+                if df is not None:
+                    rate_closes[quote] = df['close']
+            closes = convert_closes(closes, rate_closes, self.universe_prefilter.rates)
+
+        # 조회한 일봉으로 상관계수 누적 합계 갱신 (새로 완성된 일봉만 반영)
+        if self.selector is not None:
+            self.selector.update(closes)
+
+        top_momentum = self.scorer.rank(closes, top_n=top_n)
+        # 상위 코인 중 주문 가능한 원화 마켓만 돌파 목표가 테이블 갱신 대상
+        self.breakout_table.set_candidates([coin[0] for coin in top_momentum if coin[0].startswith('KRW-')])
+        self.last_ranking = {'at': self.clock.time(), 'top_n': top_n, 'tickers': [coin[0] for coin in top_momentum]}
         #주석처리
         #self.send_telegram_message(f"📈 7일 수익률 상위 {top_n}개 코인: {top_momentum}")
         return [coin[0] for coin in top_momentum]
 
     def should_keep_coin(self, ticker):
-        now = datetime.now()
+        now = self.clock.now()
         holding_days = (now - self.holding_periods.get(ticker, now)).days
         if holding_days >= 14 or self.consecutive_holds.get(ticker, 0) >= 3:
             return False
@@ -264,7 +761,7 @@ class UpbitMomentumStrategy:
             # 현재 보유 중인 티커( KRW-XXX 형태 )
             current_holdings = {
                 f"KRW-{balance['currency']}"
-                for balance in self.upbit.get_balances()
+                for balance in self.order_tracker.get_balances()
                 if (
                     float(balance['balance']) > 0 and
                     balance['currency'] not in self.manual_holdings and
@@ -283,7 +780,7 @@ class UpbitMomentumStrategy:
 
             # 새로 보유하게 된 코인 추가
             for ticker in current_holdings - recorded_tickers:
-                self.holding_periods[ticker] = datetime.now()
+                self.holding_periods[ticker] = self.clock.now()
                 self.consecutive_holds[ticker] = self.consecutive_holds.get(ticker, 0) + 1
 
                 # trade_conditions에 아직 등록 안 된 경우 기본값 세팅
@@ -305,46 +802,43 @@ class UpbitMomentumStrategy:
         :param window: ATR 계산 기간 (기본값은 14일)
         :return: ATR 값
         """
-        high_low = df['high'] - df['low']
-        high_close = abs(df['high'] - df['close'].shift())
-        low_close = abs(df['low'] - df['close'].shift())
-        true_range = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
-        atr = true_range.rolling(window=window).mean()
-        return atr.iloc[-1]
+        _, panel = indicators.ohlc_panel({None: df})
+        return float(indicators.atr(panel, window)[0])
 
     def calculate_dynamic_k(self, df, base_k=0.5):
         """
-        동적 k 값 계산
+        동적 k 값 계산 (전체 기간 평균 진폭 / 최근 14개 평균 진폭 비율로 k 조정, 0.3~0.7로 제한)
         :param df: OHLCV 데이터 (DataFrame)
         :param base_k: 기본 k 값
         :return: 동적으로 계산된 k 값
         """
-        recent_volatility = (df['high'] - df['low']).mean()  # 최근 변동성 평균
-        average_volatility = (df['high'] - df['low']).rolling(window=14).mean().iloc[-1]  # 14일 이동 평균 변동성
-
-        # 변동성 비율을 기반으로 k 조정
-        volatility_ratio = recent_volatility / average_volatility if average_volatility > 0 else 1
-        dynamic_k = base_k * volatility_ratio
-
-        # k 값이 지나치게 크거나 작아지지 않도록 제한
-        return max(0.3, min(dynamic_k, 0.7))
-
-    def calculate_breakout_price(self, df):
-        yesterday = df.iloc[-2]
-        today_open = df['open'].iloc[-1]
-        volatility = yesterday['high'] - yesterday['low']
+        _, panel = indicators.ohlc_panel({None: df})
+        return float(indicators.dynamic_k(panel, base_k)[0])
 
-        # 동적 k 값 계산
-        dynamic_k = self.calculate_dynamic_k(df)
+    def calculate_breakout_price(self, df, dynamic_k=None):
+        _, panel = indicators.ohlc_panel({None: df})
+        k = None if dynamic_k is None else np.array([dynamic_k])
+        return float(indicators.breakout_price(panel, k)[0])
 
-        target_price = today_open + (volatility * dynamic_k)
-        return target_price
-
-
-    def should_buy(self, df):
-        breakout_price = self.calculate_breakout_price(df)  # 동적 k 값을 반영
-        current_price = df['close'].iloc[-1]
-        return current_price > breakout_price
+    def calculate_breakout_entries(self, frames):
+        """
+        돌파 목표가 테이블 항목을 후보 코인 전체에 대해 한 번에 계산 (시간봉 마감 직후 BreakoutTable이 호출)
+        :param frames: {티커: 시간봉 DataFrame}
+        :return: {티커: 목표가, 동적 k, ATR, 손절가, 익절가}
+        """
+        tickers, panel = indicators.ohlc_panel(frames)
+        levels = indicators.breakout_levels(panel)
+        return {
+            ticker: {name: float(values[i]) for name, values in levels.items()}
+            for i, ticker in enumerate(tickers)
+        }
+
+    def should_buy(self, ticker, current_price):
+        """
+        미리 계산한 돌파 목표가와 현재가 비교 (테이블에 없으면 즉시 계산)
+        """
+        entry = self.breakout_table.get(ticker)
+        return entry is not None and current_price is not None and current_price > entry['breakout_price']
 
 
     def execute_trades(self):
@@ -352,7 +846,7 @@ class UpbitMomentumStrategy:
             # (1) 먼저 매도 로직
             current_holdings = [
                 balance['currency']
-                for balance in self.upbit.get_balances()
+                for balance in self.order_tracker.get_balances()
                 if (float(balance['balance']) > 0 and
                     balance['currency'] not in self.manual_holdings and
                     float(balance['balance']) * float(balance['avg_buy_price']) >= 10000)
@@ -364,27 +858,27 @@ class UpbitMomentumStrategy:
                 ticker = f"KRW-{coin}"
                 if not self.should_keep_coin(ticker):
                     try:
-                        balance_amt = self.upbit.get_balance(coin)
+                        balance_amt = self.order_tracker.get_balance(coin)
                         self.send_telegram_message(f"🔄 {ticker} 전량 매도 시도 중...")
-                        self.upbit.sell_market_order(ticker, balance_amt)
-                        self.send_telegram_message(f"✅ {ticker} 매도 완료")
+                        with self.tracer.span('sell_market_order', ticker=ticker, volume=balance_amt, reason='rebalance'):
+                            order = self.submit_order('ask', ticker, balance_amt)
+                        self.log_decision_latency(ticker)
+                        self.send_telegram_message(f"✅ {ticker} 매도 완료 | {self.describe_fill(order)}")
                         sold.append(ticker)
 
                         # 보유 정보 제거
-                        self.holding_periods.pop(ticker, None)
-                        self.consecutive_holds[ticker] = 0
-                        self.trade_conditions.pop(ticker, None)
+                        self.remove_holding(ticker)
 
                     except Exception as e:
                         self.send_telegram_message(f"❌ {ticker} 매도 실패: {e}")
 
             # (2) 매수 로직
             # 매수하기 전에 최신 KRW 잔고와 보유 슬롯 계산
-            total_krw_balance = float(self.upbit.get_balance("KRW"))
+            total_krw_balance = float(self.order_tracker.get_balance("KRW"))
             # 이미 보유 중인 (자동매매 대상) 코인 수
             holding_count = len([
                 c for c in current_holdings
-                if float(self.upbit.get_balance(c)) * float(self.upbit.get_avg_buy_price(c)) >= 10000
+                if float(self.order_tracker.get_balance(c)) * float(self.order_tracker.get_avg_buy_price(c)) >= 10000
             ])
             # 현재 매수 가능한 슬롯(최대 보유 코인 개수 - 현재 보유 코인 수)
             available_slots = self.max_slots - holding_count
@@ -394,24 +888,47 @@ class UpbitMomentumStrategy:
                 return
 
             # 모멘텀 상위 코인 선정 (예: 20개)
-            target_coins = self.get_top_momentum(top_n=20)
+            with self.tracer.span('get_top_momentum', top_n=20) as span:
+                target_coins = self.get_top_momentum(top_n=20)
+                span.set(result=target_coins)
+
+            # 후보 코인 호가와 현재가를 한 번에 조회하여 캐시 (리밸런싱당 추가 요청 각 1회)
+            # 호가는 주문 체결을 기다리는 동안 ttl이 지나도 이번 리밸런싱 내내 같은 조회 결과를 사용
+            held_tickers = [f"KRW-{c}" for c in current_holdings]
+            candidates = [t for t in target_coins
+                          if t.startswith('KRW-') and t not in sold and t not in held_tickers]
+            orderbook_as_of = self.orderbook_cache.prefetch(candidates)
+            current_prices = self.get_current_prices(candidates) if candidates else {}
 
             for ticker in target_coins:
+                self.check_stalled()
                 # 슬롯을 모두 소진했으면 중단
                 if available_slots <= 0:
                     break
 
+                # 원화 마켓만 주문 가능 (BTC/USDT 마켓 코인은 순위 비교에만 사용)
+                if not ticker.startswith('KRW-'):
+                    continue
+
                 # 이미 매도된(sold) 코인, 혹은 현재 보유중인 코인이면 스킵
                 if ticker in sold or ticker in [f"KRW-{c}" for c in current_holdings]:
                     continue
 
-                # 변동성 돌파 여부 확인
-                df = pyupbit.get_ohlcv(ticker, interval="minute60", count=48)
-                if df is None or not self.should_buy(df):
+                # 보유/이번에 매수한 코인과 상관계수가 높으면 스킵
+                if self.selector is not None and not self.selector.is_diversified(
+                        ticker, [f"KRW-{c}" for c in current_holdings]):
+                    continue
+
+                # 변동성 돌파 여부 확인 (미리 계산한 목표가 조회 + 현재가 비교)
+                current_price = current_prices.get(ticker)
+                with self.tracer.span('should_buy', ticker=ticker) as span:
+                    buy = self.should_buy(ticker, current_price)
+                    span.set(result=bool(buy), price=current_price)
+                if not buy:
                     continue
 
                 # 각 코인 매수 시점마다 잔고를 재확인
-                krw_balance = float(self.upbit.get_balance("KRW"))
+                krw_balance = float(self.order_tracker.get_balance("KRW"))
                 # 잔고가 부족하면 더 이상 매수 불가 -> 중단
                 if krw_balance < 5000:
                     break
@@ -421,20 +938,49 @@ class UpbitMomentumStrategy:
                 if invest > krw_balance:
                     break  # 투자액이 실제 잔고보다 많으면 매수 불가 -> 중단
 
-                # 손절/익절 기준 계산
-                breakout_price = self.calculate_breakout_price(df)
-                atr = self.calculate_atr(df)
-                stop_loss = breakout_price - (1.5 * atr)
-                take_profit = breakout_price + (1.5 * atr)
-
-                # 매수 시도
-                try:
+                # 손절/익절 기준 (돌파 목표가 테이블에서 조회)
+                entry = self.breakout_table.get(ticker)
+                if entry is None:
+                    continue  # 판단 이후 테이블이 갱신되어 목표가가 없어진 경우
+                breakout_price = entry['breakout_price']
+                stop_loss = entry['stop_loss']
+                take_profit = entry['take_profit']
+
+                # 호가 기반 가격 영향 추정 후 주문 계획 (그대로 / 축소 / 분할 / 건너뜀)
+                orders, estimate = self.orderbook_cache.plan_buy(ticker, invest, as_of=orderbook_as_of)
+                if not orders:
+                    if estimate is None:
+                        self.send_telegram_message(f"⚠️ {ticker} 호가 조회 실패로 매수 건너뜀")
+                    else:
+                        self.send_telegram_message(
+                            f"⚠️ {ticker} 호가 부족으로 매수 건너뜀 (예상 가격 영향: {estimate['impact']:.2f}%)"
+                        )
+                    continue
+                if sum(orders) != invest or len(orders) > 1:
                     self.send_telegram_message(
-                        f"🛒 {ticker} 매수 시도 (투자액: {invest:,}원 / 잔고: {krw_balance:,.0f}원 / 슬롯: {available_slots})"
+                        f"📉 {ticker} 가격 영향 초과로 주문 조정: {invest:,}원 -> {' + '.join(f'{o:,}' for o in orders)}원"
                     )
-                    self.upbit.buy_market_order(ticker, invest)
+
+                # 매수 시도 (분할 주문 중 일부만 체결되어도 체결된 만큼 보유로 기록)
+                self.send_telegram_message(
+                    f"🛒 {ticker} 매수 시도 (투자액: {sum(orders):,}원 / 잔고: {krw_balance:,.0f}원 / 슬롯: {available_slots})"
+                )
+                fills = []
+                for i, amount in enumerate(orders):
+                    try:
+                        if i > 0:
+                            self.clock.sleep(self.order_split_interval)  # 호가 회복 대기
+                        with self.tracer.span('buy_market_order', ticker=ticker, amount=amount, split=i):
+                            fills.append(self.submit_order('bid', ticker, amount))
+                        self.log_decision_latency(ticker)
+                    except Exception as e:
+                        self.send_telegram_message(f"❌ {ticker} 매수 실패: {e}")
+                        # 매수 실패 시 슬롯 차감 여부는 전략에 맞게 결정 (여기서는 체결된 주문이 없으면 차감 안 함)
+                        break
+                if fills:
                     self.send_telegram_message(
-                        f"✅ {ticker} 매수 완료 | 목표가: {breakout_price:.0f}, 손절가: {stop_loss:.0f}, 익절가: {take_profit:.0f}"
+                        f"✅ {ticker} 매수 완료 | {self.describe_fill(*fills)} | "
+                        f"목표가: {breakout_price:.0f}, 손절가: {stop_loss:.0f}, 익절가: {take_profit:.0f}"
                     )
 
                     # 손절/익절 조건 저장
@@ -443,17 +989,13 @@ class UpbitMomentumStrategy:
                         "take_profit": take_profit
                     }
                     # 보유 기간/연속 보유 횟수 갱신
-                    self.holding_periods[ticker] = datetime.now()
+                    self.holding_periods[ticker] = self.clock.now()
                     self.consecutive_holds[ticker] = self.consecutive_holds.get(ticker, 0) + 1
 
                     # 현재 보유목록 갱신 + 슬롯 1개 소모
                     current_holdings.append(ticker.split('-')[1])
                     available_slots -= 1
 
-                except Exception as e:
-                    self.send_telegram_message(f"❌ {ticker} 매수 실패: {e}")
-                    # 매수 실패 시 슬롯 차감 여부는 전략에 맞게 결정 (여기서는 차감 안 함)
-
             # 매수/매도 끝난 뒤 최종 저장
             self.save_holdings_data()
 
@@ -464,7 +1006,7 @@ class UpbitMomentumStrategy:
 
     def sell_all_positions(self):
         try:
-            for balance in self.upbit.get_balances():
+            for balance in self.order_tracker.get_balances():
                 currency = balance['currency']
 
                 if currency in self.manual_holdings or float(balance['balance']) * float(balance['avg_buy_price']) < 10000:
@@ -473,66 +1015,132 @@ class UpbitMomentumStrategy:
                 ticker = f"KRW-{currency}"
 
                 try:
-                    balance_amt = self.upbit.get_balance(currency)
+                    balance_amt = self.order_tracker.get_balance(currency)
                     self.send_telegram_message(f"🔄 {ticker} 전량 매도 시도 중...")
-                    self.upbit.sell_market_order(ticker, balance_amt)
-                    self.send_telegram_message(f"✅ {ticker} 매도 완료")
-                    self.holding_periods.pop(ticker, None)
-                    self.consecutive_holds[ticker] = 0
+                    with self.tracer.span('sell_market_order', ticker=ticker, volume=balance_amt, reason='sell_all'):
+                        order = self.submit_order('ask', ticker, balance_amt)
+                    self.log_decision_latency(ticker)
+                    self.send_telegram_message(f"✅ {ticker} 매도 완료 | {self.describe_fill(order)}")
+                    self.remove_holding(ticker)
 
                 except Exception as e:
                     self.send_telegram_message(f"❌ {ticker} 매도 실패: {e}")
 
+            self.save_holdings_data()
         except Exception as e:
             self.send_telegram_message(f"❌ 전체 매도 중 오류 발생: {e}")
 
+    def update_suspension(self, btc_above_ma):
+        """
+        BTC가 120일 이평선 아래로 떨어지면 전체 매도 후 매매 중지, 다시 올라오면 매매 재개
+        """
+        if not btc_above_ma:
+            if not self.is_suspended:
+                self.send_telegram_message("😱 BTC가 120일 이평선 아래로 떨어져 전체 매도 후 매매를 중지합니다.")
+                with self.tracer.span('sell_all_positions'):
+                    self.sell_all_positions()
+                self.is_suspended = True
+                self.save_runtime_state()
+        elif self.is_suspended:  # 매매 재개 체크
+            self.send_telegram_message("✅ BTC가 120일 이평선 위 올라왔습니다. 매매를 재개합니다.")
+            self.is_suspended = False
+            self.save_runtime_state()
+
+    def run_cycle(self, kst):
+        """
+        정상 모드 사이클: 손절/익절 체크, 동기화, MA120 확인, 매매 중지/재개, 빈 슬롯 매수 또는 리밸런싱
+        """
+        if not self.breakout_table.background:
+            with self.tracer.span('breakout_table_refresh'):
+                self.breakout_table.maybe_refresh()
+        self.cycle_started_at = time.perf_counter()
+        now = self.clock.now(kst)
+        # 손절/익절 체크를 가장 먼저 수행 (시세 조회가 멈춰도 리스크 체크는 매 사이클 실행)
+        with self.tracer.span('check_trade_threshold') as span:
+            sold_coins = self.check_trade_threshold()  # 손절 및 수익 실현 체크 후 매도
+            span.set(sold=sold_coins)
+        if not self.first_risk_check_done:
+            self.first_risk_check_done = True
+            elapsed = time.perf_counter() - self.started_at
+            print(f"[run] 첫 리스크 체크까지 {elapsed:.3f}초")
+            self.send_telegram_message(f"⏱️ 첫 리스크 체크까지 {elapsed:.3f}초")
+        with self.tracer.span('sync_holdings_with_current_state'):
+            self.sync_holdings_with_current_state()
+        if self.pending_snapshot is not None:
+            self.restore_trading_state()
+
+        # BTC 120일 이평선 상위인지 확인 (제한 시간 초과 시 이번 사이클의 매매 중지/매수/리밸런싱만 건너뜀)
+        try:
+            btc_above_ma = self.get_btc_ma120()
+            self.ma120_timeouts = 0
+        except CallTimeout as e:
+            self.ma120_timeouts += 1
+            self.send_telegram_message(
+                f"⏱️ BTC MA120 조회 제한 시간 초과 ({self.ma120_timeouts}회 연속), 이번 사이클 매매를 건너뜁니다: {e}")
+            if self.stall_watchdog is not None and self.ma120_timeouts >= self.max_consecutive_timeouts:
+                self.enter_degraded(f"BTC MA120 조회가 {self.ma120_timeouts}회 연속 제한 시간을 넘겨")
+            return
+
+        self.update_suspension(btc_above_ma)
+        if btc_above_ma:
+            # 보유 코인 개수 확인 (1만 원 이하 자산 제외)
+            holding_count = len([
+                balance['currency']
+                for balance in self.order_tracker.get_balances()
+                if (
+                    float(balance['balance']) > 0 and
+                    balance['currency'] not in self.manual_holdings and
+                    float(balance['balance']) * float(balance['avg_buy_price']) >= 10000  # 1만 원 이상인 자산만 포함
+                )
+            ])
+
+            # 손절 매도가 없고 보유 코인 수가 max_slots보다 작은 경우
+            if (not sold_coins) and (holding_count < self.max_slots) and (not self.is_suspended):
+                self.send_telegram_message(f"보유 코인이 {self.max_slots}개 보다 적은 상태입니다. 매매를 실행합니다.")
+                with self.tracer.span('execute_trades', reason='open_slots', holding_count=holding_count):
+                    self.execute_trades()
+            # 리밸런싱 주기마다 매매 실행 (구간당 1회, 재시작해도 같은 구간에서 다시 실행하지 않음)
+            elif (self.last_purchase_time is not None) and (
+                    now.weekday() == 0 and now.hour == 23 and 29 <= now.minute < 31) and (
+                    self.last_rebalance_at is None or self.clock.time() - self.last_rebalance_at >= 180):
+                self.send_telegram_message(f"리밸런싱 주기가 도래하여 매매를 실행합니다.")
+                with self.tracer.span('execute_trades', reason='rebalance', holding_count=holding_count):
+                    self.execute_trades()
+                self.last_rebalance_at = self.clock.time()
+                self.save_runtime_state()
+
     def run(self):
-        is_suspended = False
         kst = pytz.timezone('Asia/Seoul')
+        self.breakout_table.start()
+        self.order_tracker.start()
+        if self.stall_watchdog is not None:
+            self.stall_watchdog.start()
         while True:
             try:
-                now = datetime.now(kst)
-                btc_above_ma = self.get_btc_ma120()  # BTC 120일 이평선 상위인지 확인
-                sold_coins = self.check_trade_threshold()  # 손절 및 수익 실현 체크 후 매도
-                self.sync_holdings_with_current_state()
-
-                if not btc_above_ma:
-                    if not is_suspended:
-                        self.send_telegram_message("😱 BTC가 120일 이평선 아래로 떨어져 전체 매도 후 매매를 중지합니다.")
-                        self.sell_all_positions()
-                        is_suspended = True
-                else:
-                    if is_suspended:  # 매매 재개 체크
-                        self.send_telegram_message("✅ BTC가 120일 이평선 위 올라왔습니다. 매매를 재개합니다.")
-                        is_suspended = False
-
-                    # 보유 코인 개수 확인 (1만 원 이하 자산 제외)
-                    holding_count = len([
-                        balance['currency']
-                        for balance in self.upbit.get_balances()
-                        if (
-                            float(balance['balance']) > 0 and
-                            balance['currency'] not in self.manual_holdings and
-                            float(balance['balance']) * float(balance['avg_buy_price']) >= 10000  # 1만 원 이상인 자산만 포함
-                        )
-                    ])
-
-                    # 손절 매도가 없고 보유 코인 수가 max_slots보다 작은 경우
-                    if (not sold_coins) and (holding_count < self.max_slots) and (not is_suspended):
-                        self.send_telegram_message(f"보유 코인이 {self.max_slots}개 보다 적은 상태입니다. 매매를 실행합니다.")
-                        self.execute_trades()
-                    # 리밸런싱 주기마다 매매 실행
-                    elif (self.last_purchase_time is not None) and (
-                            now.weekday() == 0 and now.hour == 23 and 29 <= now.minute < 31):
-                        self.send_telegram_message(f"리밸런싱 주기가 도래하여 매매를 실행합니다.")
-                        self.execute_trades()
-
-                time.sleep(60)
+                if self.stall_watchdog is not None:
+                    self.stall_watchdog.cycle_started()
+                try:
+                    with self.tracer.cycle(suspended=self.is_suspended, degraded=self.degraded):
+                        # 정지 감지 후에는 손절/익절 체크만 수행
+                        if self.degraded:
+                            self.run_degraded_cycle()
+                        else:
+                            self.run_cycle(kst)
+
+                        # 주기적 실행 상태 스냅샷
+                        if self.runtime_state is not None and self.runtime_state.due():
+                            self.save_runtime_state()
+                finally:
+                    # 중단/오류로 끝난 사이클도 종료로 기록 (대기 중 정지로 오인하지 않도록)
+                    if self.stall_watchdog is not None:
+                        self.stall_watchdog.cycle_finished()
+                self.clock.sleep(60)
+            except CycleAborted as e:
+                self.send_telegram_message(f"⏱️ {e}")
+                self.clock.sleep(60)
             except Exception as e:
                 self.send_telegram_message(f"❌ 실행 중 오류 발생: {e}")
-                time.sleep(60)
-
-
+                self.clock.sleep(60)
 
 if __name__ == "__main__":
     try:
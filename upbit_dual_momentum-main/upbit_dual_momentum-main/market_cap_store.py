@@ -0,0 +1,178 @@
+import os
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import requests
+
+DAY_MS = 86_400_000
+RANGE_URL = "https://api.coingecko.com/api/v3/coins/{coin_id}/market_chart/range"
+
+
+def to_epoch_day(date):
+    """
+    datetime 또는 'YYYY-MM-DD' -> UTC 기준 epoch 일
+    """
+    if isinstance(date, str):
+        date = datetime.strptime(date, "%Y-%m-%d")
+    return int(np.datetime64(date.strftime("%Y-%m-%d"), 'D').astype(np.int64))
+
+
+def daily_points(timestamps_ms, values):
+    """
+    CoinGecko [timestamp(ms), 값] 목록을 UTC 날짜별 첫 값으로 정리 (벡터 연산)
+    :return: (epoch 일 배열, 값 배열)
+    """
+    timestamps_ms = np.asarray(timestamps_ms, dtype=np.int64)
+    values = np.asarray(values, dtype=np.float64)
+    order = np.argsort(timestamps_ms, kind='stable')
+    days = timestamps_ms[order] // DAY_MS
+    values = values[order]
+    if len(days) == 0:
+        return days, values
+    first = np.concatenate([[True], days[1:] != days[:-1]])
+    return days[first], values[first]
+
+
+def merge_spans(spans):
+    """
+    [시작 일, 끝 일] 구간 목록을 겹치거나 맞닿은 구간끼리 병합
+    """
+    merged = []
+    for start, end in sorted(spans):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def missing_spans(covered, start, end):
+    """
+    [start, end] 중 covered 구간에 포함되지 않은 부분
+    """
+    missing = []
+    cursor = start
+    for span_start, span_end in covered:
+        if span_end < cursor:
+            continue
+        if span_start > end:
+            break
+        if span_start > cursor:
+            missing.append([cursor, span_start - 1])
+        cursor = max(cursor, span_end + 1)
+    if cursor <= end:
+        missing.append([cursor, end])
+    return missing
+
+
+class MarketCapStore:
+    """
+    CoinGecko 시가총액 일별 시계열 로컬 저장소
+    - 코인별로 (날짜, 시가총액)과 이미 조회한 날짜 구간을 저장
+    - 요청한 기간 중 조회한 적 없는 구간만 /market_chart/range로 받아 병합
+    - 오늘(UTC)은 아직 확정되지 않았으므로 조회한 구간으로 기록하지 않음
+    """
+
+    def __init__(self, directory='market_caps', vs_currency='usd', headers=None, request_interval=1.0):
+        """
+        :param directory: 저장 디렉토리
+        :param vs_currency: 시가총액 기준 통화
+        :param headers: 요청 헤더
+        :param request_interval: 요청 간 지연 시간 (초)
+        """
+        self.directory = directory
+        self.vs_currency = vs_currency
+        self.headers = headers or {}
+        self.request_interval = request_interval
+        self.series = {}
+
+    def _path(self, coin_id):
+        return os.path.join(self.directory, f"{coin_id}.npz")
+
+    def load(self, coin_id):
+        series = self.series.get(coin_id)
+        if series is not None:
+            return series
+        series = {'days': np.empty(0, dtype=np.int64), 'caps': np.empty(0), 'covered': []}
+        path = self._path(coin_id)
+        if os.path.exists(path):
+            try:
+                with np.load(path) as data:
+                    series = {'days': data['days'], 'caps': data['caps'], 'covered': data['covered'].tolist()}
+            except Exception as e:
+                print(f"[MarketCapStore] {path} 로드 실패: {e}")
+        self.series[coin_id] = series
+        return series
+
+    def save(self, coin_id):
+        series = self.series[coin_id]
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = self._path(coin_id) + '.tmp.npz'
+        np.savez(tmp_path, days=series['days'], caps=series['caps'],
+                 covered=np.asarray(series['covered'], dtype=np.int64).reshape(-1, 2))
+        os.replace(tmp_path, self._path(coin_id))
+
+    def fetch_range(self, coin_id, start_day, end_day):
+        """
+        [start_day, end_day] 구간 시가총액 조회
+        :return: (epoch 일 배열, 값 배열), 실패 시 None
+        """
+        params = {
+            'vs_currency': self.vs_currency,
+            'from': start_day * 86400,
+            'to': (end_day + 1) * 86400 - 1
+        }
+        try:
+            response = requests.get(RANGE_URL.format(coin_id=coin_id), headers=self.headers, params=params)
+            if response.status_code != 200:
+                print(f"[MarketCapStore] CoinGecko API 오류 ({response.status_code}) for {coin_id}")
+                return None
+            points = response.json().get('market_caps', [])
+        except Exception as e:
+            print(f"[MarketCapStore] CoinGecko API 호출 중 오류 발생 for {coin_id}: {e}")
+            return None
+        finally:
+            time.sleep(self.request_interval)
+        if not points:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        points = np.asarray(points, dtype=np.float64)
+        return daily_points(points[:, 0].astype(np.int64), points[:, 1])
+
+    def update(self, coin_id, start_date, end_date):
+        """
+        start_date ~ end_date 중 저장되지 않은 구간만 조회해 병합
+        :return: 새로 조회한 구간 수
+        """
+        series = self.load(coin_id)
+        start_day, end_day = to_epoch_day(start_date), to_epoch_day(end_date)
+        today = int(np.datetime64(datetime.now(timezone.utc).strftime("%Y-%m-%d"), 'D').astype(np.int64))
+        requested = 0
+        for span_start, span_end in missing_spans(series['covered'], start_day, end_day):
+            fetched = self.fetch_range(coin_id, span_start, span_end)
+            requested += 1
+            if fetched is None:
+                continue
+            days, caps = fetched
+            # 새 값 우선으로 병합
+            all_days = np.concatenate([days, series['days']])
+            all_caps = np.concatenate([caps, series['caps']])
+            all_days, first = np.unique(all_days, return_index=True)
+            series['days'], series['caps'] = all_days, all_caps[first]
+            if min(span_end, today - 1) >= span_start:
+                series['covered'] = merge_spans(series['covered'] + [[span_start, min(span_end, today - 1)]])
+        if requested:
+            self.save(coin_id)
+        return requested
+
+    def get_range(self, coin_id, start_date, end_date):
+        """
+        start_date ~ end_date 일별 시가총액 {'YYYY-MM-DD': 값} (없는 구간은 먼저 조회)
+        """
+        self.update(coin_id, start_date, end_date)
+        series = self.series[coin_id]
+        start_day, end_day = to_epoch_day(start_date), to_epoch_day(end_date)
+        lo = np.searchsorted(series['days'], start_day, side='left')
+        hi = np.searchsorted(series['days'], end_day, side='right')
+        dates = series['days'][lo:hi].astype('datetime64[D]').astype(str)
+        return dict(zip(dates.tolist(), series['caps'][lo:hi].tolist()))
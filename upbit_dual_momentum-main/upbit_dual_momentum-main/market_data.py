@@ -0,0 +1,463 @@
+"""
+공유 메모리 시세 데몬 / 클라이언트
+
+데몬(python market_data.py)이 업비트와 단 하나의 WebSocket 연결을 유지하며
+모든 KRW 마켓의 현재가와 최근 캔들을 메모리 맵 링 버퍼 파일에 기록하고,
+봇/백테스트/노트북 등 여러 프로세스는 MarketDataClient로 네트워크 요청 없이 읽음
+
+파일 구조 (data_dir)
+- markets.json: {'generation': 세대 번호, 'slots': 티커 -> 현재가 슬롯 번호}
+- prices.bin: 헤더 + 슬롯별 (체결 시각, 현재가)
+- candles/{ticker}_{interval}.bin: 헤더 + 캔들 레코드 링 버퍼
+
+데몬은 시작할 때마다 세대 번호를 올려 prices.bin을 새로 만들고 markets.json을 마지막에 교체함
+파일은 임시 이름으로 만든 뒤 os.replace로 바꾸므로 이전 파일을 매핑 중인 리더는 잘리지 않은 이전 파일을 계속 읽고,
+클라이언트는 markets.json이 바뀌면 슬롯과 파일을 다시 열어 재시작 전 슬롯 번호로 다른 코인 가격을 읽지 않음
+
+링 버퍼는 각 레코드를 pos, pos + capacity 두 곳에 기록하여 최근 N개가 항상 연속된 구간이 되므로
+리더는 연속 구간 하나를 한 번에 복사하며, 복사 전후 헤더의 seq 값(홀수 = 쓰는 중)이 같은지로 일관성을 확인함
+시각(ts)은 pyupbit 인덱스와 같은 KST 기준 시각을 epoch 초로 저장
+"""
+import asyncio
+import json
+import os
+import time
+import uuid
+from datetime import datetime
+
+import numpy as np
+import pyupbit
+
+HEADER_DTYPE = np.dtype([
+    ('seq', 'u8'),
+    ('capacity', 'i8'),
+    ('written', 'i8'),
+    ('updated_at', 'f8'),
+    ('generation', 'u8'),
+    ('reserved', 'u1', 24)
+])
+
+CANDLE_DTYPE = np.dtype([
+    ('ts', 'i8'),
+    ('open', 'f8'),
+    ('high', 'f8'),
+    ('low', 'f8'),
+    ('close', 'f8'),
+    ('volume', 'f8'),
+    ('value', 'f8')
+])
+
+PRICE_DTYPE = np.dtype([
+    ('ts', 'i8'),
+    ('price', 'f8')
+])
+
+# 캔들 간격(초), 일봉은 KST 09:00, 주봉은 월요일 KST 09:00에 시작
+INTERVAL_SECONDS = {
+    'minute1': 60,
+    'minute3': 180,
+    'minute5': 300,
+    'minute10': 600,
+    'minute15': 900,
+    'minute30': 1800,
+    'minute60': 3600,
+    'minute240': 14400,
+    'day': 86400,
+    'week': 7 * 86400
+}
+DAY_OFFSET = 9 * 3600
+# 1970-01-01은 목요일이므로 월요일(1970-01-05) 09:00 기준
+INTERVAL_OFFSETS = {
+    'day': DAY_OFFSET,
+    'week': 4 * 86400 + DAY_OFFSET
+}
+
+DEFAULT_DATA_DIR = '/dev/shm/upbit_market_data' if os.path.isdir('/dev/shm') else 'market_data'
+
+
+def bucket_start(ts, interval):
+    """
+    KST epoch 초(ts, 정수 또는 numpy 배열)가 속한 캔들의 시작 시각
+    """
+    seconds = INTERVAL_SECONDS[interval]
+    offset = INTERVAL_OFFSETS.get(interval, 0)
+    return (ts - offset) // seconds * seconds + offset
+
+
+def kst_epoch(dt):
+    """
+    KST 기준 naive datetime -> epoch 초 (pyupbit 인덱스 형식과 호환)
+    """
+    return int((dt - datetime(1970, 1, 1)).total_seconds())
+
+
+def read_index(path):
+    """
+    markets.json 읽기 (없거나 읽을 수 없으면 빈 딕셔너리)
+    """
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+class SharedArrayFile:
+    """
+    헤더 + 레코드 배열로 구성된 메모리 맵 파일
+    """
+
+    def __init__(self, path, dtype, length, writable=False, fresh=False):
+        """
+        :param writable: 쓰기용으로 열기 (파일이 없거나 크기가 다르면 새로 만듦)
+        :param fresh: 쓰기용일 때 기존 파일이 있어도 새로 만듦
+        """
+        self.path = path
+        size = HEADER_DTYPE.itemsize + dtype.itemsize * length
+        if writable and (fresh or not os.path.exists(path) or os.path.getsize(path) != size):
+            # 기존 파일을 제자리에서 자르면 매핑 중인 리더가 SIGBUS를 받으므로 임시 파일을 만든 뒤 교체
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            with open(path + '.tmp', 'wb') as f:
+                f.truncate(size)
+            os.replace(path + '.tmp', path)
+        self.mm = np.memmap(path, dtype=np.uint8, mode='r+' if writable else 'r')
+        self.header = np.ndarray((1,), dtype=HEADER_DTYPE, buffer=self.mm, offset=0)
+        self.data = np.ndarray((length,), dtype=dtype, buffer=self.mm, offset=HEADER_DTYPE.itemsize)
+
+    def begin_write(self):
+        self.header['seq'] += 1
+
+    def end_write(self):
+        self.header['updated_at'] = time.time()
+        self.header['seq'] += 1
+
+    def read_consistent(self, reader, retries=100):
+        """
+        seq 값이 읽기 전후 동일하고 짝수일 때의 결과 반환
+        """
+        for _ in range(retries):
+            before = int(self.header['seq'][0])
+            if before % 2 == 0:
+                result = reader()
+                if int(self.header['seq'][0]) == before:
+                    return result
+        return None
+
+
+class CandleRing(SharedArrayFile):
+    """
+    캔들 링 버퍼 (최근 capacity개 유지)
+    """
+
+    def __init__(self, path, capacity=None, writable=False):
+        if capacity is None:
+            # 리더: 헤더에서 용량을 읽음
+            header = np.fromfile(path, dtype=HEADER_DTYPE, count=1)
+            capacity = int(header['capacity'][0])
+        super().__init__(path, CANDLE_DTYPE, capacity * 2, writable)
+        self.capacity = capacity
+        if writable:
+            self.header['capacity'] = capacity
+
+    def last(self):
+        written = int(self.header['written'][0])
+        if written == 0:
+            return None
+        return self.data[(written - 1) % self.capacity]
+
+    def _put(self, index, record):
+        pos = index % self.capacity
+        self.data[pos] = record
+        self.data[pos + self.capacity] = record
+
+    def append(self, record):
+        self.begin_write()
+        written = int(self.header['written'][0])
+        self._put(written, record)
+        self.header['written'] = written + 1
+        self.end_write()
+
+    def replace_last(self, record):
+        self.begin_write()
+        self._put(int(self.header['written'][0]) - 1, record)
+        self.end_write()
+
+    def upsert(self, record):
+        """
+        마지막 캔들과 시작 시각이 같으면 갱신, 더 최근이면 추가 (과거 캔들은 무시)
+        """
+        last = self.last()
+        if last is not None and record[0] == last['ts']:
+            self.replace_last(record)
+        elif last is None or record[0] > last['ts']:
+            self.append(record)
+
+    def view(self, count):
+        """
+        최근 count개 캔들 복사본 (오래된 것 -> 최신 순)
+        seq 검사 구간 안에서 복사해야 데몬이 쓰는 도중의 캔들이 섞이지 않음
+        """
+        def reader():
+            written = int(self.header['written'][0])
+            n = min(count, written, self.capacity)
+            end = (written - 1) % self.capacity + self.capacity + 1 if written else 0
+            return self.data[end - n:end].copy()
+        return self.read_consistent(reader)
+
+
+class MarketDataDaemon:
+    """
+    WebSocket 1개 + REST 백필로 모든 KRW 마켓 시세를 공유 메모리에 게시
+    """
+
+    def __init__(self, data_dir=DEFAULT_DATA_DIR, intervals=None, capacity=2000,
+                 backfill_count=200, reconcile_interval=3600):
+        """
+        :param data_dir: 공유 파일 디렉토리 (/dev/shm 권장)
+        :param intervals: 유지할 캔들 간격 리스트 (기본값 ['day', 'minute60'])
+        :param capacity: 티커/간격별 링 버퍼 크기
+        :param backfill_count: 시작/재연결 시 REST로 채울 캔들 수
+        :param reconcile_interval: REST로 최근 캔들을 재동기화하는 주기 (초)
+        """
+        self.data_dir = data_dir
+        self.intervals = intervals or ['day', 'minute60']
+        self.capacity = capacity
+        self.backfill_count = backfill_count
+        self.reconcile_interval = reconcile_interval
+        self.tickers = []
+        self.slots = {}
+        self.generation = 0
+        self.prices = None
+        self.rings = {}
+
+    def setup(self):
+        self.tickers = pyupbit.get_tickers(fiat="KRW")
+        self.slots = {ticker: i for i, ticker in enumerate(self.tickers)}
+        index_path = os.path.join(self.data_dir, 'markets.json')
+        self.generation = read_index(index_path).get('generation', 0) + 1
+
+        # 슬롯 배치가 바뀌므로 현재가 파일은 항상 새로 만들고, markets.json은 모든 파일을 준비한 뒤 교체
+        self.prices = SharedArrayFile(os.path.join(self.data_dir, 'prices.bin'), PRICE_DTYPE,
+                                      len(self.tickers), writable=True, fresh=True)
+        self.prices.header['generation'] = self.generation
+        for ticker in self.tickers:
+            for interval in self.intervals:
+                path = os.path.join(self.data_dir, 'candles', f"{ticker}_{interval}.bin")
+                self.rings[(ticker, interval)] = CandleRing(path, self.capacity, writable=True)
+
+        with open(index_path + '.tmp', 'w') as f:
+            json.dump({'generation': self.generation, 'slots': self.slots}, f)
+        os.replace(index_path + '.tmp', index_path)
+
+    def backfill(self, count=None):
+        """
+        REST로 최근 캔들을 채움 (시작 시, 재연결 시, 주기적 재동기화)
+        """
+        count = count or self.backfill_count
+        for ticker in self.tickers:
+            for interval in self.intervals:
+                df = pyupbit.get_ohlcv(ticker, interval=interval, count=count)
+                if df is None or df.empty:
+                    continue
+                ring = self.rings[(ticker, interval)]
+                last = ring.last()
+                for ts, row in zip(df.index, df.itertuples(index=False)):
+                    record = (kst_epoch(ts.to_pydatetime()), row.open, row.high, row.low,
+                              row.close, row.volume, row.value)
+                    # 링 버퍼에 이미 있는 과거 캔들은 건너뛰고 마지막 캔들부터 갱신
+                    if last is None or record[0] >= last['ts']:
+                        ring.upsert(record)
+                time.sleep(0.1)  # API 호출 제한 방지
+
+    def on_ticker(self, message):
+        ticker = message.get('code')
+        slot = self.slots.get(ticker)
+        if slot is None:
+            return
+        price = message['trade_price']
+        ts = message['trade_timestamp'] // 1000 + DAY_OFFSET  # UTC ms -> KST epoch 초
+        volume = message.get('trade_volume', 0)
+
+        self.prices.begin_write()
+        self.prices.data[slot] = (ts, price)
+        self.prices.end_write()
+
+        for interval in self.intervals:
+            ring = self.rings[(ticker, interval)]
+            start = bucket_start(ts, interval)
+            last = ring.last()
+            if last is not None and last['ts'] == start:
+                ring.replace_last((start, last['open'], max(last['high'], price), min(last['low'], price),
+                                   price, last['volume'] + volume, last['value'] + volume * price))
+            elif last is None or start > last['ts']:
+                ring.append((start, price, price, price, price, volume, volume * price))
+
+    async def stream(self):
+        import websockets
+
+        uri = "wss://api.upbit.com/websocket/v1"
+        async for websocket in websockets.connect(uri, ping_interval=60):
+            try:
+                await websocket.send(json.dumps([
+                    {"ticket": str(uuid.uuid4())[:6]},
+                    {"type": "ticker", "codes": self.tickers, "isOnlyRealtime": True}
+                ]))
+                while True:
+                    message = json.loads(await websocket.recv())
+                    self.on_ticker(message)
+            except websockets.ConnectionClosed:
+                print("[MarketDataDaemon] WebSocket 연결 끊김, 재연결 후 백필")
+                await asyncio.to_thread(self.backfill, 3)
+                continue
+
+    async def heartbeat(self):
+        # 거래가 없어도 데몬 생존 여부를 리더가 알 수 있도록 주기적으로 갱신
+        while True:
+            self.prices.header['updated_at'] = time.time()
+            await asyncio.sleep(1)
+
+    async def reconcile(self):
+        while True:
+            await asyncio.sleep(self.reconcile_interval)
+            await asyncio.to_thread(self.backfill, 3)
+
+    async def main(self):
+        await asyncio.gather(self.stream(), self.heartbeat(), self.reconcile())
+
+    def run(self):
+        self.setup()
+        print(f"[MarketDataDaemon] {len(self.tickers)}개 마켓 백필 시작 ({self.data_dir})")
+        self.backfill()
+        print("[MarketDataDaemon] 백필 완료, 실시간 수신 시작")
+        asyncio.run(self.main())
+
+
+class MarketDataClient:
+    """
+    데몬이 게시한 시세를 네트워크 요청 없이 읽는 클라이언트
+    데몬이 없거나 데이터가 오래되었으면 None을 반환하므로 호출 측에서 REST로 대체
+    """
+
+    def __init__(self, data_dir=DEFAULT_DATA_DIR, max_staleness=10):
+        """
+        :param data_dir: 데몬과 동일한 공유 파일 디렉토리
+        :param max_staleness: 데몬 하트비트가 이 시간(초)보다 오래되면 사용하지 않음
+        """
+        self.data_dir = data_dir
+        self.max_staleness = max_staleness
+        self.index_stat = None
+        self.slots = None
+        self.prices = None
+        self.rings = {}
+
+    def _open(self):
+        """
+        markets.json이 바뀌었으면(데몬 재시작) 슬롯/현재가 파일/캔들 파일을 다시 열기
+        """
+        index_path = os.path.join(self.data_dir, 'markets.json')
+        try:
+            stat = os.stat(index_path)
+        except OSError:
+            return False
+        index_stat = (stat.st_ino, stat.st_mtime_ns)
+        if self.prices is not None and index_stat == self.index_stat:
+            return True
+
+        self.index_stat, self.slots, self.prices, self.rings = None, None, None, {}
+        index = read_index(index_path)
+        if 'slots' not in index:
+            return False
+        try:
+            prices = SharedArrayFile(os.path.join(self.data_dir, 'prices.bin'), PRICE_DTYPE, len(index['slots']))
+        except (OSError, ValueError, TypeError):
+            return False
+        if int(prices.header['generation'][0]) != index['generation']:
+            return False  # 데몬이 파일을 다시 만드는 중
+        self.index_stat, self.slots, self.prices = index_stat, index['slots'], prices
+        return True
+
+    def is_alive(self):
+        if not self._open():
+            return False
+        return time.time() - float(self.prices.header['updated_at'][0]) < self.max_staleness
+
+    def get_current_price(self, ticker):
+        """
+        :param ticker: 티커 또는 티커 리스트
+        :return: 현재가 (리스트면 {티커: 현재가}), 사용할 수 없으면 None
+        """
+        if not self.is_alive():
+            return None
+        tickers = [ticker] if isinstance(ticker, str) else list(ticker)
+        if any(t not in self.slots for t in tickers):
+            return None
+        slots = [self.slots[t] for t in tickers]
+        prices = self.prices.read_consistent(lambda: self.prices.data['price'][slots].copy())
+        if prices is None or (prices <= 0).any():
+            return None
+        if isinstance(ticker, str):
+            return float(prices[0])
+        return dict(zip(tickers, prices.tolist()))
+
+    def get_candles(self, ticker, interval="day", count=200):
+        """
+        최근 count개 캔들의 numpy 구조체 배열 (일관된 복사본), 부족하거나 사용할 수 없으면 None
+        """
+        if not self.is_alive():
+            return None
+        ring = self.rings.get((ticker, interval))
+        if ring is None:
+            path = os.path.join(self.data_dir, 'candles', f"{ticker}_{interval}.bin")
+            if not os.path.exists(path):
+                return None
+            ring = self.rings[(ticker, interval)] = CandleRing(path)
+        candles = ring.view(count)
+        if candles is None or len(candles) < count:
+            return None
+        return candles
+
+    def get_ohlcv(self, ticker, interval="day", count=200):
+        """
+        pyupbit.get_ohlcv와 같은 형식의 DataFrame, 사용할 수 없으면 None
+        """
+        candles = self.get_candles(ticker, interval, count)
+        if candles is None:
+            return None
+        return self.to_dataframe(candles)
+
+    def get_ohlcv_range(self, ticker, interval, start, end):
+        """
+        start ~ end(KST naive datetime) 구간 캔들 DataFrame, 링 버퍼가 구간 시작을 포함하지 않으면 None
+        """
+        if self.get_candles(ticker, interval, 1) is None:
+            return None
+        start_ts, end_ts = kst_epoch(start), kst_epoch(end)
+        if interval == 'day':
+            # 일봉은 날짜 단위로 비교 (해당 날짜 09:00 캔들 포함)
+            start_ts = start_ts // 86400 * 86400 + DAY_OFFSET
+            end_ts = end_ts // 86400 * 86400 + DAY_OFFSET
+        ring = self.rings[(ticker, interval)]
+        candles = ring.view(ring.capacity)
+        if candles is None or len(candles) == 0 or candles['ts'][0] > start_ts:
+            return None
+        mask = (candles['ts'] >= start_ts) & (candles['ts'] <= end_ts)
+        return self.to_dataframe(candles[mask])
+
+    @staticmethod
+    def to_dataframe(candles):
+        import pandas as pd
+
+        df = pd.DataFrame({name: candles[name] for name in ('open', 'high', 'low', 'close', 'volume', 'value')},
+                          index=pd.to_datetime(candles['ts'], unit='s'))
+        return df
+
+
+if __name__ == "__main__":
+    with open('config.json', 'r') as f:
+        market_data_config = json.load(f).get('market_data', {})
+    MarketDataDaemon(
+        data_dir=market_data_config.get('data_dir', DEFAULT_DATA_DIR),
+        intervals=market_data_config.get('intervals'),
+        capacity=market_data_config.get('capacity', 2000),
+        backfill_count=market_data_config.get('backfill_count', 200)
+    ).run()
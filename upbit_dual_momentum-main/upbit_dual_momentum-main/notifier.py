@@ -0,0 +1,64 @@
+import queue
+import threading
+
+import requests
+
+
+class TelegramNotifier:
+    """
+    텔레그램 메시지를 백그라운드 스레드에서 순서대로 전송
+    (메시지 전송이 매매 루프의 네트워크 지연에 포함되지 않도록 함)
+    """
+
+    def __init__(self, bot_token, chat_id, background=True, timeout=10):
+        """
+        :param bot_token: 텔레그램 봇 토큰
+        :param chat_id: 채널/채팅 ID
+        :param background: True면 큐에 넣고 즉시 반환, False면 호출 시점에 바로 전송
+        :param timeout: 전송 요청 제한 시간 (초, None이면 제한 없음)
+        """
+        self.bot_token = bot_token
+        self.chat_id = chat_id
+        self.background = background
+        self.timeout = timeout
+        self.queue = queue.Queue()
+        self.worker = None
+        if background:
+            self.worker = threading.Thread(target=self._worker, name="telegram-notifier", daemon=True)
+            self.worker.start()
+
+    def send(self, message):
+        if self.background:
+            self.queue.put(message)
+        else:
+            self.send_now(message)
+
+    def send_now(self, message):
+        try:
+            response = requests.post(
+                f"https://api.telegram.org/bot{self.bot_token}/sendMessage",
+                json={"chat_id": self.chat_id, "text": message, "parse_mode": "HTML"},
+                timeout=self.timeout
+            )
+            if not response.ok:
+                print(f"텔레그램 메시지 전송 실패: {response.text}")
+        except Exception as e:
+            print(f"텔레그램 메시지 전송 중 오류 발생: {e}")
+
+    def flush(self, timeout=5):
+        """
+        대기 중인 메시지가 모두 전송될 때까지 최대 timeout초 대기 (종료 직전 호출)
+        """
+        if not self.background:
+            return
+        done = threading.Event()
+        self.queue.put(done)
+        done.wait(timeout)
+
+    def _worker(self):
+        while True:
+            item = self.queue.get()
+            if isinstance(item, threading.Event):
+                item.set()
+            else:
+                self.send_now(item)
@@ -0,0 +1,372 @@
+import asyncio
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+
+PRIVATE_WEBSOCKET_URI = "wss://api.upbit.com/websocket/v1/private"
+FINAL_STATES = ('done', 'cancel')  # 시장가 매수는 잔량이 남으면 체결 후 cancel로 끝남
+
+
+class OrderRejected(Exception):
+    """
+    거래소가 주문을 거부했거나(잔고 부족 등) 한 건도 체결되지 않고 끝난 주문
+    """
+
+    def __init__(self, name, message):
+        super().__init__(f"{name}: {message}")
+        self.name = name
+        self.message = message
+
+
+def order_timestamp(order):
+    """
+    주문의 마지막 체결 시각 (ms, 알 수 없으면 None)
+    - 웹소켓 myOrder 메시지는 trade_timestamp, REST 주문은 trades[].created_at 또는 created_at 사용
+    """
+    if order.get('trade_timestamp'):
+        return order['trade_timestamp']
+    times = [trade.get('created_at') for trade in order.get('trades') or []] or [order.get('created_at')]
+    times = [t for t in times if t]
+    if not times:
+        return None
+    try:
+        return max(datetime.fromisoformat(t).timestamp() for t in times) * 1000
+    except ValueError:
+        return None
+
+
+class OrderTracker:
+    """
+    주문 체결 확인과 계좌 캐시
+    - 업비트 전용(private) 웹소켓 myOrder/myAsset 구독으로 체결/잔고 변경을 즉시 반영
+    - 웹소켓이 끊겼거나 사용하지 않으면 REST get_order 폴링으로 체결 확인
+    - 체결된 주문을 계좌 캐시에 반영하므로 매매 후 get_balances를 다시 조회하지 않음
+      (REST 잔고 조회는 시작 시, 재연결 시, reconcile_interval마다 1회)
+    """
+
+    def __init__(self, upbit, access_key=None, secret_key=None, stream=True, confirm_timeout=10,
+                 poll_interval=0.5, reconcile_interval=300, max_orders=1000, clock=None):
+        """
+        :param upbit: 주문/잔고 객체 (REST 폴백용 get_order/get_balances)
+        :param access_key: 업비트 API access key (없으면 웹소켓 사용 안 함)
+        :param secret_key: 업비트 API secret key
+        :param stream: 전용 웹소켓 사용 여부
+        :param confirm_timeout: 주문 체결 확인 최대 대기 시간 (초)
+        :param poll_interval: 웹소켓이 없을 때 REST 폴링 간격 (초)
+        :param reconcile_interval: REST 잔고 재조회 주기 (초, 입출금 등 주문 외 변경 반영)
+        :param max_orders: 보관할 웹소켓 주문 상태/반영한 주문 uuid 최대 개수 (오래된 것부터 삭제)
+        :param clock: time/sleep을 제공하는 시계 (기본값 time 모듈)
+        """
+        self.upbit = upbit
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.stream = stream and bool(access_key and secret_key)
+        self.confirm_timeout = confirm_timeout
+        self.poll_interval = poll_interval
+        self.reconcile_interval = reconcile_interval
+        self.max_orders = max_orders
+        self.clock = clock or time
+        self.condition = threading.Condition()
+        self.live = False
+        self.orders = OrderedDict()   # uuid -> 웹소켓으로 받은 최신 주문 상태
+        self.applied = OrderedDict()  # 계좌 캐시에 반영한 주문 uuid -> None
+        self.account = None           # 화폐 -> {'balance', 'locked', 'avg_buy_price'}
+        self.asset_timestamps = {}    # 화폐 -> 마지막 myAsset 시각 (ms)
+        self.loaded_at = None
+        self.thread = None
+
+    def auth_headers(self):
+        import jwt
+
+        token = jwt.encode({'access_key': self.access_key, 'nonce': str(uuid.uuid4())},
+                           self.secret_key, algorithm="HS256")
+        return {'Authorization': f"Bearer {token}"}
+
+    # ---------- 계좌 캐시 ----------
+
+    def reload(self):
+        """
+        REST로 전체 잔고를 다시 읽어 캐시 교체
+        """
+        balances = self.upbit.get_balances()
+        with self.condition:
+            self.account = {
+                item['currency']: {
+                    'balance': float(item['balance']),
+                    'locked': float(item.get('locked', 0)),
+                    'avg_buy_price': float(item.get('avg_buy_price', 0))
+                }
+                for item in balances
+            }
+            self.loaded_at = self.clock.time()
+
+    def invalidate(self):
+        """
+        다음 조회 때 REST로 다시 읽도록 캐시 무효화
+        """
+        with self.condition:
+            self.loaded_at = None
+
+    def _ensure_loaded(self):
+        if self.loaded_at is None or self.clock.time() - self.loaded_at >= self.reconcile_interval:
+            self.reload()
+
+    def get_balances(self):
+        """
+        pyupbit.Upbit.get_balances()와 같은 형식의 잔고 목록 (캐시)
+        """
+        self._ensure_loaded()
+        with self.condition:
+            return [
+                {
+                    'currency': currency,
+                    'balance': str(item['balance']),
+                    'locked': str(item['locked']),
+                    'avg_buy_price': str(item['avg_buy_price']),
+                    'unit_currency': 'KRW'
+                }
+                for currency, item in self.account.items()
+                if currency == 'KRW' or item['balance'] > 0 or item['locked'] > 0
+            ]
+
+    def get_balance(self, ticker="KRW"):
+        self._ensure_loaded()
+        with self.condition:
+            return self.account.get(ticker.split('-')[-1], {}).get('balance', 0.0)
+
+    def get_avg_buy_price(self, ticker="KRW"):
+        self._ensure_loaded()
+        with self.condition:
+            return self.account.get(ticker.split('-')[-1], {}).get('avg_buy_price', 0.0)
+
+    def _apply_order(self, order):
+        """
+        체결된 주문을 계좌 캐시에 반영 (주문당 1회)
+        myAsset이 이미 체결 이후 잔고를 보냈으면 해당 화폐 잔고는 그대로 두고 평균 매수가만 갱신
+        """
+        if self.account is None or order['uuid'] in self.applied:
+            return
+        self._remember(self.applied, order['uuid'], None)
+        quote, base = order['market'].split('-', 1)
+        volume = float(order.get('executed_volume') or 0)
+        funds = float(order.get('executed_funds') or 0)
+        fee = float(order.get('paid_fee') or 0)
+        timestamp = order_timestamp(order)
+
+        def reflected(currency):
+            return timestamp is not None and self.asset_timestamps.get(currency, 0) >= timestamp
+
+        holding = self.account.setdefault(base, {'balance': 0.0, 'locked': 0.0, 'avg_buy_price': 0.0})
+        cash = self.account.setdefault(quote, {'balance': 0.0, 'locked': 0.0, 'avg_buy_price': 0.0})
+        if order['side'] == 'bid':
+            before = holding['balance'] - volume if reflected(base) else holding['balance']
+            if not reflected(base):
+                holding['balance'] += volume
+            if before + volume > 0:
+                holding['avg_buy_price'] = (max(before, 0.0) * holding['avg_buy_price'] + funds) / (max(before, 0.0) + volume)
+            if not reflected(quote):
+                cash['balance'] -= funds + fee
+        else:
+            if not reflected(base):
+                holding['balance'] = max(holding['balance'] - volume, 0.0)
+            if holding['balance'] <= 0:
+                holding['avg_buy_price'] = 0.0
+            if not reflected(quote):
+                cash['balance'] += funds - fee
+
+    def _remember(self, entries, key, value):
+        """
+        최근 max_orders개만 보관 (수동 주문 등 아무도 기다리지 않는 주문 상태가 계속 쌓이지 않도록 오래된 것부터 삭제)
+        """
+        entries[key] = value
+        entries.move_to_end(key)
+        while len(entries) > self.max_orders:
+            entries.popitem(last=False)
+
+    # ---------- 체결 확인 ----------
+
+    def _fetch_order(self, order_uuid):
+        try:
+            order = self.upbit.get_order(order_uuid)
+        except Exception as e:
+            print(f"[OrderTracker] {order_uuid} 주문 조회 실패: {e}")
+            return None
+        if order and order.get('executed_funds') is None and order.get('trades'):
+            # 체결 총액이 없는 응답은 체결 내역 합계로 채움
+            order['executed_funds'] = sum(float(trade['funds']) for trade in order['trades'])
+        return order
+
+    def confirm(self, order, timeout=None):
+        """
+        주문 응답을 받아 체결이 끝날 때까지 대기하고 계좌 캐시에 반영
+        :param order: buy_market_order/sell_market_order 반환값 (pyupbit는 실패 시 None)
+        :param timeout: 최대 대기 시간 (초, 기본값 confirm_timeout)
+        :return: 최종 주문 (executed_volume/executed_funds/paid_fee 포함)
+        :raises OrderRejected: 주문 거부 또는 체결 없이 종료
+        :raises TimeoutError: 제한 시간 내 체결 확인 실패 (계좌 캐시는 다음 조회 때 REST로 갱신)
+        """
+        if not order:
+            raise OrderRejected('no_response', "주문 응답 없음 (잔고 부족 등으로 거래소가 거부)")
+        if 'error' in order:
+            error = order['error']
+            raise OrderRejected(error.get('name', 'error'), error.get('message', ''))
+
+        order_uuid = order['uuid']
+        final = order if order.get('state') in FINAL_STATES else None
+        deadline = self.clock.time() + (self.confirm_timeout if timeout is None else timeout)
+        while final is None:
+            with self.condition:
+                pushed = self.orders.get(order_uuid)
+                if pushed is not None and pushed['state'] in FINAL_STATES:
+                    final = pushed
+                    break
+                live = self.live
+                if live:
+                    self.condition.wait(min(self.poll_interval, max(deadline - self.clock.time(), 0)))
+            if not live:
+                polled = self._fetch_order(order_uuid)
+                if polled and polled.get('state') in FINAL_STATES:
+                    final = polled
+                    break
+            if self.clock.time() >= deadline:
+                # 마지막으로 REST 확인 후 포기
+                polled = self._fetch_order(order_uuid)
+                if polled and polled.get('state') in FINAL_STATES:
+                    final = polled
+                    break
+                with self.condition:
+                    self.orders.pop(order_uuid, None)
+                self.invalidate()
+                raise TimeoutError(f"{order.get('market', order_uuid)} 주문 체결 확인 시간 초과 ({order_uuid})")
+            if not live:
+                self.clock.sleep(self.poll_interval)
+
+        with self.condition:
+            self.orders.pop(order_uuid, None)
+        if float(final.get('executed_volume') or 0) <= 0:
+            raise OrderRejected(final['state'], f"{final.get('market', order_uuid)} 체결 없이 주문 종료")
+        with self.condition:
+            self._apply_order(final)
+        return final
+
+    def reconcile(self, ticker, side, before, timeout=None):
+        """
+        주문 호출이 제한 시간을 넘겨 응답(uuid)을 받지 못한 주문의 체결 여부를 REST 잔고 변화로 확인
+        (버려진 작업 스레드의 주문이 거래소에 들어가 체결되었을 수 있음)
+        :param ticker: 주문 마켓 (예: "KRW-BTC")
+        :param side: 'bid' 또는 'ask'
+        :param before: 주문 전 (코인 수량, 호가 통화 잔고)
+        :param timeout: 잔고 변화를 기다릴 최대 시간 (초, 기본값 confirm_timeout)
+        :return: 잔고 변화로 만든 주문 (executed_funds는 수수료 포함), 체결이 확인되지 않으면 None
+        """
+        quote, base = ticker.split('-', 1)
+        deadline = self.clock.time() + (self.confirm_timeout if timeout is None else timeout)
+        while True:
+            volume = funds = 0.0
+            try:
+                self.reload()
+                with self.condition:
+                    volume = self.account.get(base, {}).get('balance', 0.0) - before[0]
+                    funds = self.account.get(quote, {}).get('balance', 0.0) - before[1]
+            except Exception as e:
+                print(f"[OrderTracker] {ticker} 잔고 조회 실패: {e}")
+            if (side == 'bid' and volume > 0) or (side == 'ask' and volume < 0):
+                return {
+                    'uuid': None,
+                    'market': ticker,
+                    'side': side,
+                    'state': 'done',
+                    'executed_volume': str(abs(volume)),
+                    'executed_funds': str(abs(funds)),
+                    'paid_fee': '0'
+                }
+            if self.clock.time() >= deadline:
+                return None
+            self.clock.sleep(self.poll_interval)
+
+    # ---------- 전용 웹소켓 ----------
+
+    def on_message(self, message):
+        if message.get('type') == 'myOrder':
+            self.on_order(message)
+        elif message.get('type') == 'myAsset':
+            self.on_asset(message)
+
+    def on_order(self, message):
+        """
+        myOrder 메시지를 REST 주문 형식으로 저장 (executed_* 는 주문 누적값)
+        """
+        order = {
+            'uuid': message['uuid'],
+            'market': message['code'],
+            'side': message['ask_bid'].lower(),
+            'ord_type': message.get('order_type'),
+            'state': message['state'],
+            'executed_volume': message.get('executed_volume', 0),
+            'executed_funds': message.get('executed_funds', 0),
+            'paid_fee': message.get('paid_fee', 0),
+            'trades_count': message.get('trades_count', 0),
+            'trade_timestamp': message.get('trade_timestamp')
+        }
+        with self.condition:
+            self._remember(self.orders, order['uuid'], order)
+            self.condition.notify_all()
+
+    def on_asset(self, message):
+        """
+        myAsset 메시지의 잔고로 캐시 갱신 (평균 매수가는 체결 반영 또는 REST 재조회로 갱신)
+        """
+        timestamp = message.get('asset_timestamp') or message.get('timestamp') or 0
+        with self.condition:
+            if self.account is None:
+                return
+            for asset in message.get('assets', []):
+                item = self.account.setdefault(asset['currency'], {'balance': 0.0, 'locked': 0.0, 'avg_buy_price': 0.0})
+                item['balance'] = float(asset['balance'])
+                item['locked'] = float(asset['locked'])
+                if item['balance'] <= 0 and item['locked'] <= 0:
+                    item['avg_buy_price'] = 0.0
+                self.asset_timestamps[asset['currency']] = timestamp
+            self.condition.notify_all()
+
+    def _set_live(self, live):
+        with self.condition:
+            self.live = live
+            self.condition.notify_all()
+
+    async def run_stream(self):
+        import websockets
+
+        delay = 1
+        while True:
+            try:
+                async with websockets.connect(PRIVATE_WEBSOCKET_URI, additional_headers=self.auth_headers(),
+                                              ping_interval=60) as websocket:
+                    await websocket.send(json.dumps([
+                        {"ticket": str(uuid.uuid4())[:6]},
+                        {"type": "myOrder"},
+                        {"type": "myAsset"}
+                    ]))
+                    # 끊겨 있는 동안의 변경은 REST로 다시 읽음
+                    self.invalidate()
+                    self._set_live(True)
+                    delay = 1
+                    while True:
+                        self.on_message(json.loads(await websocket.recv()))
+            except Exception as e:
+                print(f"[OrderTracker] 전용 웹소켓 연결 끊김 ({e}), {delay}초 후 재연결 (REST 폴링 사용)")
+            self._set_live(False)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 60)
+
+    def start(self):
+        """
+        전용 웹소켓 구독 스레드 시작 (stream=False면 REST 폴링만 사용)
+        """
+        if not self.stream or self.thread is not None:
+            return
+        self.thread = threading.Thread(target=lambda: asyncio.run(self.run_stream()), daemon=True)
+        self.thread.start()
@@ -0,0 +1,184 @@
+import json
+import math
+import time
+
+import pyupbit
+
+
+class OrderbookDepthCache:
+    """
+    후보 코인들의 호가를 한 번의 요청으로 조회해 짧게 캐시하고,
+    시장가 매수 시 예상 체결가와 가격 영향(impact)을 추정
+    """
+
+    def __init__(self, ttl=10, max_impact=1.0, min_order=5000, max_splits=1, fetcher=None, clock=None):
+        """
+        :param ttl: 호가 캐시 유지 시간 (초)
+        :param max_impact: 허용 가능한 최대 가격 영향 (%, 중간가 대비 평균 체결가)
+        :param min_order: 최소 주문 금액 (원)
+        :param max_splits: 가격 영향 초과 시 최대 분할 주문 횟수 (1이면 분할 대신 주문 축소)
+        :param fetcher: 호가 조회 함수 (기본값 pyupbit.get_orderbook, 기록된 호가로 대체 가능)
+        :param clock: time()을 제공하는 시계 (기본값 time 모듈)
+        """
+        self.ttl = ttl
+        self.max_impact = max_impact
+        self.min_order = min_order
+        self.max_splits = max(int(max_splits), 1)
+        self.fetcher = fetcher or pyupbit.get_orderbook
+        self.clock = clock or time
+        self.snapshots = {}
+        self.fetched_at = {}
+
+    @classmethod
+    def from_fixture(cls, path, **kwargs):
+        """
+        기록된 호가 파일(get_orderbook 응답 형식의 JSON)로 캐시 생성
+        :param path: 호가 기록 파일 경로
+        :return: 네트워크 요청 없이 기록된 호가만 사용하는 OrderbookDepthCache
+        """
+        with open(path, 'r') as f:
+            recorded = json.load(f)
+        kwargs.setdefault('ttl', math.inf)
+        cache = cls(fetcher=lambda tickers: [ob for ob in recorded if ob['market'] in tickers], **kwargs)
+        cache.update(recorded)
+        return cache
+
+    def save_snapshots(self, path):
+        """
+        현재 캐시된 호가를 get_orderbook 응답 형식으로 저장 (테스트용 기록)
+        """
+        with open(path, 'w') as f:
+            json.dump(list(self.snapshots.values()), f, indent=4)
+
+    def is_fresh(self, ticker):
+        fetched_at = self.fetched_at.get(ticker)
+        return fetched_at is not None and self.clock.time() - fetched_at < self.ttl
+
+    def prefetch(self, tickers):
+        """
+        캐시에 없거나 만료된 티커의 호가를 한 번의 요청으로 조회
+        :param tickers: 티커 리스트
+        :return: 이번 조회 시점에 유효한 호가의 기준 시각 (plan_buy의 as_of로 전달하면 리밸런싱 동안 재사용)
+        """
+        as_of = self.clock.time() - self.ttl
+        missing = [ticker for ticker in tickers if not self.is_fresh(ticker)]
+        if not missing:
+            return as_of
+        try:
+            orderbooks = self.fetcher(missing)
+        except Exception as e:
+            print(f"[OrderbookDepthCache] 호가 조회 실패: {e}")
+            return as_of
+        if isinstance(orderbooks, dict):
+            orderbooks = [orderbooks]
+        self.update(orderbooks or [])
+        return as_of
+
+    def update(self, orderbooks):
+        now = self.clock.time()
+        for orderbook in orderbooks:
+            self.snapshots[orderbook['market']] = orderbook
+            self.fetched_at[orderbook['market']] = now
+
+    def get(self, ticker, as_of=None):
+        """
+        캐시된 호가 반환 (만료되었거나 없으면 None, 추가 요청은 하지 않음)
+        :param as_of: 이 시각 이후 조회한 호가는 ttl이 지나도 반환 (prefetch 반환값)
+        """
+        fetched_at = self.fetched_at.get(ticker)
+        if self.is_fresh(ticker) or (as_of is not None and fetched_at is not None and fetched_at >= as_of):
+            return self.snapshots.get(ticker)
+        return None
+
+    def estimate_buy(self, ticker, invest, as_of=None):
+        """
+        시장가 매수 시 예상 체결 결과 추정
+        :param ticker: 티커
+        :param invest: 투자 금액 (원)
+        :param as_of: get()과 동일
+        :return: {'avg_price', 'mid_price', 'impact', 'volume', 'filled'} 또는 호가가 없으면 None
+        """
+        orderbook = self.get(ticker, as_of)
+        if not orderbook or not orderbook.get('orderbook_units'):
+            return None
+
+        units = orderbook['orderbook_units']
+        mid_price = (units[0]['ask_price'] + units[0]['bid_price']) / 2
+        remaining = invest
+        volume = 0.0
+        for unit in units:
+            level_cost = unit['ask_price'] * unit['ask_size']
+            take = min(remaining, level_cost)
+            volume += take / unit['ask_price']
+            remaining -= take
+            if remaining <= 0:
+                break
+
+        filled = remaining <= 0
+        avg_price = (invest - remaining) / volume if volume > 0 else math.inf
+        # 호가 깊이를 넘어서는 주문은 영향을 추정할 수 없으므로 무한대로 취급
+        impact = (avg_price / mid_price - 1) * 100 if filled else math.inf
+        return {
+            'avg_price': avg_price,
+            'mid_price': mid_price,
+            'impact': impact,
+            'volume': volume,
+            'filled': filled
+        }
+
+    def max_invest_within_impact(self, ticker, as_of=None):
+        """
+        평균 체결가가 허용 가격 영향 이내로 유지되는 최대 투자 금액 계산
+        :param as_of: get()과 동일
+        :return: 최대 투자 금액 (원), 호가가 없으면 0
+        """
+        orderbook = self.get(ticker, as_of)
+        if not orderbook or not orderbook.get('orderbook_units'):
+            return 0
+
+        units = orderbook['orderbook_units']
+        mid_price = (units[0]['ask_price'] + units[0]['bid_price']) / 2
+        limit_price = mid_price * (1 + self.max_impact / 100)
+        cost = 0.0
+        volume = 0.0
+        for unit in units:
+            price, size = unit['ask_price'], unit['ask_size']
+            if price <= limit_price:
+                cost += price * size
+                volume += size
+                continue
+            # (cost + price * x) / (volume + x) <= limit_price 를 만족하는 최대 수량 x
+            x = min(size, max((limit_price * volume - cost) / (price - limit_price), 0))
+            cost += price * x
+            break
+        return cost
+
+    def plan_buy(self, ticker, invest, as_of=None):
+        """
+        가격 영향을 고려한 매수 주문 계획 (추가 호가 요청 없음)
+        - 사용할 수 있는 호가가 없으면 매수 건너뜀
+        - 영향이 허용치 이내이면 그대로 주문
+        - 초과하면 max_splits 이내로 분할하거나, 분할이 불가능하면 허용치 이내 금액으로 축소
+        - 축소 금액이 최소 주문 금액 미만이면 매수 건너뜀
+        :param ticker: 티커
+        :param invest: 계획된 투자 금액 (원)
+        :param as_of: 리밸런싱 시작 시 prefetch 반환값 (주문 체결을 기다리는 동안 ttl이 지나도 같은 호가 사용)
+        :return: (주문 금액 리스트, 판단에 사용한 estimate_buy 결과) - 빈 리스트이면 매수 건너뜀,
+                 호가가 없으면 estimate는 None
+        """
+        estimate = self.estimate_buy(ticker, invest, as_of)
+        if estimate is None:
+            # 호가 없이 가격 영향을 확인할 수 없는 주문은 보내지 않음
+            return [], None
+        if estimate['impact'] <= self.max_impact:
+            return [invest], estimate
+
+        capacity = self.max_invest_within_impact(ticker, as_of)
+        if capacity < self.min_order:
+            return [], estimate
+
+        splits = min(self.max_splits, math.ceil(invest / capacity))
+        chunk = int(min(invest / splits, capacity))
+        if chunk < self.min_order:
+            return [], estimate
+        return [chunk] * splits, estimate
@@ -0,0 +1,170 @@
+import json
+import os
+import uuid
+from datetime import datetime
+
+from orderbook import OrderbookDepthCache
+
+
+class PaperUpbit:
+    """
+    pyupbit.Upbit 대신 사용하는 모의 거래소
+    - 시장가 주문을 실시간(또는 기록된) 호가에 맞춰 체결하고 수수료를 반영
+    - 가상 잔고를 파일에 저장하여 재시작 후에도 유지
+    """
+
+    MIN_ORDER = 5000
+
+    def __init__(self, account_file='paper_account.json', initial_krw=1_000_000, fee=0.0005,
+                 orderbook_file=None, orderbook_cache=None):
+        """
+        :param account_file: 가상 잔고 저장 파일
+        :param initial_krw: 잔고 파일이 없을 때의 초기 원화 잔고
+        :param fee: 거래 수수료율 (업비트 KRW 마켓 0.05%)
+        :param orderbook_file: 기록된 호가 파일 (None이면 실시간 호가 조회)
+        :param orderbook_cache: 호가 조회에 사용할 OrderbookDepthCache (지정 시 orderbook_file 무시)
+        """
+        self.account_file = account_file
+        self.fee = fee
+        if orderbook_cache is not None:
+            self.orderbook_cache = orderbook_cache
+        elif orderbook_file:
+            self.orderbook_cache = OrderbookDepthCache.from_fixture(orderbook_file)
+        else:
+            self.orderbook_cache = OrderbookDepthCache(ttl=1)
+        self.balances = {'KRW': {'balance': float(initial_krw), 'avg_buy_price': 0.0}}
+        self.load_account()
+
+    def load_account(self):
+        if not os.path.exists(self.account_file):
+            return
+        try:
+            with open(self.account_file, 'r') as f:
+                self.balances = json.load(f)['balances']
+        except Exception as e:
+            print(f"[PaperUpbit] 가상 잔고 로드 실패, 초기 잔고 사용: {e}")
+
+    def save_account(self):
+        tmp_path = self.account_file + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'balances': self.balances}, f, indent=4)
+        os.replace(tmp_path, self.account_file)
+
+    @staticmethod
+    def _currency(ticker):
+        # pyupbit와 동일하게 "KRW-BTC", "BTC" 모두 허용
+        return ticker.split('-')[1] if '-' in ticker else ticker
+
+    def get_balances(self):
+        return [
+            {
+                'currency': currency,
+                'balance': str(item['balance']),
+                'locked': '0',
+                'avg_buy_price': str(item['avg_buy_price']),
+                'avg_buy_price_modified': False,
+                'unit_currency': 'KRW'
+            }
+            for currency, item in self.balances.items()
+            if currency == 'KRW' or item['balance'] > 0
+        ]
+
+    def get_balance(self, ticker="KRW"):
+        return self.balances.get(self._currency(ticker), {}).get('balance', 0.0)
+
+    def get_avg_buy_price(self, ticker="KRW"):
+        return self.balances.get(self._currency(ticker), {}).get('avg_buy_price', 0.0)
+
+    def _orderbook_units(self, ticker):
+        self.orderbook_cache.prefetch([ticker])
+        orderbook = self.orderbook_cache.get(ticker)
+        return orderbook['orderbook_units'] if orderbook else None
+
+    @staticmethod
+    def _error(name, message):
+        return {'error': {'name': name, 'message': message}}
+
+    def _order(self, ticker, side, ord_type, executed_volume, executed_funds, paid_fee, **extra):
+        order = {
+            'uuid': str(uuid.uuid4()),
+            'side': side,
+            'ord_type': ord_type,
+            'state': 'done',
+            'market': ticker,
+            'created_at': datetime.now().isoformat(),
+            'executed_volume': str(executed_volume),
+            'executed_funds': str(executed_funds),
+            'paid_fee': str(paid_fee),
+            'trades_count': 1
+        }
+        order.update(extra)
+        return order
+
+    def buy_market_order(self, ticker, price):
+        """
+        시장가 매수: price(원)만큼 매도 호가를 위에서부터 소진하여 체결
+        """
+        krw = self.balances['KRW']['balance']
+        paid_fee = price * self.fee
+        if price < self.MIN_ORDER:
+            return self._error('under_min_total_bid', f"최소주문금액 이상으로 주문해주세요 ({self.MIN_ORDER}원)")
+        if price + paid_fee > krw:
+            return self._error('InsufficientFundsBid', "주문가능한 금액(KRW)이 부족합니다.")
+        units = self._orderbook_units(ticker)
+        if not units:
+            return self._error('market_offline', f"{ticker} 호가를 조회할 수 없습니다.")
+
+        remaining = price
+        volume = 0.0
+        for unit in units:
+            take = min(remaining, unit['ask_price'] * unit['ask_size'])
+            volume += take / unit['ask_price']
+            remaining -= take
+            if remaining <= 0:
+                break
+        spent = price - remaining
+        if volume <= 0:
+            return self._error('market_offline', f"{ticker} 매도 호가가 없습니다.")
+        paid_fee = spent * self.fee
+
+        currency = self._currency(ticker)
+        holding = self.balances.setdefault(currency, {'balance': 0.0, 'avg_buy_price': 0.0})
+        total_cost = holding['balance'] * holding['avg_buy_price'] + spent
+        holding['balance'] += volume
+        holding['avg_buy_price'] = total_cost / holding['balance']
+        self.balances['KRW']['balance'] = krw - spent - paid_fee
+        self.save_account()
+        return self._order(ticker, 'bid', 'price', volume, spent, paid_fee, price=str(price))
+
+    def sell_market_order(self, ticker, volume):
+        """
+        시장가 매도: volume만큼 매수 호가를 위에서부터 소진하여 체결
+        """
+        currency = self._currency(ticker)
+        holding = self.balances.get(currency)
+        volume = float(volume)
+        if holding is None or volume <= 0 or volume > holding['balance'] + 1e-12:
+            return self._error('insufficient_funds_ask', "매도가능 잔고가 부족합니다.")
+        units = self._orderbook_units(ticker)
+        if not units:
+            return self._error('market_offline', f"{ticker} 호가를 조회할 수 없습니다.")
+
+        remaining = volume
+        proceeds = 0.0
+        for unit in units:
+            take = min(remaining, unit['bid_size'])
+            proceeds += take * unit['bid_price']
+            remaining -= take
+            if remaining <= 0:
+                break
+        sold = volume - remaining
+        if proceeds < self.MIN_ORDER:
+            return self._error('under_min_total_ask', f"최소주문금액 이상으로 주문해주세요 ({self.MIN_ORDER}원)")
+        paid_fee = proceeds * self.fee
+
+        holding['balance'] = max(holding['balance'] - sold, 0.0)
+        if holding['balance'] == 0:
+            holding['avg_buy_price'] = 0.0
+        self.balances['KRW']['balance'] += proceeds - paid_fee
+        self.save_account()
+        return self._order(ticker, 'ask', 'market', sold, proceeds, paid_fee, volume=str(volume))
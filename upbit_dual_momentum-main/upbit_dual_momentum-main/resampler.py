@@ -0,0 +1,129 @@
+import time
+
+import numpy as np
+import pyupbit
+
+from market_data import DAY_OFFSET, INTERVAL_SECONDS, bucket_start
+
+
+def resample_columns(ts, columns, interval):
+    """
+    컬럼 배열 단위로 캔들을 더 큰 간격으로 합침
+    :param ts: 캔들 시작 시각 (KST epoch 초, 오름차순)
+    :param columns: {'open', 'high', 'low', 'close', 'volume'[, 'value']} 배열 딕셔너리
+    :param interval: 목표 간격
+    :return: (합친 캔들 시작 시각 배열, 합친 컬럼 딕셔너리)
+    """
+    keys = bucket_start(np.asarray(ts), interval)
+    starts = np.concatenate([[0], np.flatnonzero(np.diff(keys)) + 1])
+    ends = np.concatenate([starts[1:], [len(keys)]])
+
+    result = {
+        'open': np.asarray(columns['open'])[starts],
+        'high': np.maximum.reduceat(columns['high'], starts),
+        'low': np.minimum.reduceat(columns['low'], starts),
+        'close': np.asarray(columns['close'])[ends - 1],
+        'volume': np.add.reduceat(columns['volume'], starts)
+    }
+    if 'value' in columns:
+        result['value'] = np.add.reduceat(columns['value'], starts)
+    return keys[starts], result
+
+
+def resample_ohlcv(df, interval):
+    """
+    캔들을 더 큰 간격으로 합침 (일봉은 KST 09:00, 주봉은 월요일 KST 09:00 기준)
+    :param df: pyupbit.get_ohlcv 형식 DataFrame (KST naive 인덱스)
+    :param interval: 목표 간격 (예: 'day', 'week')
+    :return: 같은 형식의 DataFrame (마지막 캔들은 진행 중일 수 있음)
+    """
+    import pandas as pd
+
+    if df is None or df.empty:
+        return df
+    ts = df.index.values.astype('datetime64[s]').astype(np.int64)
+    names = [name for name in ('open', 'high', 'low', 'close', 'volume', 'value') if name in df]
+    keys, columns = resample_columns(ts, {name: df[name].to_numpy() for name in names}, interval)
+    return pd.DataFrame(columns, index=pd.to_datetime(keys, unit='s'))
+
+
+class CandleResampler:
+    """
+    티커별로 기준 간격(예: 시간봉) 하나만 조회하고 일봉/주봉은 그로부터 계산
+    - 기준 캔들은 ttl 동안 재사용하므로 한 사이클 안에서 티커당 조회는 1회
+    - 합친 캔들은 기준 캔들이 바뀌기 전까지 캐시
+    - 같은 기준 캔들에서 나오므로 시간봉과 일봉이 항상 일치
+    """
+
+    # 기준 간격에서 계산 가능한 상위 간격 (기준 간격 자체 포함)
+    DERIVED = {
+        'minute60': ['minute60', 'day', 'week'],
+        'minute30': ['minute30', 'minute60', 'day', 'week'],
+        'minute10': ['minute10', 'minute30', 'minute60', 'day', 'week'],
+        'day': ['day', 'week']
+    }
+
+    def __init__(self, base_interval='minute60', max_base_count=200, ttl=60, fetcher=None, clock=None):
+        """
+        :param base_interval: 티커별로 조회할 기준 간격
+        :param max_base_count: 기준 캔들 최대 조회 개수 (더 많이 필요하면 요청 간격을 직접 조회, 200개 = 요청 1회)
+        :param ttl: 기준 캔들 재사용 시간 (초)
+        :param fetcher: 캔들 조회 함수 (기본값 pyupbit.get_ohlcv)
+        :param clock: time()을 제공하는 시계 (기본값 time 모듈)
+        """
+        self.base_interval = base_interval
+        self.max_base_count = max_base_count
+        self.ttl = ttl
+        self.fetcher = fetcher or pyupbit.get_ohlcv
+        self.clock = clock or time
+        self.base = {}
+        self.aggregates = {}
+
+    def _required_base_count(self, interval, count):
+        """
+        현재 시각 기준으로 interval 캔들 count개를 만들기 위해 필요한 기준 캔들 수
+        """
+        if interval == self.base_interval:
+            return count
+        now = int(self.clock.time()) + DAY_OFFSET  # KST epoch 초
+        first_start = bucket_start(now, interval) - (count - 1) * INTERVAL_SECONDS[interval]
+        return int((now - first_start) // INTERVAL_SECONDS[self.base_interval]) + 1
+
+    def _get_base(self, ticker, needed):
+        cached = self.base.get(ticker)
+        now = self.clock.time()
+        if cached is not None and now - cached['fetched_at'] < self.ttl:
+            df = cached['df']
+            # 필요한 개수를 이미 가지고 있거나, 요청보다 적게 받아 더 이상 과거 데이터가 없는 경우 재사용
+            if len(df) >= needed or cached['exhausted']:
+                return df
+        count = max(needed, self.max_base_count)
+        df = self.fetcher(ticker, interval=self.base_interval, count=count)
+        if df is None:
+            return cached['df'] if cached is not None else None
+        self.base[ticker] = {'df': df, 'fetched_at': now, 'exhausted': len(df) < count}
+        return df
+
+    def get_ohlcv(self, ticker, interval="day", count=200):
+        """
+        pyupbit.get_ohlcv와 같은 형식의 DataFrame
+        기준 간격에서 만들 수 없거나 기준 캔들이 너무 많이 필요하면 요청 간격을 직접 조회
+        """
+        if interval not in self.DERIVED.get(self.base_interval, []):
+            return self.fetcher(ticker, interval=interval, count=count)
+        needed = self._required_base_count(interval, count)
+        if needed > self.max_base_count:
+            return self.fetcher(ticker, interval=interval, count=count)
+
+        base = self._get_base(ticker, needed)
+        if base is None or interval == self.base_interval:
+            return base.iloc[-count:] if base is not None else None
+
+        key = (ticker, interval)
+        cached = self.aggregates.get(key)
+        if cached is None or cached[0] is not base:
+            # 주봉은 일봉에서 다시 합침
+            source = self.get_ohlcv(ticker, 'day', count * 7) if interval == 'week' else base
+            cached = (base, resample_ohlcv(source, interval))
+            self.aggregates[key] = cached
+        return cached[1].iloc[-count:]
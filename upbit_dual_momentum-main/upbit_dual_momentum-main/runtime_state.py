@@ -0,0 +1,71 @@
+import os
+import pickle
+import time
+
+RUNTIME_STATE_VERSION = 1
+
+
+class RuntimeStateStore:
+    """
+    재시작 시 이어서 실행하기 위한 실행 상태 스냅샷 (pickle 파일 하나, 원자적 교체)
+    - 매매 중지 여부, 마지막 리밸런싱 시각, 상관계수 누적 합계, 돌파 목표가 테이블, 캔들/순위 캐시
+    - 저장 시점의 보유 코인 목록을 함께 기록해 복원 시 현재 잔고와 비교
+    """
+
+    def __init__(self, path='runtime_state.pkl', interval=300, max_age=3600, clock=None):
+        """
+        :param path: 스냅샷 파일 경로
+        :param interval: 주기적 저장 간격 (초)
+        :param max_age: 복원할 수 있는 스냅샷의 최대 나이 (초, 넘으면 처음부터 시작)
+        :param clock: time()을 제공하는 시계 (기본값 time 모듈)
+        """
+        self.path = path
+        self.interval = interval
+        self.max_age = max_age
+        self.clock = clock or time
+        self.last_saved_at = None
+
+    def save(self, holdings, state):
+        """
+        :param holdings: 저장 시점 보유 코인 티커 목록 (복원 시 잔고 검증용)
+        :param state: 복원할 상태 딕셔너리
+        """
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({
+                'version': RUNTIME_STATE_VERSION,
+                'saved_at': self.clock.time(),
+                'holdings': sorted(holdings),
+                'state': state
+            }, f)
+        os.replace(tmp_path, self.path)
+        self.last_saved_at = self.clock.time()
+
+    def due(self):
+        """
+        주기적 저장 시점이 되었는지
+        """
+        return self.last_saved_at is None or self.clock.time() - self.last_saved_at >= self.interval
+
+    def load(self):
+        """
+        :return: {'saved_at', 'holdings', 'state'} 또는 None (파일 없음/버전 불일치/max_age 초과/손상)
+        """
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, 'rb') as f:
+                snapshot = pickle.load(f)
+        except Exception as e:
+            print(f"[RuntimeStateStore] {self.path} 로드 실패: {e}")
+            return None
+        if snapshot.get('version') != RUNTIME_STATE_VERSION:
+            return None
+        age = self.clock.time() - snapshot['saved_at']
+        if age < 0 or age > self.max_age:
+            print(f"[RuntimeStateStore] 스냅샷이 오래되어 사용하지 않음 ({age:.0f}초 전)")
+            return None
+        return snapshot
@@ -0,0 +1,113 @@
+import warnings
+
+import numpy as np
+
+
+def close_matrix(closes, length):
+    """
+    티커별 종가를 날짜 기준 (티커 수, length) 행렬로 정렬
+    열은 전체 티커 중 가장 최근 종가 날짜로 끝나는 연속된 length일이며, 해당 날짜 종가가 없으면 NaN
+    (빠진 날짜가 있어도 h열 앞은 항상 h일 전이므로 수익률 기간이 늘어나지 않음)
+    날짜 인덱스가 없는 배열은 위치 기준으로 정렬 (최신 값이 마지막 열, 부족한 앞부분은 NaN)
+    :param closes: {티커: 종가 Series (날짜 또는 'YYYY-MM-DD' 인덱스, 오름차순) 또는 배열}
+    :param length: 행렬 열 수 (일)
+    :return: (티커 리스트, 행렬)
+    """
+    tickers = list(closes)
+    matrix = np.full((len(tickers), length), np.nan)
+    dated = {}
+    for ticker in tickers:
+        index = getattr(closes[ticker], 'index', None)
+        if index is not None:
+            # 일봉 시작 시각(KST 09:00)이나 날짜 문자열을 날짜로 변환
+            dated[ticker] = np.asarray(index, dtype='datetime64[D]')
+    ends = [days[-1] for days in dated.values() if len(days)]
+    end = max(ends) if ends else None
+
+    for i, ticker in enumerate(tickers):
+        values = np.asarray(closes[ticker], dtype=np.float64)
+        if ticker in dated:
+            if end is None:
+                continue
+            columns = (dated[ticker] - end).astype(np.int64) + length - 1
+            keep = columns >= 0
+            matrix[i, columns[keep]] = values[keep]
+        else:
+            values = values[-length:]
+            if len(values):
+                matrix[i, length - len(values):] = values
+    return tickers, matrix
+
+
+class MomentumScorer:
+    """
+    여러 기간 수익률과 변동성 조정 수익률로 종합 모멘텀 점수 계산
+    - 모든 티커/기간을 종가 행렬 하나에서 한 번에 계산 (기간을 늘려도 API 요청 수는 그대로)
+    - h일 수익률은 마지막 종가와 정확히 h일 전 종가로 계산 (기존 백테스트 calculate_7day_return과 동일,
+      기존 실거래의 iloc[-7]은 6일 전 종가였음)
+    - 실거래(main.py)와 백테스트(backtesting.py)가 같은 점수를 사용
+    """
+
+    def __init__(self, horizons=(7,), weights=None, vol_window=7, vol_adjust=False, cross_sectional=False):
+        """
+        :param horizons: 수익률 기간 목록 (일)
+        :param weights: 기간별 가중치 (기본값 균등)
+        :param vol_window: 변동성 계산 기간 (일)
+        :param vol_adjust: 기간 수익률을 (일간 변동성 * sqrt(기간))으로 나눈 값을 사용할지 여부
+        :param cross_sectional: 기간별 점수를 티커 간 z-score로 표준화한 뒤 합칠지 여부 (기간별 크기 차이 보정)
+        """
+        self.horizons = np.asarray(horizons, dtype=int)
+        weights = np.ones(len(self.horizons)) if weights is None else np.asarray(weights, dtype=np.float64)
+        if len(weights) != len(self.horizons):
+            raise ValueError("horizons와 weights의 길이가 다릅니다.")
+        self.weights = weights
+        self.vol_window = vol_window
+        self.vol_adjust = vol_adjust
+        self.cross_sectional = cross_sectional
+
+    @property
+    def lookback(self):
+        """
+        점수 계산에 필요한 캔들 수
+        """
+        return int(max(self.horizons.max(), self.vol_window)) + 1
+
+    def score_matrix(self, matrix):
+        """
+        :param matrix: (티커 수, 캔들 수) 종가 행렬 (최신 값이 마지막 열)
+        :return: {'returns': (티커 수, 기간 수) 기간 수익률(%), 'volatility': 일간 변동성,
+                  'score': 종합 점수 (계산 불가 시 NaN)}
+        """
+        last = matrix[:, -1:]
+        with np.errstate(invalid='ignore', divide='ignore'), warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)  # 데이터가 부족한 티커의 nanstd/nanmean 경고
+            past = matrix[:, -1 - self.horizons]
+            returns = (last / past - 1) * 100
+
+            log_returns = np.diff(np.log(matrix[:, -(self.vol_window + 1):]), axis=1)
+            volatility = np.nanstd(log_returns, axis=1, ddof=1)
+
+            signals = returns
+            if self.vol_adjust:
+                signals = returns / (volatility[:, None] * 100 * np.sqrt(self.horizons)[None, :])
+            if self.cross_sectional and len(matrix) > 1:
+                signals = (signals - np.nanmean(signals, axis=0)) / np.nanstd(signals, axis=0)
+            score = signals @ self.weights  # 한 기간이라도 NaN이면 NaN
+
+        return {'returns': returns, 'volatility': volatility, 'score': score}
+
+    def rank(self, closes, top_n=None):
+        """
+        종합 점수 기준 내림차순 정렬
+        :param closes: {티커: 종가 Series (오름차순)}
+        :return: [(티커, 점수), ...] (점수를 계산할 수 없는 티커 제외)
+        """
+        if not closes:
+            return []
+        tickers, matrix = close_matrix(closes, self.lookback)
+        score = self.score_matrix(matrix)['score']
+        valid = np.flatnonzero(~np.isnan(score))
+        order = valid[np.argsort(-score[valid], kind='stable')]
+        if top_n is not None:
+            order = order[:top_n]
+        return [(tickers[i], float(score[i])) for i in order]
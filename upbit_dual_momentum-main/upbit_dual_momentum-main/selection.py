@@ -0,0 +1,167 @@
+import numpy as np
+
+
+class CorrelationSelector:
+    """
+    모멘텀 후보 간 일간 수익률 상관계수를 이용한 슬롯 선택
+    - 이미 조회한 일봉 종가만 사용 (추가 API 요청 없음)
+    - 최근 window일 수익률의 합/곱 합계를 누적해 두고, 새 날짜가 들어오면 들어온 행과 빠지는 행만 반영
+      (매 사이클 상관행렬 전체를 다시 계산하지 않음)
+    - 결측값이 있으면 두 코인 모두 값이 있는 날짜만으로 상관계수 계산
+    """
+
+    def __init__(self, window=30, max_correlation=0.8, min_periods=5):
+        """
+        :param window: 상관계수 계산에 사용할 최근 일수
+        :param max_correlation: 함께 보유할 수 있는 최대 상관계수
+        :param min_periods: 상관계수 계산에 필요한 최소 공통 일수 (부족하면 제한하지 않음)
+        """
+        self.window = window
+        self.max_correlation = max_correlation
+        self.min_periods = min_periods
+        self.columns = {}
+        self.capacity = 0
+        self.row_days = [None] * window  # 링 버퍼 행별 날짜 (epoch 일)
+        self.values = np.empty((window, 0))
+        self.last_day = None
+        self.next_row = 0
+        self._resize(16)
+
+    def _resize(self, capacity):
+        grow = capacity - self.capacity
+        self.values = np.pad(self.values, ((0, 0), (0, grow)), constant_values=np.nan)
+        if self.capacity == 0:
+            self.count = np.zeros((capacity, capacity))
+            self.sum_xy = np.zeros((capacity, capacity))
+            self.sum_x = np.zeros((capacity, capacity))
+            self.sum_xx = np.zeros((capacity, capacity))
+        else:
+            for name in ('count', 'sum_xy', 'sum_x', 'sum_xx'):
+                setattr(self, name, np.pad(getattr(self, name), ((0, grow), (0, grow))))
+        self.capacity = capacity
+
+    def _column(self, ticker):
+        column = self.columns.get(ticker)
+        if column is None:
+            column = len(self.columns)
+            if column >= self.capacity:
+                self._resize(self.capacity * 2)
+            self.columns[ticker] = column
+        return column
+
+    def _accumulate(self, row, sign):
+        """
+        한 행(날짜)의 기여분을 누적 합계에 더하거나(sign=1) 뺌(sign=-1)
+        """
+        mask = ~np.isnan(row)
+        if not mask.any():
+            return
+        m = mask.astype(np.float64)
+        x = np.where(mask, row, 0.0)
+        self.count += sign * np.outer(m, m)
+        self.sum_xy += sign * np.outer(x, x)
+        self.sum_x += sign * np.outer(x, m)  # [i, j]: j도 값이 있는 날의 i 수익률 합
+        self.sum_xx += sign * np.outer(x * x, m)
+
+    def _set_row(self, index, day, row):
+        self._accumulate(self.values[index], -1)
+        self.values[index] = row
+        self.row_days[index] = day
+        self._accumulate(row, 1)
+
+    def update(self, closes, include_last=False):
+        """
+        티커별 일봉 종가로 수익률 행렬 갱신 (이미 반영한 날짜는 비어 있던 값만 채움)
+        :param closes: {티커: 일봉 종가 Series (날짜 인덱스, 오름차순)}
+        :param include_last: 마지막 캔들 포함 여부 (실거래에서는 진행 중인 캔들이므로 제외)
+        """
+        new_rows = {}
+        filled = {}
+        row_of_day = {day: i for i, day in enumerate(self.row_days) if day is not None}
+        for ticker, series in closes.items():
+            if series is None or len(series) < 2:
+                continue
+            # 이미 반영한 종목에 새 날짜가 없으면 건너뜀
+            last_label = series.index[-1 if include_last else -2]
+            if (ticker in self.columns and self.last_day is not None
+                    and np.datetime64(last_label, 'D').astype(np.int64) <= self.last_day):
+                continue
+            if not include_last:
+                series = series.iloc[:-1]
+            days = np.asarray(series.index, dtype='datetime64[D]').astype(np.int64)[1:]
+            returns = np.diff(np.log(series.to_numpy(dtype=np.float64)))
+            column = self._column(ticker)
+            for day, value in zip(days[-self.window:], returns[-self.window:]):
+                if self.last_day is None or day > self.last_day:
+                    new_rows.setdefault(int(day), {})[column] = value
+                elif day in row_of_day and np.isnan(self.values[row_of_day[day], column]):
+                    filled.setdefault(row_of_day[day], {})[column] = value
+
+        # 새 종목의 과거 날짜는 기존 행에 채움
+        for index, values in filled.items():
+            row = self.values[index].copy()
+            row[list(values)] = list(values.values())
+            self._set_row(index, self.row_days[index], row)
+
+        # 새 날짜는 가장 오래된 행을 밀어내고 추가
+        for day in sorted(new_rows)[-self.window:]:
+            row = np.full(self.capacity, np.nan)
+            values = new_rows[day]
+            row[list(values)] = list(values.values())
+            self._set_row(self.next_row, day, row)
+            self.next_row = (self.next_row + 1) % self.window
+            self.last_day = day
+
+    def correlation(self, tickers):
+        """
+        tickers 간 상관계수 행렬 (공통 일수가 min_periods 미만이면 NaN)
+        """
+        index = [self.columns.get(ticker, -1) for ticker in tickers]
+        known = np.array([i for i in index if i >= 0], dtype=int)
+        result = np.full((len(tickers), len(tickers)), np.nan)
+        if len(known) == 0:
+            return result
+        grid = np.ix_(known, known)
+        n = self.count[grid]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean_x = self.sum_x[grid] / n
+            mean_y = mean_x.T
+            var_x = self.sum_xx[grid] / n - mean_x ** 2
+            var_y = var_x.T
+            corr = (self.sum_xy[grid] / n - mean_x * mean_y) / np.sqrt(var_x * var_y)
+        corr[n < self.min_periods] = np.nan
+        positions = np.array([i for i, column in enumerate(index) if column >= 0], dtype=int)
+        result[np.ix_(positions, positions)] = corr
+        return result
+
+    def is_diversified(self, ticker, chosen):
+        """
+        ticker와 이미 선택/보유한 코인들의 상관계수가 모두 max_correlation 이하인지
+        (데이터가 부족한 쌍은 제한하지 않음)
+        """
+        chosen = [c for c in chosen if c != ticker]
+        if not chosen:
+            return True
+        corr = self.correlation([ticker] + chosen)[0, 1:]
+        return not np.any(corr > self.max_correlation)
+
+    def select(self, ranked, slots, held=()):
+        """
+        모멘텀 순위 순서대로 상관계수 상한을 지키며 최대 slots개 선택
+        :param ranked: 모멘텀 순으로 정렬된 후보 티커 리스트
+        :param slots: 선택할 개수
+        :param held: 이미 보유 중이라 함께 고려할 티커
+        """
+        if not ranked:
+            return []
+        tickers = list(held) + [t for t in ranked if t not in held]
+        corr = self.correlation(tickers) > self.max_correlation  # NaN 비교는 False
+        chosen = list(range(len(held)))
+        selected = []
+        for i in range(len(held), len(tickers)):
+            if len(selected) >= slots:
+                break
+            if not corr[i, chosen].any():
+                chosen.append(i)
+                selected.append(tickers[i])
+        return selected
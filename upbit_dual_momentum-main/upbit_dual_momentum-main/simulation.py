@@ -0,0 +1,360 @@
+"""
+가상 시계 기반 가속 시뮬레이션
+
+실제 UpbitMomentumStrategy.run()을 과거 캔들과 모의 거래소(PaperUpbit)에 연결하고,
+sleep을 가상 시각 이동으로 바꿔 1분 단위 루프를 CPU가 허용하는 속도로 반복 실행함
+(MA120 중지/재개, 보유 기간 만료, 월요일 23:29 리밸런싱 구간 누락 같은 시간 관련 버그 확인용)
+"""
+import json
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pyupbit
+
+from clock import SimulationFinished, VirtualClock
+from market_data import INTERVAL_SECONDS, bucket_start, kst_epoch
+from orderbook import OrderbookDepthCache
+from paper_exchange import PaperUpbit
+from universe import TICKER_BATCH_SIZE
+
+
+class CandleSeries:
+    """
+    한 티커/간격의 캔들을 numpy 배열로 보관 (가상 시각 기준 조회용)
+    """
+
+    COLUMNS = ['open', 'high', 'low', 'close', 'volume', 'value']
+
+    def __init__(self, df, interval):
+        self.interval = interval
+        self.index = df.index
+        self.ts = np.array([kst_epoch(ts.to_pydatetime()) for ts in df.index], dtype=np.int64)
+        self.open = df['open'].to_numpy(dtype=float)
+        self.high = df['high'].to_numpy(dtype=float)
+        self.low = df['low'].to_numpy(dtype=float)
+        self.close = df['close'].to_numpy(dtype=float)
+        self.volume = df['volume'].to_numpy(dtype=float)
+        self.value = df['value'].to_numpy(dtype=float) if 'value' in df else self.close * self.volume
+        # DataFrame을 빠르게 만들기 위한 2차원 배열, 24시간 거래대금 계산용 누적합
+        self.end_ts = self.ts + INTERVAL_SECONDS[interval]
+        self.values = np.column_stack([self.open, self.high, self.low, self.close, self.volume, self.value])
+        self.value_cumsum = np.concatenate([[0.0], np.cumsum(self.value)])
+
+
+class HistoricalQuotation:
+    """
+    과거 캔들로 pyupbit 시세 함수(get_tickers/get_ohlcv/get_current_price/get_orderbook)를 흉내냄
+    - 가상 시각 이후의 데이터는 보이지 않음 (진행 중인 캔들은 더 작은 간격의 완성된 캔들로 구성)
+    - 현재가는 가장 작은 간격에서 마지막으로 완성된 캔들의 종가
+    - 호가는 현재가와 24시간 거래대금으로 만든 가상 호가
+    """
+
+    def __init__(self, candles, clock, request_latency=0.0, spread=0.001, depth_ratio=0.0005, levels=15):
+        """
+        :param candles: {티커: {간격: DataFrame}} (pyupbit.get_ohlcv 형식)
+        :param clock: VirtualClock
+        :param request_latency: 요청 1회당 진행시킬 가상 시간 (초)
+        :param spread: 가상 호가 스프레드 비율
+        :param depth_ratio: 호가 단계별 잔량 (24시간 거래대금 대비 비율)
+        :param levels: 가상 호가 단계 수
+        """
+        self.clock = clock
+        self.request_latency = request_latency
+        self.spread = spread
+        self.depth_ratio = depth_ratio
+        self.levels = levels
+        self.series = {
+            ticker: {interval: CandleSeries(df, interval) for interval, df in intervals.items() if df is not None and len(df)}
+            for ticker, intervals in candles.items()
+        }
+        # 티커별 가장 작은 간격 (현재가/진행 중 캔들 구성에 사용)
+        self.finest = {
+            ticker: min(intervals.values(), key=lambda series: INTERVAL_SECONDS[series.interval])
+            for ticker, intervals in self.series.items() if intervals
+        }
+        self.request_count = 0
+
+    def _request(self):
+        self.request_count += 1
+        if self.request_latency:
+            self.clock.sleep(self.request_latency)
+
+    def _now(self):
+        return kst_epoch(self.clock.now())
+
+    @staticmethod
+    def _completed(series, now):
+        # now 시점까지 완성된 캔들 개수
+        return int(np.searchsorted(series.end_ts, now, side='right'))
+
+    def _price_at(self, ticker, now):
+        series = self.finest.get(ticker)
+        if series is None:
+            return None
+        completed = self._completed(series, now)
+        if completed > 0:
+            return float(series.close[completed - 1])
+        return None
+
+    def get_tickers(self, fiat="", **kwargs):
+        self._request()
+        return [ticker for ticker in self.series if ticker.startswith(fiat)]
+
+    def get_ohlcv(self, ticker="KRW-BTC", interval="day", count=200, **kwargs):
+        import pandas as pd
+
+        self._request()
+        series = self.series.get(ticker, {}).get(interval)
+        if series is None:
+            return None
+        now = self._now()
+        completed = self._completed(series, now)
+
+        # 진행 중인 캔들: 더 작은 간격에서 완성된 캔들을 합쳐서 구성
+        start = bucket_start(now, interval)
+        partial = None
+        price = self._price_at(ticker, now)
+        if price is not None and (completed == 0 or series.ts[completed - 1] < start):
+            fine = self.finest[ticker]
+            lo = int(np.searchsorted(fine.ts, start, side='left'))
+            hi = self._completed(fine, now)
+            if fine.interval != interval and hi > lo:
+                partial = (start, fine.open[lo], fine.high[lo:hi].max(), fine.low[lo:hi].min(), price,
+                           fine.volume[lo:hi].sum(), fine.value[lo:hi].sum())
+            else:
+                partial = (start, price, price, price, price, 0.0, 0.0)
+
+        n = count - 1 if partial is not None else count
+        first = max(completed - n, 0)
+        if partial is None:
+            block, index = series.values[first:completed], series.index[first:completed]
+        elif completed < len(series.ts) and series.ts[completed] == partial[0]:
+            # 데이터에 있는 같은 시각의 캔들 행을 진행 중인 값으로 덮어씀
+            block = series.values[first:completed + 1].copy()
+            block[-1] = partial[1:]
+            index = series.index[first:completed + 1]
+        else:
+            block = np.vstack([series.values[first:completed], partial[1:]])
+            index = pd.to_datetime(np.append(series.ts[first:completed], partial[0]), unit='s')
+        if len(block) == 0:
+            return None
+        return pd.DataFrame(block, index=index, columns=CandleSeries.COLUMNS)
+
+    def _ticker_info(self, ticker, now):
+        series = self.finest.get(ticker)
+        price = self._price_at(ticker, now)
+        if price is None:
+            return None
+        completed = self._completed(series, now)
+        day_ago = int(np.searchsorted(series.ts, now - 86400, side='left'))
+        prev_price = series.close[day_ago - 1] if day_ago > 0 else series.open[0]
+        return {
+            'market': ticker,
+            'trade_price': price,
+            'acc_trade_price_24h': float(series.value_cumsum[completed] - series.value_cumsum[day_ago]),
+            'signed_change_rate': price / prev_price - 1 if prev_price else 0.0
+        }
+
+    def get_current_price(self, ticker="KRW-BTC", verbose=False, **kwargs):
+        tickers = [ticker] if isinstance(ticker, str) else list(ticker)
+        # pyupbit은 티커를 TICKER_BATCH_SIZE개씩 나눠 요청함
+        for _ in range(max(-(-len(tickers) // TICKER_BATCH_SIZE), 1)):
+            self._request()
+        now = self._now()
+        infos = [info for info in (self._ticker_info(t, now) for t in tickers) if info is not None]
+        if verbose:
+            return infos
+        if isinstance(ticker, str):
+            return infos[0]['trade_price'] if infos else None
+        return {info['market']: info['trade_price'] for info in infos}
+
+    def get_orderbook(self, ticker="KRW-BTC", **kwargs):
+        self._request()
+        now = self._now()
+        tickers = [ticker] if isinstance(ticker, str) else list(ticker)
+        orderbooks = []
+        for t in tickers:
+            info = self._ticker_info(t, now)
+            if info is None:
+                continue
+            price = info['trade_price']
+            level_krw = max(info['acc_trade_price_24h'] * self.depth_ratio, 10000)
+            units = []
+            for i in range(self.levels):
+                ask_price = price * (1 + self.spread / 2 + i * self.spread)
+                bid_price = price * (1 - self.spread / 2 - i * self.spread)
+                units.append({
+                    'ask_price': ask_price,
+                    'bid_price': bid_price,
+                    'ask_size': level_krw / ask_price,
+                    'bid_size': level_krw / bid_price
+                })
+            orderbooks.append({'market': t, 'timestamp': int(self.clock.time() * 1000), 'orderbook_units': units})
+        if isinstance(ticker, str):
+            return orderbooks[0] if orderbooks else None
+        return orderbooks
+
+
+class RecordingNotifier:
+    """
+    텔레그램 대신 (가상 시각, 메시지)를 기록
+    """
+
+    def __init__(self, clock, verbose=False):
+        self.clock = clock
+        self.verbose = verbose
+        self.messages = []
+
+    def send(self, message):
+        self.messages.append((self.clock.now(), message))
+        if self.verbose:
+            print(f"[{self.clock.now()}] {message}")
+
+    def send_now(self, message):
+        self.send(message)
+
+    def flush(self, timeout=5):
+        pass
+
+
+def fetch_history(tickers, start, end, intervals=('day', 'minute60', 'minute10'), warmup_days=130):
+    """
+    시뮬레이션에 필요한 과거 캔들을 REST로 조회
+    (가장 작은 간격이 현재가와 진행 중인 캔들을 결정하므로, 시간봉 변동성 돌파를 재현하려면 분봉이 필요)
+    :param warmup_days: 일봉 워밍업 기간 (MA120 계산용), 분/시간봉은 3일
+    :return: {티커: {간격: DataFrame}}
+    """
+    # 업비트 캔들 API의 to는 UTC 기준이므로 KST 종료 시각을 UTC로 바꿔 전달
+    to = (end - timedelta(hours=9)).replace(tzinfo=timezone.utc)
+    candles = {}
+    for ticker in tickers:
+        candles[ticker] = {}
+        for interval in intervals:
+            seconds = INTERVAL_SECONDS[interval]
+            warmup = warmup_days if interval == 'day' else 3
+            count = int(((end - start).total_seconds() + warmup * 86400) // seconds) + 1
+            candles[ticker][interval] = pyupbit.get_ohlcv(ticker, interval=interval, count=count, to=to)
+            time.sleep(0.2)  # API 호출 제한 방지
+    return candles
+
+
+class SimulationHarness:
+    """
+    실제 UpbitMomentumStrategy를 가상 시계/과거 시세/모의 거래소로 실행
+    """
+
+    def __init__(self, candles, start, end, config_path='config.json', initial_krw=1_000_000,
+                 request_latency=0.0, verbose=False):
+        """
+        :param candles: {티커: {간격: DataFrame}} 과거 캔들 (워밍업 기간 포함)
+        :param start: 시뮬레이션 시작 시각 (KST naive datetime)
+        :param end: 시뮬레이션 종료 시각 (KST naive datetime)
+        :param config_path: 기반 설정 파일 (거래 설정만 사용)
+        :param initial_krw: 초기 원화 잔고
+        :param request_latency: 시세 요청 1회당 가상 지연 (초)
+        :param verbose: 메시지를 즉시 출력할지 여부
+        """
+        self.clock = VirtualClock(start, end)
+        self.start = start
+        self.end = end
+        self.quotation = HistoricalQuotation(candles, self.clock, request_latency=request_latency)
+        self.notifier = RecordingNotifier(self.clock, verbose=verbose)
+        self.cycle_starts = []
+
+        # 매 사이클 보유 정보 파일을 저장하므로 가능하면 메모리 파일시스템 사용
+        self.work_dir = tempfile.mkdtemp(prefix='upbit_sim_', dir='/dev/shm' if os.path.isdir('/dev/shm') else None)
+        with open(config_path, 'r') as f:
+            config = json.load(f)
+        config['trading']['mode'] = 'paper'
+        config['paper'] = dict(config.get('paper', {}),
+                               holdings_file=os.path.join(self.work_dir, 'holdings_data.json'))
+        config['startup'] = dict(config.get('startup', {}), candle_cache_dir=None)
+        config['market_data'] = {'enabled': False}
+        # 가상 시계에서는 돌파 목표가 테이블을 사이클 안에서 갱신
+        config['breakout'] = dict(config.get('breakout', {}), background=False)
+        config['runtime_state'] = dict(config.get('runtime_state', {}),
+                                       path=os.path.join(self.work_dir, 'runtime_state.pkl'))
+        self.config_path = os.path.join(self.work_dir, 'config.json')
+        with open(self.config_path, 'w') as f:
+            json.dump(config, f)
+
+        self.upbit = PaperUpbit(
+            account_file=os.path.join(self.work_dir, 'paper_account.json'),
+            initial_krw=initial_krw,
+            fee=config['paper'].get('fee', 0.0005),
+            orderbook_cache=OrderbookDepthCache(ttl=1, fetcher=self.quotation.get_orderbook, clock=self.clock)
+        )
+
+    def rebalance_windows(self):
+        """
+        시뮬레이션 기간 중 월요일 23:29~23:31 리밸런싱 구간 목록
+        """
+        windows = []
+        day = datetime(self.start.year, self.start.month, self.start.day)
+        while day <= self.end:
+            if day.weekday() == 0:
+                windows.append((day.replace(hour=23, minute=29), day.replace(hour=23, minute=31)))
+            day += timedelta(days=1)
+        return [(s, e) for s, e in windows if s >= self.start and e <= self.end]
+
+    def record_cycle_start(self, cycle):
+        """
+        사이클 메서드를 감싸 호출 시각을 cycle_starts에 기록
+        """
+        def recorded(*args, **kwargs):
+            self.cycle_starts.append(self.clock.now())
+            return cycle(*args, **kwargs)
+        return recorded
+
+    def run(self):
+        """
+        :return: 결과 요약 딕셔너리 (사이클 수, 실제 소요 시간, 누락된 리밸런싱 구간, 최종 잔고, 메시지)
+        """
+        from main import UpbitMomentumStrategy
+
+        strategy = UpbitMomentumStrategy(
+            config_path=self.config_path, upbit=self.upbit, quotation=self.quotation,
+            clock=self.clock, notifier=self.notifier
+        )
+        # 정상/리스크 전용 사이클 진입 시각을 사이클 시작으로 기록
+        for name in ('run_cycle', 'run_degraded_cycle'):
+            setattr(strategy, name, self.record_cycle_start(getattr(strategy, name)))
+
+        wall_start = time.perf_counter()
+        try:
+            strategy.run()
+        except SimulationFinished:
+            pass
+        wall_time = time.perf_counter() - wall_start
+
+        missed = [
+            (s, e) for s, e in self.rebalance_windows()
+            if not any(s <= t < e for t in self.cycle_starts)
+        ]
+        return {
+            'cycles': len(self.cycle_starts),
+            'wall_time': wall_time,
+            'virtual_days': (self.clock.now() - self.start).total_seconds() / 86400,
+            'requests': self.quotation.request_count,
+            'missed_rebalance_windows': missed,
+            'balances': self.upbit.get_balances(),
+            'messages': self.notifier.messages
+        }
+
+
+if __name__ == "__main__":
+    # 시뮬레이션 기간 설정 (예: 2024-01-01부터 2024-01-31까지)
+    sim_start = datetime(2024, 1, 1)
+    sim_end = datetime(2024, 1, 31)
+    sim_tickers = ['KRW-BTC', 'KRW-ETH', 'KRW-SOL', 'KRW-DOGE', 'KRW-HBAR', 'KRW-STPT']
+
+    history = fetch_history(sim_tickers, sim_start, sim_end)
+    result = SimulationHarness(history, sim_start, sim_end, request_latency=0.05).run()
+
+    print(f"사이클 수: {result['cycles']:,} / 가상 {result['virtual_days']:.1f}일 / 실제 {result['wall_time']:.1f}초")
+    print(f"시세 요청 수: {result['requests']:,}")
+    print(f"누락된 리밸런싱 구간: {result['missed_rebalance_windows']}")
+    print(f"최종 잔고: {result['balances']}")
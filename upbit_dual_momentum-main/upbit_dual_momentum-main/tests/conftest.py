@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 테스트 대상 모듈은 패키지가 아닌 스크립트 디렉토리에 있음
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
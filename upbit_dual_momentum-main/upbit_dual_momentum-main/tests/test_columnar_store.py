@@ -0,0 +1,52 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from columnar_store import ColumnarStore
+
+INDEX = pd.date_range('2023-01-01 09:00', '2023-03-31 09:00', freq='D')
+CANDLES = pd.DataFrame({name: np.arange(len(INDEX), dtype=float) + 1
+                        for name in ('open', 'high', 'low', 'close', 'volume', 'value')}, index=INDEX)
+
+
+class RecordingFetcher:
+    """
+    pyupbit.get_ohlcv처럼 to(UTC) 이전 캔들 count개를 돌려주고 요청을 기록
+    """
+
+    def __init__(self):
+        self.requests = []
+
+    def __call__(self, ticker, interval, count, to):
+        self.requests.append((count, to))
+        return CANDLES[CANDLES.index < pd.Timestamp(to) + timedelta(hours=9)].iloc[-count:]
+
+
+def day_range(start, end):
+    return datetime.strptime(start, "%Y-%m-%d").replace(hour=9), \
+        datetime.strptime(end, "%Y-%m-%d").replace(hour=9) + timedelta(days=1, seconds=-1)
+
+
+def test_update_fetches_only_missing_tail(tmp_path):
+    store = ColumnarStore(str(tmp_path), interval='day')
+    fetcher = RecordingFetcher()
+    assert store.update('KRW-BTC', *day_range('2023-02-01', '2023-02-28'), fetcher=fetcher) == 28
+    fetcher.requests.clear()
+
+    # 종료일이 사흘 늘어나면 마지막 저장 캔들 + 새 캔들 3개만 조회
+    assert store.update('KRW-BTC', *day_range('2023-02-01', '2023-03-03'), fetcher=fetcher) == 4
+    assert fetcher.requests == [(4, '2023-03-04 00:00:00')]
+
+
+def test_update_fills_missing_head(tmp_path):
+    store = ColumnarStore(str(tmp_path), interval='day')
+    fetcher = RecordingFetcher()
+    store.update('KRW-BTC', *day_range('2023-02-01', '2023-02-28'), fetcher=fetcher)
+    fetcher.requests.clear()
+
+    store.update('KRW-BTC', *day_range('2023-01-20', '2023-02-28'), fetcher=fetcher)
+    assert fetcher.requests == [(12, '2023-02-01 00:00:00'), (1, '2023-03-01 00:00:00')]
+    df = store.get_ohlcv_range('KRW-BTC', *day_range('2023-01-20', '2023-02-28'))
+    assert list(df.index) == list(pd.date_range('2023-01-20 09:00', '2023-02-28 09:00', freq='D'))
+    assert (df['close'].to_numpy() == CANDLES.loc[df.index, 'close'].to_numpy()).all()
@@ -0,0 +1,83 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from deadline import CallTimeout, DeadlineExecutor, DeadlineProxy, StallWatchdog
+
+DEADLINE = 0.3
+
+
+class HangingHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        time.sleep(30)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope='module')
+def hanging_url():
+    # 응답하지 않는 로컬 서버 (timeout 없는 requests.get은 pyupbit처럼 계속 기다림)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), HangingHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/v1/candles/minutes/60"
+    server.shutdown()
+
+
+def test_call_timeout_fires_at_deadline(hanging_url):
+    executor = DeadlineExecutor(default_deadline=DEADLINE)
+    started = time.monotonic()
+    with pytest.raises(CallTimeout):
+        executor.call('quotation.get_ohlcv', requests.get, hanging_url)
+    assert DEADLINE <= time.monotonic() - started < DEADLINE + 0.5
+    assert executor.timeouts == {'quotation.get_ohlcv': 1}
+    assert executor.hung == 1
+
+
+def test_hanging_cycle_finishes_on_time_and_watchdog_fires(hanging_url):
+    executor = DeadlineExecutor(default_deadline=DEADLINE, max_workers=2)
+    stalls = []
+    watchdog = StallWatchdog(stall_after=DEADLINE * 2.5, on_stall=stalls.append, check_interval=0.05)
+    watchdog.start()
+    watchdog.cycle_started()
+    started = time.monotonic()
+    for _ in range(3):
+        with pytest.raises(CallTimeout):
+            executor.call('quotation.get_ohlcv', requests.get, hanging_url)
+    # 멈춘 작업 스레드는 동시 실행 수에서 빠지므로 다음 호출도 새 스레드에서 바로 실행
+    assert executor.call('quotation.get_tickers', lambda: 'ok') == 'ok'
+    elapsed = time.monotonic() - started
+    watchdog.cycle_finished()
+
+    assert 3 * DEADLINE <= elapsed < 3 * DEADLINE + 1.0
+    assert len(stalls) == 1 and stalls[0] > DEADLINE * 2.5
+    assert executor.timeout_count() == 3
+
+
+def test_per_operation_deadline_and_proxy():
+    class Slow:
+        rate = 1
+
+        def wait(self, seconds):
+            time.sleep(seconds)
+            return seconds
+
+    executor = DeadlineExecutor(default_deadline=DEADLINE, deadlines={'slow.wait': None})
+    proxy = DeadlineProxy(Slow(), executor, 'slow')
+    assert proxy.rate == 1
+    # 제한 없음으로 지정한 작업은 제한 시간을 넘겨도 기다림
+    assert proxy.wait(DEADLINE + 0.1) == DEADLINE + 0.1
+
+    executor.deadlines = {'slow.wait': 0.05}
+    with pytest.raises(CallTimeout):
+        proxy.wait(1)
+    assert executor.timeouts == {'slow.wait': 1}
+
+
+def test_disabled_executor_runs_inline():
+    executor = DeadlineExecutor(enabled=False)
+    assert executor.call('quotation.get_ohlcv', threading.current_thread) is threading.current_thread()
@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from indicators import breakout_levels, ohlc_panel
+
+
+class BaselineStrategy:
+    """
+    NumPy 커널 도입 전 UpbitMomentumStrategy의 티커별 pandas 계산 (d1b27b3 main.py에서 그대로 복사)
+    """
+
+    def calculate_atr(self, df, window=14):
+        """
+        ATR(평균 진폭)을 계산
+        :param df: Pandas DataFrame, OHLCV 데이터
+        :param window: ATR 계산 기간 (기본값은 14일)
+        :return: ATR 값
+        """
+        high_low = df['high'] - df['low']
+        high_close = abs(df['high'] - df['close'].shift())
+        low_close = abs(df['low'] - df['close'].shift())
+        true_range = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
+        atr = true_range.rolling(window=window).mean()
+        return atr.iloc[-1]
+
+    def calculate_dynamic_k(self, df, base_k=0.5):
+        """
+        동적 k 값 계산
+        :param df: OHLCV 데이터 (DataFrame)
+        :param base_k: 기본 k 값
+        :return: 동적으로 계산된 k 값
+        """
+        recent_volatility = (df['high'] - df['low']).mean()  # 최근 변동성 평균
+        average_volatility = (df['high'] - df['low']).rolling(window=14).mean().iloc[-1]  # 14일 이동 평균 변동성
+
+        # 변동성 비율을 기반으로 k 조정
+        volatility_ratio = recent_volatility / average_volatility if average_volatility > 0 else 1
+        dynamic_k = base_k * volatility_ratio
+
+        # k 값이 지나치게 크거나 작아지지 않도록 제한
+        return max(0.3, min(dynamic_k, 0.7))
+
+    def calculate_breakout_price(self, df):
+        yesterday = df.iloc[-2]
+        today_open = df['open'].iloc[-1]
+        volatility = yesterday['high'] - yesterday['low']
+
+        # 동적 k 값 계산
+        dynamic_k = self.calculate_dynamic_k(df)
+
+        target_price = today_open + (volatility * dynamic_k)
+        return target_price
+
+
+def random_candles(rng, length, volatility=0.01):
+    close = 100 * np.exp(np.cumsum(rng.normal(0, volatility, length)))
+    open_ = np.concatenate([[close[0]], close[:-1]])
+    return pd.DataFrame({
+        'open': open_,
+        'high': np.maximum(open_, close) * (1 + rng.uniform(0, volatility, length)),
+        'low': np.minimum(open_, close) * (1 - rng.uniform(0, volatility, length)),
+        'close': close,
+        'volume': rng.uniform(1, 10, length)
+    })
+
+
+def flat_candles(length):
+    return pd.DataFrame({name: np.full(length, 100.0) for name in ('open', 'high', 'low', 'close', 'volume')})
+
+
+def assert_matches(actual, expected):
+    if np.isnan(expected):
+        assert np.isnan(actual)
+    else:
+        assert actual == pytest.approx(expected, rel=1e-12)
+
+
+@pytest.fixture
+def frames():
+    rng = np.random.default_rng(0)
+    frames = {f"KRW-T{i}": random_candles(rng, length) for i, length in enumerate([48, 48, 30, 15, 14, 10, 3])}
+    frames['KRW-SPIKE'] = random_candles(rng, 48, volatility=0.2)  # k가 상한/하한에 걸리는 경우
+    frames['KRW-FLAT'] = flat_candles(48)  # 평균 진폭 0
+    return frames
+
+
+def test_kernels_match_baseline(frames):
+    tickers, panel = ohlc_panel(frames)
+    levels = breakout_levels(panel)
+    baseline = BaselineStrategy()
+    for i, ticker in enumerate(tickers):
+        df = frames[ticker]
+        assert_matches(levels['atr'][i], baseline.calculate_atr(df))
+        assert_matches(levels['dynamic_k'][i], baseline.calculate_dynamic_k(df))
+        assert_matches(levels['breakout_price'][i], baseline.calculate_breakout_price(df))
+
+
+def test_stop_loss_and_take_profit_match_baseline(frames):
+    tickers, panel = ohlc_panel(frames)
+    levels = breakout_levels(panel)
+    baseline = BaselineStrategy()
+    for i, ticker in enumerate(tickers):
+        df = frames[ticker]
+        # execute_trades의 손절/익절 기준 계산
+        breakout_price = baseline.calculate_breakout_price(df)
+        atr = baseline.calculate_atr(df)
+        assert_matches(levels['stop_loss'][i], breakout_price - (1.5 * atr))
+        assert_matches(levels['take_profit'][i], breakout_price + (1.5 * atr))
+
+
+def test_panel_length_trims_to_latest_candles(frames):
+    # 테이블은 최근 candle_count개 캔들로 계산하므로 잘라낸 뒤에도 티커별 계산과 같아야 함
+    tickers, panel = ohlc_panel(frames, length=20)
+    levels = breakout_levels(panel)
+    baseline = BaselineStrategy()
+    for i, ticker in enumerate(tickers):
+        df = frames[ticker].iloc[-20:]
+        assert_matches(levels['atr'][i], baseline.calculate_atr(df))
+        assert_matches(levels['breakout_price'][i], baseline.calculate_breakout_price(df))
@@ -0,0 +1,92 @@
+import time
+
+import pytest
+
+import market_data
+from market_data import DAY_OFFSET, MarketDataClient, MarketDataDaemon
+
+NOW = int(time.time())
+
+
+def start_daemon(monkeypatch, data_dir, tickers):
+    monkeypatch.setattr(market_data.pyupbit, 'get_tickers', lambda fiat="KRW": list(tickers))
+    daemon = MarketDataDaemon(data_dir=str(data_dir), intervals=['minute1'], capacity=4)
+    daemon.setup()
+    daemon.prices.header['updated_at'] = time.time()
+    return daemon
+
+
+def trade(daemon, ticker, price, ts=NOW, volume=1.0):
+    # trade_timestamp는 UTC ms
+    daemon.on_ticker({'code': ticker, 'trade_price': price, 'trade_timestamp': ts * 1000, 'trade_volume': volume})
+
+
+def test_client_reads_prices_and_candles(monkeypatch, tmp_path):
+    daemon = start_daemon(monkeypatch, tmp_path, ['KRW-BTC', 'KRW-ETH'])
+    trade(daemon, 'KRW-BTC', 100.0)
+    trade(daemon, 'KRW-BTC', 101.0, ts=NOW + 1)
+    trade(daemon, 'KRW-ETH', 10.0)
+
+    client = MarketDataClient(data_dir=str(tmp_path))
+    assert client.get_current_price('KRW-BTC') == 101.0
+    assert client.get_current_price(['KRW-ETH', 'KRW-BTC']) == {'KRW-ETH': 10.0, 'KRW-BTC': 101.0}
+    assert client.get_current_price('KRW-XRP') is None
+
+    candles = client.get_candles('KRW-BTC', 'minute1', 1)
+    assert candles['ts'][0] == market_data.bucket_start(NOW + 1 + DAY_OFFSET, 'minute1')
+    assert candles['close'][0] == 101.0
+
+
+def test_client_is_not_alive_without_heartbeat(monkeypatch, tmp_path):
+    daemon = start_daemon(monkeypatch, tmp_path, ['KRW-BTC'])
+    trade(daemon, 'KRW-BTC', 100.0)
+    daemon.prices.header['updated_at'] = time.time() - 60
+    assert MarketDataClient(data_dir=str(tmp_path), max_staleness=10).get_current_price('KRW-BTC') is None
+
+
+def test_client_remaps_slots_after_daemon_restart(monkeypatch, tmp_path):
+    daemon = start_daemon(monkeypatch, tmp_path, ['KRW-BTC', 'KRW-ETH'])
+    trade(daemon, 'KRW-BTC', 100.0)
+    trade(daemon, 'KRW-ETH', 10.0)
+    client = MarketDataClient(data_dir=str(tmp_path))
+    assert client.get_current_price(['KRW-BTC', 'KRW-ETH']) == {'KRW-BTC': 100.0, 'KRW-ETH': 10.0}
+    old_prices = client.prices
+
+    # 신규 상장으로 마켓 수와 슬롯 배치가 바뀐 채 데몬 재시작
+    restarted = start_daemon(monkeypatch, tmp_path, ['KRW-ADA', 'KRW-ETH', 'KRW-BTC'])
+    assert restarted.generation == daemon.generation + 1
+    # 이전 파일을 매핑 중인 리더는 잘리지 않은 이전 파일을 그대로 읽음
+    assert old_prices.data['price'].tolist() == [100.0, 10.0]
+
+    trade(restarted, 'KRW-ETH', 11.0)
+    trade(restarted, 'KRW-BTC', 102.0)
+    # 재시작 전 슬롯(KRW-BTC = 0)으로 읽으면 KRW-ADA 슬롯을 읽게 됨
+    assert client.get_current_price('KRW-BTC') == 102.0
+    assert client.get_current_price('KRW-ETH') == 11.0
+    assert client.get_current_price('KRW-ADA') is None  # 아직 체결 없음
+    assert client.slots == restarted.slots
+
+
+def test_client_waits_while_daemon_rebuilds_files(monkeypatch, tmp_path):
+    daemon = start_daemon(monkeypatch, tmp_path, ['KRW-BTC'])
+    trade(daemon, 'KRW-BTC', 100.0)
+    client = MarketDataClient(data_dir=str(tmp_path))
+    assert client.get_current_price('KRW-BTC') == 100.0
+
+    # prices.bin은 새 세대로 바뀌었지만 markets.json은 아직 이전 세대
+    daemon.prices.header['generation'] += 1
+    client.index_stat = None
+    assert client.get_current_price('KRW-BTC') is None
+
+
+@pytest.mark.parametrize('capacity', [2, 8])
+def test_candle_ring_resize_replaces_file(tmp_path, capacity):
+    path = str(tmp_path / 'KRW-BTC_minute1.bin')
+    ring = market_data.CandleRing(path, 4, writable=True)
+    ring.append((60, 1, 1, 1, 1, 1, 1))
+    reader = market_data.CandleRing(path)
+
+    resized = market_data.CandleRing(path, capacity, writable=True)
+    assert resized.capacity == capacity and resized.last() is None
+    # 크기가 바뀌어도 기존 매핑은 이전 내용을 그대로 읽음
+    assert reader.view(1)['ts'].tolist() == [60]
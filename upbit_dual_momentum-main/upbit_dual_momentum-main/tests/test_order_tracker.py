@@ -0,0 +1,82 @@
+import pytest
+
+from order_tracker import OrderTracker
+
+
+class FakeClock:
+    def __init__(self, now=0.0):
+        self.now = now
+        self.sleeps = 0
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps += 1
+        self.now += seconds
+
+
+class FakeUpbit:
+    """
+    get_balances가 호출될 때마다 balances 목록에서 다음 잔고를 돌려줌 (마지막 잔고는 계속 유지)
+    """
+
+    def __init__(self, *balances):
+        self.balances = list(balances)
+        self.calls = 0
+
+    def get_balances(self):
+        self.calls += 1
+        balances = self.balances[0] if len(self.balances) == 1 else self.balances.pop(0)
+        return [{'currency': currency, 'balance': str(balance), 'locked': '0', 'avg_buy_price': '100'}
+                for currency, balance in balances.items()]
+
+    def get_order(self, order_uuid):
+        return {'uuid': order_uuid, 'market': 'KRW-BTC', 'side': 'bid', 'state': 'wait'}
+
+
+def test_reconcile_detects_fill_of_timed_out_buy():
+    # 주문 호출은 제한 시간을 넘겼지만 두 번째 잔고 조회에서 체결이 보임
+    upbit = FakeUpbit({'KRW': 100_000}, {'KRW': 100_000}, {'KRW': 49_975, 'BTC': 0.5})
+    clock = FakeClock()
+    tracker = OrderTracker(upbit, poll_interval=1, confirm_timeout=10, clock=clock)
+    before = (tracker.get_balance('BTC'), tracker.get_balance('KRW'))
+
+    order = tracker.reconcile('KRW-BTC', 'bid', before)
+    assert order['side'] == 'bid' and order['state'] == 'done'
+    assert float(order['executed_volume']) == 0.5
+    assert float(order['executed_funds']) == 50_025
+    assert tracker.get_balance('KRW-BTC') == 0.5
+
+
+def test_reconcile_detects_fill_of_timed_out_sell():
+    upbit = FakeUpbit({'KRW': 0, 'BTC': 0.5}, {'KRW': 49_975})
+    tracker = OrderTracker(upbit, poll_interval=1, clock=FakeClock())
+    before = (tracker.get_balance('BTC'), tracker.get_balance('KRW'))
+
+    order = tracker.reconcile('KRW-BTC', 'ask', before)
+    assert float(order['executed_volume']) == 0.5
+    assert float(order['executed_funds']) == 49_975
+
+
+def test_reconcile_gives_up_when_balance_never_changes():
+    upbit = FakeUpbit({'KRW': 100_000})
+    clock = FakeClock()
+    tracker = OrderTracker(upbit, poll_interval=1, confirm_timeout=3, clock=clock)
+    before = (tracker.get_balance('BTC'), tracker.get_balance('KRW'))
+
+    assert tracker.reconcile('KRW-BTC', 'bid', before) is None
+    assert clock.now == 3
+    assert upbit.calls == 5  # 시작 시 1회 + 0, 1, 2, 3초에 재조회
+
+
+def test_confirm_deadline_follows_tracker_clock():
+    # 가상 시계에서는 clock.sleep만으로 제한 시간에 도달해야 함 (실제 시간 기준이면 무한 반복)
+    upbit = FakeUpbit({'KRW': 100_000})
+    clock = FakeClock()
+    tracker = OrderTracker(upbit, poll_interval=1, confirm_timeout=5, clock=clock)
+
+    with pytest.raises(TimeoutError):
+        tracker.confirm({'uuid': 'u-1', 'market': 'KRW-BTC', 'side': 'bid', 'state': 'wait'})
+    assert clock.now == 5
+    assert clock.sleeps == 5
@@ -0,0 +1,95 @@
+import os
+
+import pytest
+
+from orderbook import OrderbookDepthCache
+
+FIXTURE = os.path.join(os.path.dirname(__file__), 'fixtures', 'orderbook_krw.json')
+
+
+class FakeClock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+def test_pass_within_impact():
+    cache = OrderbookDepthCache.from_fixture(FIXTURE, max_impact=1.0)
+    orders, estimate = cache.plan_buy('KRW-BTC', 300_000)
+    assert orders == [300_000]
+    assert estimate['filled'] and estimate['impact'] <= 1.0
+
+
+def test_shrink_to_impact_capacity():
+    cache = OrderbookDepthCache.from_fixture(FIXTURE, max_impact=1.0, max_splits=1)
+    orders, estimate = cache.plan_buy('KRW-THIN', 300_000)
+    # 1001/1005/1010원 호가 전부(150,800원) + 1020원 호가 70개(71,400원)까지가 중간가(1000원) 대비 1% 이내
+    assert orders == [222_200]
+    assert estimate['impact'] > 1.0
+    assert cache.estimate_buy('KRW-THIN', orders[0])['impact'] == pytest.approx(1.0)
+
+
+def test_split_when_allowed():
+    cache = OrderbookDepthCache.from_fixture(FIXTURE, max_impact=1.0, max_splits=3)
+    orders, estimate = cache.plan_buy('KRW-THIN', 300_000)
+    assert orders == [150_000, 150_000]
+    assert estimate['impact'] > 1.0
+
+
+def test_skip_when_capacity_below_min_order():
+    cache = OrderbookDepthCache.from_fixture(FIXTURE, max_impact=1.0, max_splits=3)
+    orders, estimate = cache.plan_buy('KRW-GAP', 50_000)
+    assert orders == []
+    assert estimate['impact'] > 1.0
+    assert cache.max_invest_within_impact('KRW-GAP') == 0
+
+
+def test_skip_when_orderbook_unavailable():
+    cache = OrderbookDepthCache.from_fixture(FIXTURE)
+    assert cache.plan_buy('KRW-MISSING', 100_000) == ([], None)
+
+
+def recording_cache(requests, clock):
+    recorded = OrderbookDepthCache.from_fixture(FIXTURE)
+
+    def fetcher(tickers):
+        requests.append(list(tickers))
+        return [recorded.snapshots[ticker] for ticker in tickers if ticker in recorded.snapshots]
+
+    return OrderbookDepthCache(ttl=10, max_impact=1.0, fetcher=fetcher, clock=clock)
+
+
+def test_rebalance_snapshot_is_reused_after_ttl():
+    requests = []
+    clock = FakeClock()
+    cache = recording_cache(requests, clock)
+    as_of = cache.prefetch(['KRW-BTC', 'KRW-THIN'])
+    clock.now = 25  # 앞선 주문 체결을 기다리는 동안 ttl 경과
+    assert cache.plan_buy('KRW-BTC', 300_000, as_of=as_of)[0] == [300_000]
+    assert cache.plan_buy('KRW-THIN', 300_000, as_of=as_of)[0] == [222_200]
+    assert requests == [['KRW-BTC', 'KRW-THIN']]  # 리밸런싱당 호가 요청 1회
+
+
+def test_next_rebalance_fetches_again_and_ignores_old_snapshot():
+    requests = []
+    clock = FakeClock()
+    cache = recording_cache(requests, clock)
+    cache.prefetch(['KRW-BTC', 'KRW-THIN'])
+    clock.now = 100
+    as_of = cache.prefetch(['KRW-THIN'])
+    assert requests == [['KRW-BTC', 'KRW-THIN'], ['KRW-THIN']]
+    assert cache.plan_buy('KRW-THIN', 300_000, as_of=as_of)[0] == [222_200]
+    # 이번 리밸런싱에서 조회하지 않은 이전 호가로는 주문하지 않음
+    assert cache.plan_buy('KRW-BTC', 300_000, as_of=as_of) == ([], None)
+
+
+def test_expired_orderbook_without_snapshot_skips_buy():
+    requests = []
+    clock = FakeClock()
+    cache = recording_cache(requests, clock)
+    cache.prefetch(['KRW-THIN'])
+    clock.now = 11
+    assert cache.plan_buy('KRW-THIN', 300_000) == ([], None)
+    assert requests == [['KRW-THIN']]
@@ -0,0 +1,127 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from scoring import MomentumScorer, close_matrix
+
+
+class BaselineBacktest:
+    """
+    점수 엔진 도입 전 UpbitMomentumBacktest의 7일 수익률/상위 3개 선정 (d1b27b3 backtesting.py에서 그대로 복사)
+    """
+
+    def calculate_7day_return(self, df, current_date):
+        """
+        특정 날짜의 7일 수익률 계산
+
+        Parameters:
+        df (DataFrame): 코인 가격 데이터
+        current_date (datetime): 기준 날짜
+
+        Returns:
+        float: 7일 수익률
+        """
+        past_date = current_date - timedelta(days=7)
+        past_date_str = past_date.strftime("%Y-%m-%d")
+        current_date_str = current_date.strftime("%Y-%m-%d")
+        if past_date_str in df.index and current_date_str in df.index:
+            past_close = df.loc[past_date_str]['close']
+            current_close = df.loc[current_date_str]['close']
+            return ((current_close - past_close) / past_close) * 100
+        else:
+            return -np.inf  # 데이터 부족 시 극단적인 손실률 반환
+
+    def get_top3_momentum(self, date_str, top20, all_price_data):
+        """
+        모멘텀 상위 3개 코인 선정
+
+        Parameters:
+        date_str (str): 기준 날짜 (YYYY-MM-DD)
+        top20 (list): 시가총액 상위 20개 코인 티커 리스트
+        all_price_data (dict): 코인별 가격 데이터
+
+        Returns:
+        list: 모멘텀 상위 3개 코인 티커 리스트
+        """
+        returns = {}
+        current_date = datetime.strptime(date_str, "%Y-%m-%d")
+        for ticker in top20:
+            df = all_price_data.get(ticker, pd.DataFrame())
+            if df.empty:
+                continue
+            seven_day_return = self.calculate_7day_return(df, current_date)
+            if seven_day_return > -100:  # 정상적인 수익률만 고려
+                returns[ticker] = seven_day_return
+
+        # 수익률 기준 정렬
+        sorted_returns = sorted(returns.items(), key=lambda x: x[1], reverse=True)
+        top3 = [coin for coin, ret in sorted_returns[:3]]
+        return top3
+
+
+@pytest.fixture
+def price_data():
+    """
+    백테스트 형식(YYYY-MM-DD 인덱스)의 일봉, 일부 코인은 중간 날짜가 빠짐
+    """
+    rng = np.random.default_rng(1)
+    dates = pd.date_range('2023-01-01', '2023-03-31')
+    data = {}
+    for i in range(12):
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.05, len(dates))))
+        df = pd.DataFrame({'close': close}, index=dates.strftime("%Y-%m-%d"))
+        if i % 3 == 0:
+            df = df.drop(df.index[rng.choice(len(df), 15, replace=False)])
+        data[f"KRW-C{i}"] = df
+    return data
+
+
+def test_seven_day_return_matches_baseline_backtest(price_data):
+    scorer = MomentumScorer(horizons=[7])
+    baseline = BaselineBacktest()
+    for date_str in pd.date_range('2023-01-10', '2023-03-31').strftime("%Y-%m-%d"):
+        closes = {ticker: df['close'].loc[:date_str].iloc[-scorer.lookback:]
+                  for ticker, df in price_data.items() if date_str in df.index}
+        tickers, matrix = close_matrix(closes, scorer.lookback)
+        returns = scorer.score_matrix(matrix)['returns'][:, 0]
+        current_date = datetime.strptime(date_str, "%Y-%m-%d")
+        for ticker, actual in zip(tickers, returns):
+            expected = baseline.calculate_7day_return(price_data[ticker], current_date)
+            if expected == -np.inf:
+                assert np.isnan(actual)
+            else:
+                assert actual == pytest.approx(expected, rel=1e-12)
+
+        ranked = [ticker for ticker, _ in scorer.rank(closes)][:3]
+        assert ranked == baseline.get_top3_momentum(date_str, list(price_data), price_data)
+
+
+def test_missing_days_do_not_stretch_horizon():
+    index = pd.to_datetime(['2023-01-01', '2023-01-02', '2023-01-04', '2023-01-05', '2023-01-06',
+                            '2023-01-07', '2023-01-08', '2023-01-09']) + pd.Timedelta(hours=9)
+    closes = {'KRW-GAP': pd.Series([90.0, 100, 101, 102, 103, 104, 105, 110], index=index)}
+    _, matrix = close_matrix(closes, 8)
+    # 2023-01-03이 빠져도 첫 열은 8일 전(2023-01-02)
+    assert matrix[0, 0] == 100.0 and np.isnan(matrix[0, 1])
+    assert MomentumScorer(horizons=[7]).score_matrix(matrix)['returns'][0, 0] == pytest.approx(10.0)
+
+
+def test_stale_ticker_is_not_shifted_to_latest_date():
+    index = pd.date_range('2023-01-01 09:00', periods=9, freq='D')
+    closes = {
+        'KRW-NOW': pd.Series(np.arange(9, dtype=float) + 100, index=index),
+        'KRW-STALE': pd.Series(np.arange(8, dtype=float) + 100, index=index[:8]),  # 마지막 날 종가 없음
+    }
+    ranked = MomentumScorer(horizons=[7]).rank(closes)
+    assert [ticker for ticker, _ in ranked] == ['KRW-NOW']
+
+
+def test_live_horizon_is_seven_calendar_days():
+    # 기존 실거래는 일봉 8개 중 iloc[-7](6일 전)을 사용했고, 점수 엔진은 백테스트와 같이 7일 전 종가를 사용
+    index = pd.date_range('2023-01-01 09:00', periods=8, freq='D')
+    close = pd.Series([100.0, 50, 60, 70, 80, 90, 100, 120], index=index)
+    returns = MomentumScorer(horizons=[7]).score_matrix(close_matrix({'KRW-A': close}, 8)[1])['returns']
+    assert returns[0, 0] == pytest.approx((close.iloc[-1] / close.iloc[-8] - 1) * 100)
+    assert returns[0, 0] != pytest.approx((close.iloc[-1] / close.iloc[-7] - 1) * 100)
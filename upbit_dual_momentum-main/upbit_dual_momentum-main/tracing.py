@@ -0,0 +1,225 @@
+"""
+사이클 단위 의사결정 추적
+
+run() 한 사이클 동안의 구간(span)을 중첩 구조와 속성과 함께 기록하고
+사이클이 끝나면 Chrome trace-event JSON(chrome://tracing, Perfetto에서 열기)으로 저장
+지연 예산을 넘긴 사이클은 샘플링 프로파일러가 수집한 호출 스택을
+같은 trace의 별도 스레드 행과 flamegraph용 folded 파일로 함께 저장
+"""
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+
+class Span:
+    """
+    진행 중인 구간 (with 블록 안에서 set으로 결과 속성 추가)
+    """
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+        self.start = time.perf_counter()
+
+    def set(self, **attrs):
+        self.args.update(attrs)
+
+
+class _NullSpan:
+    def set(self, **attrs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class StackSampler(threading.Thread):
+    """
+    대상 스레드의 호출 스택을 일정 간격으로 수집하는 샘플링 프로파일러
+    """
+
+    def __init__(self, thread_id, interval=0.005):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = []
+        self.stopped = threading.Event()
+
+    @staticmethod
+    def _stack(frame):
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        stack.reverse()
+        return stack
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.samples.append((time.perf_counter(), self._stack(frame)))
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+        return self.samples
+
+
+class Tracer:
+    """
+    중첩 구간 기록기 (비활성화 시 span은 아무 일도 하지 않는 공용 객체를 반환)
+    """
+
+    SAMPLER_TID = 0
+
+    def __init__(self, enabled=False, output_dir='traces', latency_budget=None, profile=False,
+                 sample_interval=0.005, max_files=500):
+        """
+        :param enabled: 추적 여부
+        :param output_dir: trace 파일 저장 디렉토리
+        :param latency_budget: 사이클 지연 예산 (초, 초과 시 프로파일 저장, None이면 저장 안 함)
+        :param profile: 샘플링 프로파일러 사용 여부
+        :param sample_interval: 스택 샘플링 간격 (초)
+        :param max_files: 보관할 최대 trace 파일 수 (오래된 것부터 삭제)
+        """
+        self.enabled = enabled
+        self.output_dir = output_dir
+        self.latency_budget = latency_budget
+        self.profile = profile and latency_budget is not None
+        self.sample_interval = sample_interval
+        self.max_files = max_files
+        self.pid = os.getpid()
+        self.events = []
+        self.cycle_started_at = None
+        self.cycle_thread = None
+        self.sampler = None
+        self.cycle_count = 0
+
+    def _us(self, t, cycle_started_at=None):
+        return (t - (self.cycle_started_at if cycle_started_at is None else cycle_started_at)) * 1e6
+
+    def span(self, name, **attrs):
+        # 사이클 스레드의 구간만 기록 (돌파 목표가 갱신 등 백그라운드 스레드 호출은 추적하지 않음)
+        if not self.enabled or self.cycle_started_at is None or threading.get_ident() != self.cycle_thread:
+            return NULL_SPAN
+        return self._span(name, attrs)
+
+    @contextmanager
+    def _span(self, name, attrs):
+        # 구간이 열릴 때의 사이클 기준 시각과 이벤트 목록 사용 (사이클 종료 후 닫혀도 다음 사이클에 섞이지 않음)
+        cycle_started_at, events = self.cycle_started_at, self.events
+        span = Span(name, attrs)
+        try:
+            yield span
+        except BaseException as e:
+            span.set(error=repr(e))
+            raise
+        finally:
+            end = time.perf_counter()
+            events.append({
+                'name': name,
+                'ph': 'X',
+                'ts': self._us(span.start, cycle_started_at),
+                'dur': (end - span.start) * 1e6,
+                'pid': self.pid,
+                'tid': threading.get_ident(),
+                'args': {key: self._jsonable(value) for key, value in span.args.items()}
+            })
+
+    @staticmethod
+    def _jsonable(value):
+        if isinstance(value, (str, int, float, bool)) or value is None:
+            return value
+        if isinstance(value, (list, tuple)):
+            return [Tracer._jsonable(item) for item in value]
+        return str(value)
+
+    @contextmanager
+    def cycle(self, **attrs):
+        """
+        run() 한 사이클 (종료 시 trace 파일 저장)
+        """
+        if not self.enabled:
+            yield NULL_SPAN
+            return
+        self.events = []
+        self.cycle_started_at = time.perf_counter()
+        self.cycle_thread = threading.get_ident()
+        self.cycle_count += 1
+        started = datetime.now()
+        if self.profile:
+            self.sampler = StackSampler(threading.get_ident(), self.sample_interval)
+            self.sampler.start()
+        try:
+            with self._span('cycle', attrs) as span:
+                yield span
+        finally:
+            duration = time.perf_counter() - self.cycle_started_at
+            samples = self.sampler.stop() if self.sampler is not None else []
+            self.sampler = None
+            slow = self.latency_budget is not None and duration > self.latency_budget
+            try:
+                self.write(started, duration, slow, samples if slow else [])
+            except Exception as e:
+                print(f"[Tracer] trace 저장 실패: {e}")
+            self.cycle_started_at = None
+            self.cycle_thread = None
+
+    def _sample_events(self, samples, end):
+        """
+        연속된 샘플에서 공통 접두 스택은 이어 붙여 프레임별 구간 이벤트로 변환
+        """
+        events = []
+        open_frames = []  # (프레임 이름, 시작 시각)
+
+        def close(depth, t):
+            while len(open_frames) > depth:
+                name, start = open_frames.pop()
+                events.append({'name': name, 'ph': 'X', 'ts': self._us(start), 'dur': (t - start) * 1e6,
+                               'pid': self.pid, 'tid': self.SAMPLER_TID, 'cat': 'sample'})
+
+        for t, stack in samples:
+            common = 0
+            while common < min(len(stack), len(open_frames)) and open_frames[common][0] == stack[common]:
+                common += 1
+            close(common, t)
+            open_frames.extend((name, t) for name in stack[common:])
+        close(0, end)
+        return events
+
+    def write(self, started, duration, slow, samples):
+        os.makedirs(self.output_dir, exist_ok=True)
+        base = os.path.join(self.output_dir, f"cycle_{started.strftime('%Y%m%d_%H%M%S')}_{self.cycle_count:06d}")
+        events = list(self.events)
+        if samples:
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': self.pid, 'tid': self.SAMPLER_TID,
+                           'args': {'name': 'sampling profiler'}})
+            events.extend(self._sample_events(samples, self.cycle_started_at + duration))
+            with open(base + '.folded', 'w') as f:
+                folded = {}
+                for _, stack in samples:
+                    key = ';'.join(stack)
+                    folded[key] = folded.get(key, 0) + 1
+                f.write('\n'.join(f"{stack} {count}" for stack, count in folded.items()) + '\n')
+        with open(base + '.json', 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms',
+                       'otherData': {'started': started.isoformat(), 'duration': duration,
+                                     'slow': slow}}, f)
+        self.prune()
+
+    def prune(self):
+        traces = sorted(name for name in os.listdir(self.output_dir) if name.startswith('cycle_'))
+        for name in traces[:max(len(traces) - self.max_files, 0)]:
+            os.remove(os.path.join(self.output_dir, name))
@@ -0,0 +1,140 @@
+import numpy as np
+import pyupbit
+
+# 스캔 가능한 호가 통화 (원화 외 마켓은 KRW-{호가 통화} 시세로 원화 환산)
+QUOTE_CURRENCIES = ('KRW', 'BTC', 'USDT')
+# pyupbit.get_current_price가 요청 1회에 담는 최대 티커 수
+TICKER_BATCH_SIZE = 200
+
+
+def split_market(market):
+    """
+    'BTC-ETH' -> ('BTC', 'ETH')
+    """
+    quote, base = market.split('-', 1)
+    return quote, base
+
+
+def convert_closes(closes, rate_closes, rates=None):
+    """
+    원화 외 마켓 종가를 원화 기준으로 환산 (호가 통화별로 종가 행렬 하나에 환율 열을 곱함)
+    :param closes: {티커: 종가 Series (날짜 인덱스, 오름차순)}
+    :param rate_closes: {호가 통화: KRW-{호가 통화} 종가 Series}
+    :param rates: {호가 통화: 현재 환율} (환율 종가가 없는 날짜에 사용)
+    :return: {티커: 원화 환산 종가 Series} (입력 순서 유지)
+    """
+    import pandas as pd
+
+    groups = {}
+    for ticker in closes:
+        quote = split_market(ticker)[0]
+        if quote != 'KRW':
+            groups.setdefault(quote, []).append(ticker)
+    if not groups:
+        return closes
+
+    converted = {}
+    for quote, tickers in groups.items():
+        frame = pd.DataFrame({ticker: closes[ticker] for ticker in tickers})
+        rate = rate_closes.get(quote)
+        rate = rate.reindex(frame.index, method='ffill') if rate is not None else pd.Series(np.nan, index=frame.index)
+        if rates and quote in rates:
+            rate = rate.fillna(rates[quote])
+        krw = frame.mul(rate, axis=0)
+        for ticker in tickers:
+            converted[ticker] = krw[ticker].dropna()
+    return {ticker: converted.get(ticker, series) for ticker, series in closes.items()}
+
+
+class UniversePrefilter:
+    """
+    티커(현재가) 일괄 조회로 24시간 거래대금 순위를 매기고,
+    유동성 기준에 미달하는 코인을 캔들 조회 전에 걸러냄
+    - 일괄 조회는 TICKER_BATCH_SIZE개씩 나눠 요청하므로 마켓 N개에 ceil(N / 200)회 요청
+    - 원화 외 호가 통화(BTC, USDT) 마켓도 같은 요청에 포함한 KRW-BTC/KRW-USDT 시세로 원화 환산해 비교
+    - 같은 코인이 여러 마켓에 있으면 원화 마켓(없으면 원화 환산 거래대금이 가장 큰 마켓) 하나만 남김
+    """
+
+    def __init__(self, min_trade_value=1_000_000_000, max_candidates=50, min_change_rate=None, quotes=('KRW',),
+                 fetcher=None, ticker_fetcher=None):
+        """
+        :param min_trade_value: 최소 24시간 거래대금 (원)
+        :param max_candidates: 거래대금 상위 몇 개까지 남길지 (None이면 제한 없음)
+        :param min_change_rate: 최소 24시간 등락률 (%, None이면 사용 안 함)
+        :param quotes: 스캔할 호가 통화 목록 (QUOTE_CURRENCIES 중)
+        :param fetcher: 티커 일괄 조회 함수 (기본값 pyupbit.get_current_price(..., verbose=True), 200개씩 나눠 요청)
+        :param ticker_fetcher: 마켓 목록 조회 함수 (기본값 pyupbit.get_tickers)
+        """
+        unknown = [quote for quote in quotes if quote not in QUOTE_CURRENCIES]
+        if unknown:
+            raise ValueError(f"지원하지 않는 호가 통화: {unknown}")
+        self.min_trade_value = min_trade_value
+        self.max_candidates = max_candidates
+        self.min_change_rate = min_change_rate
+        self.quotes = tuple(quotes)
+        self.fetcher = fetcher or (lambda tickers: pyupbit.get_current_price(tickers, verbose=True))
+        self.ticker_fetcher = ticker_fetcher or pyupbit.get_tickers
+        self.last_snapshot = {}
+        self.rates = {'KRW': 1.0}
+
+    def markets(self):
+        """
+        스캔 대상 호가 통화의 전체 마켓 목록 (조회 1회)
+        """
+        if self.quotes == ('KRW',):
+            return list(self.ticker_fetcher(fiat="KRW"))
+        return [market for market in self.ticker_fetcher(fiat="") if split_market(market)[0] in self.quotes]
+
+    def filter(self, tickers):
+        """
+        유동성 기준을 통과한 티커만 24시간 거래대금(원화 환산) 내림차순으로 반환
+        :param tickers: 전체 후보 티커 리스트
+        :return: 기준을 통과한 티커 리스트 (조회 실패 시 입력 그대로 반환)
+        """
+        if not tickers:
+            return []
+        # 환율 마켓도 같은 일괄 조회에 포함
+        wanted = set(tickers)
+        rate_markets = [f"KRW-{quote}" for quote in self.quotes if quote != 'KRW']
+        request = list(tickers) + [market for market in rate_markets if market not in wanted]
+        try:
+            snapshot = self.fetcher(request)
+        except Exception as e:
+            print(f"[UniversePrefilter] 티커 일괄 조회 실패, 전체 유니버스 사용: {e}")
+            return list(tickers)
+        if not snapshot:
+            return list(tickers)
+
+        self.last_snapshot = {item['market']: item for item in snapshot}
+        self.rates = {'KRW': 1.0}
+        for quote in self.quotes:
+            info = self.last_snapshot.get(f"KRW-{quote}")
+            if info is not None:
+                self.rates[quote] = info['trade_price']
+
+        items = [item for item in snapshot if item['market'] in wanted]
+        if not items:
+            return []
+        markets = np.array([item['market'] for item in items])
+        quotes, bases = zip(*(split_market(market) for market in markets))
+        quote_names, quote_index = np.unique(quotes, return_inverse=True)
+        rates = np.array([self.rates.get(quote, np.nan) for quote in quote_names])
+        trade_value = np.array([item.get('acc_trade_price_24h', 0) for item in items], dtype=np.float64)
+        trade_value = trade_value * rates[quote_index]  # 환율을 모르면 NaN -> 탈락
+
+        mask = trade_value >= self.min_trade_value
+        if self.min_change_rate is not None:
+            change_rate = np.array([item.get('signed_change_rate', 0) for item in items], dtype=np.float64)
+            mask &= change_rate * 100 >= self.min_change_rate
+
+        # 코인별로 원화 마켓 우선, 그다음 거래대금이 큰 마켓 하나만 남김
+        survivors = np.flatnonzero(mask)
+        is_krw = np.asarray(quotes)[survivors] == 'KRW'
+        survivors = survivors[np.lexsort((-trade_value[survivors], ~is_krw))]
+        _, first = np.unique(np.asarray(bases)[survivors], return_index=True)
+        survivors = np.sort(survivors[first])  # 조회 순서 복원 (동률 순서 유지)
+
+        survivors = survivors[np.argsort(-trade_value[survivors], kind='stable')]
+        if self.max_candidates is not None:
+            survivors = survivors[:self.max_candidates]
+        return markets[survivors].tolist()